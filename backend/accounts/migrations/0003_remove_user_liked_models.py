@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_created_at'),
+        # Likes are copied into trained_model.ModelLike before the list goes.
+        ('trained_model', '0008_modellike'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='liked_models',
+        ),
+    ]
@@ -22,7 +22,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     full_name = models.CharField(max_length=255, blank=True)
     limit = models.IntegerField(default=20)
     premium_user = models.BooleanField(default=False)
-    liked_models = models.JSONField(default=list)
     created_at = models.DateTimeField(default=timezone.now)
 
     is_active = models.BooleanField(default=True)
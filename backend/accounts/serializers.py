@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import User
+from trained_model.likes import liked_model_ids
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -12,6 +13,11 @@ class RegisterSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 class UserSerializer(serializers.ModelSerializer):
+    liked_models = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = ['id', 'email', 'full_name', 'premium_user', 'limit', 'liked_models', 'created_at']
+
+    def get_liked_models(self, user):
+        return liked_model_ids(user)
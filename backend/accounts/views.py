@@ -6,12 +6,14 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth.hashers import make_password, check_password
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.timezone import now
+from django.core.exceptions import ValidationError
 from .models import User
 from .serializers import RegisterSerializer, UserSerializer
 from .utils import generate_jwt, decode_jwt
+from trained_model.models import TrainedModel
+from trained_model.likes import set_like, toggle_like
 import re
 import os
-import requests
 import logging
 
 logger = logging.getLogger(__name__)
@@ -207,71 +209,45 @@ def get_user_from_token(request):
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def update_liked_model(request, model_id):
+    """
+    Like or unlike a model for the signed-in user. An optional ``state`` of
+    'like' or 'dislike' sets it explicitly; without one the like is toggled.
+    """
     user = request.user
-    
-    if not user.liked_models:
-        user.liked_models = []
-    
-    already_liked = model_id in user.liked_models
-    state = "dislike" if already_liked else "like"
-    
-    if already_liked:
-        user.liked_models.remove(model_id)
-    else:
-        user.liked_models.append(model_id)
-    
-    try:
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        ml_api_url = f"http://127.0.0.1:8000/api/v1/trained-model/update-model/{model_id}/"
-        
-        response = requests.put(
-            ml_api_url,
-            json={"state": state},
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {token}"
-            },
-            timeout=10
-        )
-        
-        if response.status_code == 404:
-            return Response({
-                "message": "Model not found on the ML service.",
-                "success": False,
-                "error": "MODEL_NOT_FOUND"
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        if response.status_code >= 400:
-            return Response({
-                "message": "Failed to update model status on ML service.",
-                "success": False,
-                "error": "EXTERNAL_API_ERROR"
-            }, status=status.HTTP_400_BAD_REQUEST)
-            
-    except requests.exceptions.RequestException:
+    state = request.data.get('state') if hasattr(request.data, 'get') else None
+
+    if state not in (None, 'like', 'dislike'):
         return Response({
-            "message": "Unable to connect to ML service.",
+            "message": "'state' must be either 'like' or 'dislike'.",
             "success": False,
-            "error": "SERVICE_CONNECTION_ERROR"
-        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-    
+            "error": "INVALID_STATE"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        user.save()
-        
+        if state is None:
+            state = toggle_like(user, model_id)
+        else:
+            set_like(user, model_id, state == 'like')
+    except (TrainedModel.DoesNotExist, ValidationError):
         return Response({
-            "message": f"Model {'added to' if state == 'like' else 'removed from'} liked models successfully.",
-            "success": True,
-            "data": {
-                "action": state,
-                "model_id": model_id,
-                "total_liked_models": len(user.liked_models)
-            }
-        }, status=status.HTTP_200_OK)
-        
+            "message": "Model not found.",
+            "success": False,
+            "error": "MODEL_NOT_FOUND"
+        }, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         logger.error(f"Error saving user liked models: {str(e)}")
         return Response({
             "message": "Failed to save liked model status.",
             "success": False,
             "error": "DATABASE_SAVE_ERROR"
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        "message": f"Model {'added to' if state == 'like' else 'removed from'} liked models successfully.",
+        "success": True,
+        "data": {
+            "action": state,
+            "model_id": model_id,
+            "total_liked_models": user.model_likes.count()
+        }
+    }, status=status.HTTP_200_OK)
@@ -139,6 +139,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Training workers write job state from several processes.
+            'timeout': 20,
+        },
     }
 }
 
@@ -185,4 +189,51 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_ROOT = BASE_DIR / 'media'
-MEDIA_URL = '/media/'
\ No newline at end of file
+MEDIA_URL = '/media/'
+
+# Background training jobs
+# Run workers with: python manage.py run_training_workers
+
+TRAINING_WORKERS = 2
+TRAINING_JOB_POLL_INTERVAL = 1.0
+
+# Wall-clock budget, in seconds, for hyperparameter searches
+TRAINING_SEARCH_TIME_BUDGET = 120
+
+# Largest expanded feature matrix, in bytes, the polynomial degree search may build
+POLYNOMIAL_SEARCH_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Uploads at least this large train linear regression out-of-core, streaming the CSV
+LINEAR_OUT_OF_CORE_MIN_BYTES = 256 * 1024 * 1024
+
+# CPU cores trainings may use (None: every core). The budget is enforced per
+# process, not across them: each server process gets TRAINING_CPU_CORES
+# divided by TRAINING_SERVER_PROCESSES (set it to the gunicorn/uvicorn worker
+# count), and run_training_workers divides it between its workers. Lower
+# TRAINING_CPU_CORES when both run on one machine.
+TRAINING_CPU_CORES = None
+TRAINING_SERVER_PROCESSES = 1
+TRAINING_MAX_CORES_PER_JOB = None
+
+# Trainings are reused for identical uploads, target and parameters. Bump the
+# version whenever a change to the training code should invalidate old results.
+TRAINING_RESULT_CACHE_VERSION = 2
+# Disk budget, in bytes, for cached training artifacts (0 disables the cache)
+TRAINING_RESULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Per-process budget, in bytes, for unpickled models kept in memory for predictions
+MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Async predictions for one model are batched for up to this many milliseconds or rows
+PREDICTION_BATCH_MAX_WAIT_MS = 2
+PREDICTION_BATCH_MAX_ROWS = 64
+
+# Numpy arrays in model artifacts are memory-mapped with this mode, so workers on a
+# host share one copy of each model's arrays (None loads them into private memory)
+MODEL_ARTIFACT_MMAP_MODE = 'r'
+
+# Bulk CSV predictions read, score and stream back this many rows at a time
+BULK_PREDICTION_CHUNK_ROWS = 10000
+
+# Dotted path to the model search backend (None: SQLite FTS5 on SQLite, plain queries elsewhere)
+MODEL_SEARCH_BACKEND = None
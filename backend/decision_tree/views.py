@@ -10,7 +10,6 @@ from sklearn.metrics import accuracy_score, confusion_matrix, recall_score
 import pandas as pd
 import numpy as np
 
-import joblib
 from tempfile import NamedTemporaryFile
 import os
 import logging
@@ -22,8 +21,15 @@ from sklearn.metrics import (
 )
 from django.core.files.images import ImageFile
 from trained_model.models import TrainedModel, ModelStats, ModelGraph
+from trained_model.datasets import load_training_data
+from trained_model.artifacts import dump_artifact, save_preprocessor, save_model_metadata
+from trained_model.result_cache import cached_training
 from ml_utils.graph_utils import *
 from ml_utils.stats_utils import *
+from ml_utils.ingestion import DatasetValidationError
+from ml_utils.preprocessing import build_feature_matrix
+from ml_utils.cpu_scheduler import core_lease
+from ml_utils.tree_utils import path_nodes_by_depth, predict_at_depth, truncate_tree
 
 from trained_model.serializer import ModelStatsSerializer, ModelGraphSerializer
 
@@ -42,15 +48,22 @@ class DecisionTreeView(APIView):
             best_score = 0
             best_params = {}
             
+            # Greedy splits do not depend on the depth limit, so one depth-10
+            # tree cut back to each depth stands in for a tree fit with that
+            # max_depth (up to how exactly tied splits are broken).
+            full_tree = DecisionTreeClassifier(max_depth=10, random_state=42)
+            full_tree.fit(x_train, y_train)
+            test_nodes = path_nodes_by_depth(full_tree, x_test)
+            
             for max_depth in range(1, 11):
-                model = DecisionTreeClassifier(max_depth=max_depth, random_state=42)
-                model.fit(x_train, y_train)
-                
-                y_pred = model.predict(x_test)
+                y_pred = predict_at_depth(full_tree, test_nodes, max_depth)
                 score = accuracy_score(y_test, y_pred)
                 if score > best_score:
                     best_score = score
-                    best_params = {'max_depth': max_depth, 'model': model}
+                    best_params = {'max_depth': max_depth}
+            
+            if best_params:
+                best_params['model'] = truncate_tree(full_tree, best_params['max_depth'])
             
             if not best_params:
                 raise ValueError("No valid hyperparameters found during tuning")
@@ -63,15 +76,19 @@ class DecisionTreeView(APIView):
             raise
     
     def post(self, request):
+        return self.train(request.data, request.FILES.get('csv_file'), request.user)
+
+    @cached_training(TrainedModel.ModelType.DECISION_TREE)
+    def train(self, data, csv_file, user):
+        """Train and save a model; shared by the HTTP endpoint and background training jobs."""
         try:
             # Validate request data
-            if not request.data:
+            if not data:
                 return Response({
                     "error": "No data provided in request",
                     "code": "MISSING_DATA"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            data = request.data
             model_name = data.get('model_name', 'Decision Tree')
             target_col = data.get('target_col')
             
@@ -83,14 +100,12 @@ class DecisionTreeView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Validate CSV file
-            if 'csv_file' not in request.FILES:
+            if csv_file is None:
                 return Response({
                     "error": "CSV file is required",
                     "code": "MISSING_CSV_FILE"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            csv_file = request.FILES['csv_file']
-            
             # Validate file type
             if not csv_file.name.lower().endswith('.csv'):
                 return Response({
@@ -98,69 +113,11 @@ class DecisionTreeView(APIView):
                     "code": "INVALID_FILE_TYPE"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Read CSV file
+            # Load the cleaned dataset, parsing the CSV only on its first upload
             try:
-                df = pd.read_csv(csv_file)
-            except pd.errors.EmptyDataError:
-                return Response({
-                    "error": "CSV file is empty",
-                    "code": "EMPTY_CSV_FILE"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except pd.errors.ParserError as e:
-                return Response({
-                    "error": f"Error parsing CSV file: {str(e)}",
-                    "code": "CSV_PARSE_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error reading CSV file: {str(e)}",
-                    "code": "CSV_READ_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Validate DataFrame
-            if df.empty:
-                return Response({
-                    "error": "CSV file contains no data",
-                    "code": "EMPTY_DATASET"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            if len(df) < 10:
-                return Response({
-                    "error": "Dataset must contain at least 10 rows for meaningful analysis",
-                    "code": "INSUFFICIENT_DATA"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Validate target column
-            if target_col not in df.columns:
-                return Response({
-                    "error": f"Target column '{target_col}' not found in CSV file",
-                    "code": "TARGET_COLUMN_NOT_FOUND",
-                    "available_columns": list(df.columns)
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Check for null values
-            if df.isnull().values.any() and df.isnull().sum().sum() > 50:
-                return Response({
-                    "error": "Dataset contains too many null values (>50)",
-                    "code": "TOO_MANY_NULLS",
-                    "null_count": int(df.isnull().sum().sum())
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Drop null values
-            original_length = len(df)
-            df = df.dropna()
-            
-            if df.empty:
-                return Response({
-                    "error": "No data remaining after removing null values",
-                    "code": "NO_DATA_AFTER_CLEANING"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            if len(df) < 5:
-                return Response({
-                    "error": "Insufficient data after cleaning (less than 5 rows)",
-                    "code": "INSUFFICIENT_DATA_AFTER_CLEANING"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                dataset, df = load_training_data(csv_file, target_col, min_rows=10)
+            except DatasetValidationError as e:
+                return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
             
             # Validate target column values
             y_raw = df[target_col]
@@ -181,12 +138,14 @@ class DecisionTreeView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Encode target variable
+            label_classes = None
             try:
                 y = y_raw.astype(int)
             except (ValueError, TypeError):
                 try:
                     le = LabelEncoder()
                     y = le.fit_transform(y_raw)
+                    label_classes = le.classes_
                 except Exception as e:
                     return Response({
                         "error": f"Error encoding target variable: {str(e)}",
@@ -195,14 +154,14 @@ class DecisionTreeView(APIView):
             
             # Prepare features
             try:
-                X = pd.get_dummies(df.drop(columns=[target_col]), drop_first=True)
+                X, feature_names, encoder = build_feature_matrix(df, target_col)
             except Exception as e:
                 return Response({
                     "error": f"Error preparing feature matrix: {str(e)}",
                     "code": "FEATURE_PREPARATION_ERROR"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            if X.empty or X.shape[1] == 0:
+            if X.shape[0] == 0 or X.shape[1] == 0:
                 return Response({
                     "error": "No features available after preprocessing",
                     "code": "NO_FEATURES_AVAILABLE"
@@ -227,7 +186,8 @@ class DecisionTreeView(APIView):
             
             # Hyperparameter tuning
             try:
-                best_params, best_score = self.hyperparameter_tuning(x_train, y_train, x_test, y_test)
+                with core_lease("decision-tree", requested=1):
+                    best_params, best_score = self.hyperparameter_tuning(x_train, y_train, x_test, y_test)
             except Exception as e:
                 return Response({
                     "error": f"Error during hyperparameter tuning: {str(e)}",
@@ -237,7 +197,7 @@ class DecisionTreeView(APIView):
             # Save model
             try:
                 temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
-                joblib.dump(best_params['model'], temp_file.name)
+                dump_artifact(best_params['model'], temp_file.name)
                 
                 with open(temp_file.name, 'rb') as f:
                     django_file = File(f)
@@ -245,11 +205,14 @@ class DecisionTreeView(APIView):
                         model_type=TrainedModel.ModelType.DECISION_TREE,
                         model_name=model_name,
                         target_column=target_col,
-                        features=",".join(X.columns),
-                        user_id=request.user.id
+                        features=",".join(feature_names),
+                        user_id=user.id,
+                        dataset=dataset,
+                        csv_file=dataset.csv_file.name
                     )
                     ml_model.model_file.save(f"{ml_model.id}_model.pkl", django_file)
-                    ml_model.csv_file.save(f"{ml_model.id}_data.csv", csv_file)
+                    save_preprocessor(ml_model, encoder, label_classes)
+                    save_model_metadata(ml_model, best_params['model'])
                     ml_model.save()
                 
             except Exception as e:
@@ -398,7 +361,7 @@ class DecisionTreeView(APIView):
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         except Exception as e:
-            logger.error(f"Unexpected error in DecisionTreeView.post: {str(e)}", exc_info=True)
+            logger.error(f"Unexpected error in DecisionTreeView.train: {str(e)}", exc_info=True)
             return Response({
                 "error": "An unexpected error occurred while processing your request",
                 "code": "UNEXPECTED_ERROR",
@@ -8,15 +8,21 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import pandas as pd
-import joblib
 from tempfile import NamedTemporaryFile
 import os
 from django.core.files.images import ImageFile
 from sklearn.preprocessing import LabelEncoder
 
 from trained_model.models import TrainedModel, ModelStats, ModelGraph
+from trained_model.datasets import load_training_data
+from trained_model.artifacts import dump_artifact, save_preprocessor, save_model_metadata
+from trained_model.result_cache import cached_training
 from ml_utils.graph_utils import *
 from ml_utils.stats_utils import *
+from ml_utils.ingestion import DatasetValidationError
+from ml_utils.preprocessing import build_feature_matrix
+from ml_utils.cpu_scheduler import core_lease
+from ml_utils.neighbor_utils import predictions_by_k
 from trained_model.serializer import ModelStatsSerializer, ModelGraphSerializer
 
 logger = logging.getLogger(__name__)
@@ -24,23 +30,28 @@ logger = logging.getLogger(__name__)
 class KNeighborsView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def hyperparameter_tuning(self, x_train, y_train, x_test, y_test):
+    def hyperparameter_tuning(self, x_train, y_train, x_test, y_test, n_jobs=1):
         best_score = 0
         best_params = {}
-        max_k = min(20, len(x_train))
-        for neighbors in range(1, max_k + 1):
-            model = KNeighborsClassifier(n_neighbors=neighbors)
-            model.fit(x_train, y_train)
-            y_pred = model.predict(x_test)
+        max_k = min(20, x_train.shape[0])
+        model = KNeighborsClassifier(n_neighbors=max_k, n_jobs=n_jobs)
+        model.fit(x_train, y_train)
+        for neighbors, y_pred in predictions_by_k(model, y_train, x_test, max_k):
             score = accuracy_score(y_test, y_pred)
             if score > best_score:
                 best_score = score
-                best_params = {'neighbors': neighbors, 'model': model}
+                best_params = {'neighbors': neighbors}
+        if best_params:
+            best_params['model'] = model.set_params(n_neighbors=best_params['neighbors'])
         return best_params, best_score
 
     def post(self, request):
+        return self.train(request.data, request.FILES.get('csv_file'), request.user)
+
+    @cached_training(TrainedModel.ModelType.KNN)
+    def train(self, data, csv_file, user):
+        """Train and save a model; shared by the HTTP endpoint and background training jobs."""
         try:
-            data = request.data
             model_name = data.get('model_name', 'K-Nearest Neighbours')
             target_col = data.get('target_col')
 
@@ -50,14 +61,12 @@ class KNeighborsView(APIView):
                     "code": "MISSING_TARGET_COLUMN"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if 'csv_file' not in request.FILES:
+            if csv_file is None:
                 return Response({
                     "error": "CSV file is required.",
                     "code": "MISSING_CSV_FILE"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            csv_file = request.FILES['csv_file']
-
             if not csv_file.name.lower().endswith('.csv'):
                 return Response({
                     "error": "File must be a CSV.",
@@ -65,56 +74,19 @@ class KNeighborsView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                df = pd.read_csv(csv_file)
-            except pd.errors.EmptyDataError:
-                return Response({
-                    "error": "CSV file is empty.",
-                    "code": "EMPTY_CSV_FILE"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except pd.errors.ParserError as e:
-                return Response({
-                    "error": f"CSV parse error: {str(e)}",
-                    "code": "CSV_PARSE_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error reading CSV: {str(e)}",
-                    "code": "CSV_READ_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.empty:
-                return Response({
-                    "error": "CSV contains no data.",
-                    "code": "EMPTY_DATASET"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if target_col not in df.columns:
-                return Response({
-                    "error": f"Target column '{target_col}' not found.",
-                    "code": "TARGET_COLUMN_NOT_FOUND",
-                    "available_columns": list(df.columns)
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.isnull().sum().sum() > 50:
-                return Response({
-                    "error": "Dataset has too many null values.",
-                    "code": "TOO_MANY_NULLS"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            df = df.dropna()
-            if df.empty or len(df) < 5:
-                return Response({
-                    "error": "Insufficient data after cleaning.",
-                    "code": "INSUFFICIENT_DATA"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                dataset, df = load_training_data(csv_file, target_col)
+            except DatasetValidationError as e:
+                return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
 
             y_raw = df[target_col]
+            label_classes = None
             try:
                 y = y_raw.astype(int)
             except (ValueError, TypeError):
                 try:
                     le = LabelEncoder()
                     y = le.fit_transform(y_raw)
+                    label_classes = le.classes_
                 except Exception as e:
                     return Response({
                         "error": f"Error encoding target: {str(e)}",
@@ -122,14 +94,14 @@ class KNeighborsView(APIView):
                     }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                X = pd.get_dummies(df.drop(columns=[target_col]), drop_first=True)
+                X, feature_names, encoder = build_feature_matrix(df, target_col)
             except Exception as e:
                 return Response({
                     "error": f"Error creating features: {str(e)}",
                     "code": "FEATURE_PREPARATION_ERROR"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if X.empty or X.shape[1] == 0:
+            if X.shape[0] == 0 or X.shape[1] == 0:
                 return Response({
                     "error": "No features after preprocessing.",
                     "code": "NO_FEATURES"
@@ -144,23 +116,27 @@ class KNeighborsView(APIView):
                     X, y, test_size=0.2, random_state=42
                 )
 
-            best_params, _ = self.hyperparameter_tuning(x_train, y_train, x_test, y_test)
+            with core_lease("k-neighbors") as n_jobs:
+                best_params, _ = self.hyperparameter_tuning(x_train, y_train, x_test, y_test, n_jobs=n_jobs)
             model = best_params['model']
 
             try:
                 temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
-                joblib.dump(model, temp_file.name)
+                dump_artifact(model, temp_file.name)
                 with open(temp_file.name, 'rb') as f:
                     django_file = File(f)
                     ml_model = TrainedModel.objects.create(
                         model_type=TrainedModel.ModelType.KNN,
                         model_name=model_name,
                         target_column=target_col,
-                        features=",".join(X.columns),
-                        user_id=request.user.id
+                        features=",".join(feature_names),
+                        user_id=user.id,
+                        dataset=dataset,
+                        csv_file=dataset.csv_file.name
                     )
                     ml_model.model_file.save(f"{ml_model.id}_model.pkl", django_file)
-                    ml_model.csv_file.save(f"{ml_model.id}_data.csv", csv_file)
+                    save_preprocessor(ml_model, encoder, label_classes)
+                    save_model_metadata(ml_model, model)
                     ml_model.save()
                 # os.remove(temp_file.name)
             except Exception as e:
@@ -241,7 +217,7 @@ class KNeighborsView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            logger.error("Unexpected error in KNeighborsView.post", exc_info=True)
+            logger.error("Unexpected error in KNeighborsView.train", exc_info=True)
             return Response({
                 "error": "Unexpected server error occurred.",
                 "code": "UNEXPECTED_ERROR",
@@ -0,0 +1,118 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def process_share(total_cores, processes):
+    """
+    The cores each of ``processes`` processes may lease out of
+    ``total_cores`` (every core when None), at least one.
+    """
+    return max(1, (total_cores or os.cpu_count() or 1) // max(1, processes))
+
+
+class CoreScheduler:
+    """
+    Budget of CPU cores shared by the concurrent trainings of one process.
+
+    Each training takes a lease with ``lease()`` and passes its size as
+    ``n_jobs`` to its estimators, instead of every estimator claiming all
+    cores with ``n_jobs=-1``. A lease gets at most its fair share of the
+    budget given the leases already running or waiting; when no cores are
+    free, requests wait in arrival order until a lease is returned.
+
+    Leases are not coordinated across processes: each server or training
+    worker process gets its own scheduler, configured with its share of the
+    machine (see ``process_share``).
+    """
+
+    def __init__(self, total_cores=None, max_cores_per_lease=None):
+        self._condition = threading.Condition()
+        self._leases = {}
+        self._waiting = deque()
+        self._ids = itertools.count(1)
+        self.configure(total_cores, max_cores_per_lease)
+
+    def configure(self, total_cores=None, max_cores_per_lease=None):
+        with self._condition:
+            self.total_cores = max(1, total_cores or os.cpu_count() or 1)
+            self.max_cores_per_lease = max_cores_per_lease
+            self._condition.notify_all()
+
+    @property
+    def available_cores(self):
+        return max(0, self.total_cores - sum(lease['cores'] for lease in self._leases.values()))
+
+    def _grant_size(self, requested):
+        share = max(1, self.total_cores // (len(self._leases) + len(self._waiting)))
+        cores = min(share, self.available_cores)
+        if requested is not None:
+            cores = min(cores, requested)
+        if self.max_cores_per_lease is not None:
+            cores = min(cores, self.max_cores_per_lease)
+        return max(1, cores)
+
+    def acquire(self, name, requested=None, timeout=None):
+        """
+        Block until cores are free and return ``(lease_id, cores)``.
+        Raises ``TimeoutError`` if ``timeout`` seconds pass first.
+        """
+        ticket = next(self._ids)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            self._waiting.append(ticket)
+            try:
+                while self._waiting[0] != ticket or self.available_cores == 0:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No CPU cores became free for {name} within {timeout}s")
+                    self._condition.wait(remaining)
+                cores = self._grant_size(requested)
+                self._leases[ticket] = {
+                    'id': ticket,
+                    'name': name,
+                    'cores': cores,
+                    'since': time.time(),
+                }
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+        return ticket, cores
+
+    def release(self, lease_id):
+        with self._condition:
+            self._leases.pop(lease_id, None)
+            self._condition.notify_all()
+
+    @contextmanager
+    def lease(self, name, requested=None, timeout=None):
+        """Hold a core lease for the ``with`` block; yields the ``n_jobs`` to use."""
+        lease_id, cores = self.acquire(name, requested, timeout)
+        try:
+            yield cores
+        finally:
+            self.release(lease_id)
+
+    def allocations(self):
+        """Snapshot of the budget, the running leases and the queue length."""
+        with self._condition:
+            return {
+                'total_cores': self.total_cores,
+                'available_cores': self.available_cores,
+                'max_cores_per_lease': self.max_cores_per_lease,
+                'leases': [dict(lease) for lease in self._leases.values()],
+                'waiting': len(self._waiting),
+            }
+
+
+scheduler = CoreScheduler()
+
+
+def core_lease(name, requested=None, timeout=None):
+    """Lease cores from this process's scheduler."""
+    return scheduler.lease(name, requested, timeout)
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_obj):
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    if hasattr(file_obj, 'chunks'):
+        for block in file_obj.chunks(HASH_BLOCK_SIZE):
+            digest.update(block)
+    else:
+        for block in iter(lambda: file_obj.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def _column_kind(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return 'numeric'
+    return 'categorical'
+
+
+def write_columns(df, directory):
+    """
+    Write a frame as one ``.npy`` file per column plus a JSON schema.
+
+    Numeric and boolean columns are stored as-is. Text columns are stored as
+    integer codes with their sorted categories in the schema, which keeps the
+    files loadable without pickle. The directory is written to a temporary
+    sibling first and moved into place, so readers never see a partial store.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent)
+
+    try:
+        schema = []
+        for position, column in enumerate(df.columns):
+            series = df[column]
+            kind = _column_kind(series)
+            filename = f"{position}.npy"
+            entry = {'name': column, 'kind': kind, 'file': filename}
+
+            if kind == 'categorical':
+                try:
+                    codes, categories = pd.factorize(series, sort=True)
+                except TypeError:
+                    codes, categories = pd.factorize(series)
+                np.save(os.path.join(staging, filename), codes.astype(np.int32))
+                entry['categories'] = categories.tolist()
+            else:
+                np.save(os.path.join(staging, filename), series.to_numpy())
+
+            schema.append(entry)
+
+        with open(os.path.join(staging, SCHEMA_FILE), 'w') as f:
+            json.dump({'rows': len(df), 'columns': schema}, f)
+
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another process stored the same dataset first.
+            if not os.path.exists(os.path.join(directory, SCHEMA_FILE)):
+                raise
+            shutil.rmtree(staging, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def read_schema(directory):
+    with open(os.path.join(directory, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+
+def read_columns(directory, columns=None):
+    """
+    Load a frame written by ``write_columns``.
+    Pass ``columns`` to load only a subset of the stored columns.
+    """
+    schema = read_schema(directory)
+    data = {}
+
+    for entry in schema['columns']:
+        if columns is not None and entry['name'] not in columns:
+            continue
+        values = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'categorical':
+            categories = np.array(entry['categories'] + [None], dtype=object)
+            data[entry['name']] = categories[values]
+        else:
+            data[entry['name']] = np.array(values)
+
+    return pd.DataFrame(data, index=pd.RangeIndex(schema['rows']))
@@ -0,0 +1,261 @@
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50_000
+DTYPE_SAMPLE_ROWS = 1_000
+MAX_NULL_VALUES = 50
+MIN_CLEAN_ROWS = 5
+
+
+class DatasetValidationError(Exception):
+    """
+    Raised when an uploaded CSV cannot be used for training.
+    Carries the same error payload the training views return to the client.
+    """
+
+    def __init__(self, error, code, **extra):
+        super().__init__(error)
+        self.error = error
+        self.code = code
+        self.extra = extra
+
+    def to_dict(self):
+        return {"error": self.error, "code": self.code, **self.extra}
+
+
+# Nullable dtypes used while reading, and what they become once nulls are dropped.
+_NARROWED_DTYPES = {'Int64': 'int64', 'boolean': 'bool'}
+
+
+def _column_dtype(values):
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return 'boolean'
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return 'Int64'
+    if pd.api.types.is_float_dtype(values.dtype):
+        # The parser reads an integer column holding nulls as floats.
+        present = values.dropna()
+        if len(present) < len(values) and len(present) and (present % 1 == 0).all():
+            return 'Int64'
+        return 'float64'
+    return 'object'
+
+
+def infer_column_dtypes(sample):
+    """
+    Map each column of a parsed sample to the dtype used for the full read.
+    Integer and boolean columns are read as the nullable ``Int64`` and
+    ``boolean`` so that nulls further down the file do not break the parse,
+    and narrowed back to int64/bool once nulls are dropped, so labels and
+    categories keep the type they have in the file.
+    """
+    return {column: _column_dtype(sample[column]) for column in sample.columns}
+
+
+def _widest_dtype(first, second):
+    if first == second:
+        return first
+    if {first, second} == {'Int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+
+def settle_column_dtypes(csv_file, chunksize):
+    """
+    Infer one dtype per column that fits every chunk of the file, for when
+    the sampled dtypes do not. Chunks are read and discarded.
+    """
+    csv_file.seek(0)
+    dtypes = {}
+    with pd.read_csv(csv_file, chunksize=chunksize) as reader:
+        for chunk in reader:
+            for column, dtype in infer_column_dtypes(chunk).items():
+                dtypes[column] = _widest_dtype(dtypes.get(column, dtype), dtype)
+    return dtypes
+
+
+def _narrow(chunk, dtypes):
+    narrowed = {
+        column: _NARROWED_DTYPES[dtype]
+        for column, dtype in dtypes.items() if dtype in _NARROWED_DTYPES
+    }
+    return chunk.astype(narrowed) if narrowed else chunk
+
+
+def _read_sample(csv_file, sample_rows):
+    csv_file.seek(0)
+    try:
+        sample = pd.read_csv(csv_file, nrows=sample_rows)
+    except pd.errors.EmptyDataError:
+        raise DatasetValidationError("CSV file is empty.", "EMPTY_CSV_FILE")
+    except pd.errors.ParserError as e:
+        raise DatasetValidationError(f"CSV parse error: {str(e)}", "CSV_PARSE_ERROR")
+    except Exception as e:
+        raise DatasetValidationError(f"Error reading CSV: {str(e)}", "CSV_READ_ERROR")
+    finally:
+        csv_file.seek(0)
+    return sample
+
+
+def _read_pass(csv_file, dtypes, max_nulls, chunksize, on_chunk):
+    csv_file.seek(0)
+    raw_rows = 0
+    clean_rows = 0
+    null_count = 0
+
+    with pd.read_csv(csv_file, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            raw_rows += len(chunk)
+            null_count += int(chunk.isnull().sum().sum())
+            if null_count > max_nulls:
+                raise DatasetValidationError(
+                    f"Dataset has too many null values (>{max_nulls}).",
+                    "TOO_MANY_NULLS",
+                    null_count=null_count,
+                )
+            chunk = _narrow(chunk.dropna(), dtypes)
+            clean_rows += len(chunk)
+            on_chunk(chunk)
+
+    return raw_rows, clean_rows
+
+
+def _read_clean_chunks(csv_file, target_col, max_nulls, min_rows, min_clean_rows, chunksize, start_pass):
+    """
+    Validate an uploaded CSV and hand its null-free chunks to a callback.
+
+    The header and a small sample are read first to check the target column
+    and infer dtypes, then the file is parsed in chunks. Nulls are counted
+    and dropped per chunk, so a file that breaks the null limit is rejected
+    as soon as the offending chunk is read.
+
+    ``start_pass()`` is called before every pass over the file and returns
+    the callback each clean chunk goes to. There is a second pass only when
+    a value further down the file does not fit the sampled dtypes.
+
+    Returns the dtypes the chunks were read with and the raw and clean row
+    counts.
+    """
+    sample = _read_sample(csv_file, DTYPE_SAMPLE_ROWS)
+
+    if sample.empty:
+        raise DatasetValidationError("CSV contains no data.", "EMPTY_DATASET")
+
+    if target_col is not None and target_col not in sample.columns:
+        raise DatasetValidationError(
+            f"Target column '{target_col}' not found.",
+            "TARGET_COLUMN_NOT_FOUND",
+            available_columns=list(sample.columns),
+        )
+
+    dtypes = infer_column_dtypes(sample)
+    del sample
+
+    try:
+        try:
+            raw_rows, clean_rows = _read_pass(csv_file, dtypes, max_nulls, chunksize, start_pass())
+        except pd.errors.ParserError:
+            raise
+        except (ValueError, TypeError) as e:
+            # Settle dtypes over the whole file so every chunk shares them.
+            logger.info(f"Sampled dtypes did not fit the full CSV, re-reading: {str(e)}")
+            dtypes = settle_column_dtypes(csv_file, chunksize)
+            raw_rows, clean_rows = _read_pass(csv_file, dtypes, max_nulls, chunksize, start_pass())
+    except DatasetValidationError:
+        raise
+    except pd.errors.ParserError as e:
+        raise DatasetValidationError(f"CSV parse error: {str(e)}", "CSV_PARSE_ERROR")
+    except Exception as e:
+        raise DatasetValidationError(f"Error reading CSV: {str(e)}", "CSV_READ_ERROR")
+    finally:
+        csv_file.seek(0)
+
+    if raw_rows < min_rows:
+        raise DatasetValidationError(
+            f"Dataset must contain at least {min_rows} rows for meaningful analysis.",
+            "INSUFFICIENT_DATA",
+        )
+
+    if clean_rows == 0 or clean_rows < min_clean_rows:
+        raise DatasetValidationError("Insufficient data after cleaning.", "INSUFFICIENT_DATA")
+
+    return dtypes, raw_rows, clean_rows
+
+
+def ingest_csv(csv_file, target_col=None, max_nulls=MAX_NULL_VALUES, min_rows=0,
+               min_clean_rows=MIN_CLEAN_ROWS, chunksize=CHUNK_SIZE):
+    """
+    Parse and validate an uploaded CSV in a single streaming pass.
+    Returns the null-free frame and the number of rows in the raw file.
+    """
+    cleaned_chunks = []
+
+    def start_pass():
+        cleaned_chunks.clear()
+        return cleaned_chunks.append
+
+    _, raw_rows, _ = _read_clean_chunks(
+        csv_file, target_col, max_nulls, min_rows, min_clean_rows, chunksize, start_pass
+    )
+
+    df = pd.concat(cleaned_chunks, ignore_index=True)
+    del cleaned_chunks
+    return df, raw_rows
+
+
+class CsvLayout:
+    """Column dtypes, text categories and row counts found by ``scan_csv``."""
+
+    def __init__(self, dtypes, categories, raw_rows, clean_rows):
+        self.dtypes = dtypes
+        self.categories = categories
+        self.raw_rows = raw_rows
+        self.clean_rows = clean_rows
+
+
+def scan_csv(csv_file, target_col=None, max_nulls=MAX_NULL_VALUES, min_rows=0,
+             min_clean_rows=MIN_CLEAN_ROWS, chunksize=CHUNK_SIZE):
+    """
+    First pass of out-of-core training: validate an uploaded CSV like
+    ``ingest_csv`` without keeping any rows.
+
+    Settles one dtype per column for every later pass and collects the
+    categories of every text column, so a ``FeatureEncoder`` can be built
+    before the data is streamed again with ``iter_csv_chunks``.
+    """
+    categories = {}
+
+    def collect_categories(chunk):
+        for column in chunk.columns:
+            if pd.api.types.is_object_dtype(chunk[column].dtype):
+                categories.setdefault(column, {}).update(dict.fromkeys(chunk[column].unique()))
+
+    def start_pass():
+        categories.clear()
+        return collect_categories
+
+    dtypes, raw_rows, clean_rows = _read_clean_chunks(
+        csv_file, target_col, max_nulls, min_rows, min_clean_rows, chunksize, start_pass
+    )
+    categories = {column: list(values) for column, values in categories.items()}
+    return CsvLayout(dtypes, categories, raw_rows, clean_rows)
+
+
+def iter_csv_chunks(csv_file, layout, chunksize=CHUNK_SIZE):
+    """Yield the null-free chunks of a CSV already checked by ``scan_csv``."""
+    csv_file.seek(0)
+    try:
+        with pd.read_csv(csv_file, dtype=layout.dtypes, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield _narrow(chunk.dropna(), layout.dtypes)
+    finally:
+        csv_file.seek(0)
+
+
+def load_csv(csv_file, target_col=None, **options):
+    """Parse and validate an uploaded CSV, returning only the cleaned frame."""
+    df, _ = ingest_csv(csv_file, target_col, **options)
+    return df
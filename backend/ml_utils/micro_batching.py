@@ -0,0 +1,86 @@
+import asyncio
+import weakref
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.callers = []
+        self.timer = None
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent async calls for the same key into one batch.
+
+    Callers ``await submit(key, items, run_batch)``. The first call for a key
+    opens a batch that stays open for ``max_wait`` seconds or until it holds
+    ``max_batch_size`` items; ``run_batch`` then runs once, in a worker thread,
+    on every item collected, and each caller gets back ``(results, batch_size)``:
+    the results for its own items and the number of items they ran with.
+    ``run_batch(items)`` must return one result per item.
+
+    If a batch of several callers fails, each caller's items are retried on
+    their own, so one bad request fails alone. Batches are kept per event
+    loop; under an ASGI server all requests of a process share one.
+    """
+
+    def __init__(self, max_wait=0.002, max_batch_size=64):
+        self._batches = weakref.WeakKeyDictionary()
+        self._tasks = set()
+        self.configure(max_wait, max_batch_size)
+
+    def configure(self, max_wait, max_batch_size):
+        self.max_wait = max(0.0, max_wait)
+        self.max_batch_size = max(1, max_batch_size)
+
+    async def submit(self, key, items, run_batch):
+        loop = asyncio.get_running_loop()
+        batches = self._batches.setdefault(loop, {})
+        batch = batches.get(key)
+        if batch is None:
+            batch = batches[key] = _Batch()
+            batch.timer = loop.call_later(self.max_wait, self._flush, loop, key, batch, run_batch)
+
+        future = loop.create_future()
+        batch.callers.append((future, len(batch.items), len(items), items))
+        batch.items.extend(items)
+        if len(batch.items) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(loop, key, batch, run_batch)
+        return await future
+
+    def _flush(self, loop, key, batch, run_batch):
+        batches = self._batches.get(loop, {})
+        if batches.get(key) is batch:
+            del batches[key]
+        task = loop.create_task(self._run(loop, batch, run_batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, loop, batch, run_batch):
+        try:
+            results = await loop.run_in_executor(None, run_batch, batch.items)
+        except Exception as e:
+            if len(batch.callers) == 1:
+                future = batch.callers[0][0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            for future, _, _, items in batch.callers:
+                try:
+                    result = await loop.run_in_executor(None, run_batch, items)
+                except Exception as caller_error:
+                    if not future.done():
+                        future.set_exception(caller_error)
+                else:
+                    if not future.done():
+                        future.set_result((result, len(items)))
+            return
+
+        for future, start, count, _ in batch.callers:
+            if not future.done():
+                future.set_result((results[start:start + count], len(batch.items)))
+
+
+prediction_batcher = MicroBatcher()
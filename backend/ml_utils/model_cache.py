@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+
+
+class ModelCache:
+    """
+    Per-process LRU cache of unpickled model artifacts.
+
+    Entries are keyed by the owner's id and the file's path and mtime, so a
+    rewritten file is loaded afresh and its stale entry dropped. The size of
+    an entry is the size of its file; least recently used entries are evicted
+    once the total exceeds ``max_bytes``, and artifacts larger than the whole
+    budget are loaded without being cached.
+    """
+
+    def __init__(self, max_bytes=0):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._current = {}
+        self._loading = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.configure(max_bytes)
+
+    def configure(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes or 0
+            self._evict()
+
+    def _evict(self):
+        while self._entries and self.total_bytes > self.max_bytes:
+            key, (_, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            if self._current.get(key[:2]) == key:
+                del self._current[key[:2]]
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def load(self, owner_id, path, loader=joblib.load):
+        """Return ``loader(path)``, from the cache when the file is unchanged."""
+        stat = os.stat(path)
+        key = (str(owner_id), path, stat.st_mtime_ns)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            # One request unpickles a given file; concurrent ones wait for it.
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                        return entry[0]
+                value = loader(path)
+                with self._lock:
+                    self._store(key, value, stat.st_size)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def _store(self, key, value, size):
+        if size > self.max_bytes or key in self._entries:
+            return
+        stale = self._current.get(key[:2])
+        if stale is not None and stale != key:
+            self._discard(stale)
+        self._entries[key] = (value, size)
+        self._current[key[:2]] = key
+        self.total_bytes += size
+        self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+model_cache = ModelCache()
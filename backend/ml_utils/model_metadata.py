@@ -0,0 +1,50 @@
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)) and all(_json_value(item) == item for item in value):
+        return list(value)
+    return str(value)
+
+
+def _array(estimator, attribute):
+    value = getattr(estimator, attribute, None)
+    if value is None:
+        return None
+    return np.asarray(value).tolist()
+
+
+def extract_model_metadata(model):
+    """
+    Read the fitted attributes worth showing without the artifact.
+
+    For a pipeline the coefficients, intercept and feature importances come
+    from its final step, and hyperparameters of every step are reported as
+    ``<step>__<param>``. Returns JSON-safe ``coefficients``, ``intercept``,
+    ``feature_importances`` and ``hyperparameters``.
+    """
+    if isinstance(model, Pipeline):
+        estimator = model.steps[-1][1]
+        hyperparameters = {
+            f"{name}__{param}": _json_value(value)
+            for name, step in model.steps
+            for param, value in step.get_params(deep=False).items()
+        }
+    else:
+        estimator = model
+        hyperparameters = {
+            param: _json_value(value)
+            for param, value in model.get_params(deep=False).items()
+        }
+
+    return {
+        'coefficients': _array(estimator, 'coef_'),
+        'intercept': _array(estimator, 'intercept_'),
+        'feature_importances': _array(estimator, 'feature_importances_'),
+        'hyperparameters': hyperparameters,
+    }
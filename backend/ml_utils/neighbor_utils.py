@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def predictions_by_k(model, y_train, x_test, max_k):
+    """
+    Yield ``(k, y_pred)`` for k = 1..max_k from one neighbour query.
+
+    ``model`` is a uniform-weight ``KNeighborsClassifier`` fitted on
+    ``y_train``. The ``max_k`` nearest training rows of every test row are
+    looked up once and class votes are accumulated one neighbour at a time,
+    so each k costs a vote update instead of a new distance computation.
+    Vote ties go to the lowest class, as in ``KNeighborsClassifier.predict``.
+    """
+    neighbors = model.kneighbors(x_test, n_neighbors=max_k, return_distance=False)
+    train_codes = np.searchsorted(model.classes_, np.asarray(y_train))
+    neighbor_codes = train_codes[neighbors]
+    n_rows = neighbor_codes.shape[0]
+    rows = np.arange(n_rows)
+    votes = np.zeros((n_rows, len(model.classes_)), dtype=np.int32)
+
+    for k in range(1, max_k + 1):
+        votes[rows, neighbor_codes[:, k - 1]] += 1
+        yield k, model.classes_.take(np.argmax(votes, axis=1))
@@ -0,0 +1,50 @@
+import numpy as np
+from scipy import linalg, sparse
+
+# Relative eigenvalue cut-off for the scaled Gram matrix. One-hot and
+# polynomial columns are often exactly collinear, so the system can be
+# singular; the minimum-norm solution is taken, as ``lstsq`` would.
+GRAM_RCOND = 1e-12
+
+
+def solve_normal_equations(gram, xty):
+    """Minimum-norm least-squares coefficients from ``XᵀX`` and ``Xᵀy``."""
+    # Scale to unit diagonal so large-valued columns do not swamp the
+    # eigenvalue cut-off.
+    scale = np.sqrt(np.diag(gram))
+    scale[scale == 0] = 1.0
+    eigenvalues, eigenvectors = linalg.eigh(gram / np.outer(scale, scale))
+    keep = eigenvalues > eigenvalues.max() * GRAM_RCOND
+    projected = eigenvectors[:, keep].T @ (xty / scale)
+    return (eigenvectors[:, keep] @ (projected / eigenvalues[keep])) / scale
+
+
+class NormalEquations:
+    """
+    Running ``XᵀX`` and ``Xᵀy`` of a linear model with an intercept.
+
+    Rows are added in batches (dense or CSR) and only the
+    ``(n_features + 1)``-square Gram matrix is kept, so the fit needs one
+    pass over the data and memory independent of the row count.
+    """
+
+    def __init__(self, n_features):
+        self.n_rows = 0
+        self.gram = np.zeros((n_features + 1, n_features + 1))
+        self.xty = np.zeros(n_features + 1)
+
+    def add(self, X, y):
+        y = np.asarray(y, dtype=np.float64)
+        if sparse.issparse(X):
+            X = sparse.hstack([sparse.csr_matrix(np.ones((X.shape[0], 1))), X], format='csr')
+            self.gram += (X.T @ X).toarray()
+        else:
+            X = np.hstack([np.ones((X.shape[0], 1)), np.asarray(X, dtype=np.float64)])
+            self.gram += X.T @ X
+        self.xty += np.asarray(X.T @ y).ravel()
+        self.n_rows += X.shape[0]
+
+    def solve(self):
+        """Return ``(coef, intercept)``."""
+        solution = solve_normal_equations(self.gram, self.xty)
+        return solution[1:], solution[0]
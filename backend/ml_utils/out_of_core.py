@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from ml_utils.ingestion import CHUNK_SIZE, DatasetValidationError, scan_csv, iter_csv_chunks
+from ml_utils.normal_equations import NormalEquations
+from ml_utils.preprocessing import SPARSE_CARDINALITY_THRESHOLD, FeatureEncoder
+
+TEST_FRACTION = 0.2
+HASH_BUCKETS = 10_000
+
+
+def hashed_test_mask(chunk, test_fraction=TEST_FRACTION):
+    """
+    Rows that belong to the held-out split.
+
+    Rows are assigned by a hash of their values, not their position, so the
+    split is the same for every chunk size and every re-run on the file.
+    """
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return hashes % HASH_BUCKETS < test_fraction * HASH_BUCKETS
+
+
+def _numeric_target(chunk, target_col):
+    y = pd.to_numeric(chunk[target_col], errors='coerce')
+    if y.isnull().any():
+        raise DatasetValidationError(
+            "Target column must contain numeric values for regression.",
+            "NON_NUMERIC_TARGET",
+        )
+    return y.to_numpy(dtype=np.float64)
+
+
+def fit_linear_regression_out_of_core(csv_file, target_col, chunksize=CHUNK_SIZE,
+                                      sparse_threshold=SPARSE_CARDINALITY_THRESHOLD,
+                                      test_fraction=TEST_FRACTION, **scan_options):
+    """
+    Fit a ``LinearRegression`` on a CSV that never has to fit in memory.
+
+    Three streaming passes over ``csv_file``:
+
+    1. ``scan_csv`` validates the file and collects every category, fixing
+       the one-hot column layout before any row is encoded.
+    2. Each chunk is encoded and its training rows are added to ``XᵀX`` and
+       ``Xᵀy``; the normal equations are solved once at the end.
+    3. The held-out rows (chosen by ``hashed_test_mask``) are predicted.
+
+    Returns the fitted model, its ``FeatureEncoder``, the test targets and
+    predictions, and the ``CsvLayout`` from the first pass.
+    """
+    layout = scan_csv(csv_file, target_col, chunksize=chunksize, **scan_options)
+    feature_columns = [column for column in layout.dtypes if column != target_col]
+    encoder = FeatureEncoder(sparse_threshold).fit_categories(
+        feature_columns,
+        {column: values for column, values in layout.categories.items() if column != target_col},
+    )
+    if not encoder.feature_names:
+        raise DatasetValidationError("No features after preprocessing.", "NO_FEATURES")
+
+    equations = NormalEquations(len(encoder.feature_names))
+    for chunk in iter_csv_chunks(csv_file, layout, chunksize):
+        y = _numeric_target(chunk, target_col)
+        train_rows = ~hashed_test_mask(chunk, test_fraction)
+        X = encoder.transform(chunk[train_rows].drop(columns=[target_col]))
+        equations.add(X, y[train_rows])
+
+    if equations.n_rows == 0:
+        raise DatasetValidationError("Insufficient data after cleaning.", "INSUFFICIENT_DATA")
+
+    model = LinearRegression()
+    model.coef_, model.intercept_ = equations.solve()
+    model.n_features_in_ = len(encoder.feature_names)
+    if not encoder.use_sparse:
+        model.feature_names_in_ = np.asarray(encoder.feature_names, dtype=object)
+
+    y_test, y_pred = [], []
+    for chunk in iter_csv_chunks(csv_file, layout, chunksize):
+        test_rows = hashed_test_mask(chunk, test_fraction)
+        if not test_rows.any():
+            continue
+        chunk = chunk[test_rows]
+        y_test.append(_numeric_target(chunk, target_col))
+        y_pred.append(model.predict(encoder.transform(chunk.drop(columns=[target_col]))))
+
+    if not y_test:
+        raise DatasetValidationError("Not enough rows for a held-out test split.", "INSUFFICIENT_DATA")
+
+    return model, encoder, np.concatenate(y_test), np.concatenate(y_pred), layout
@@ -0,0 +1,104 @@
+import logging
+import math
+from itertools import combinations_with_replacement
+
+import numpy as np
+from sklearn.metrics import r2_score
+
+from ml_utils.normal_equations import solve_normal_equations
+
+logger = logging.getLogger(__name__)
+
+BYTES_PER_VALUE = 8
+MAX_DEGREE = 9
+
+
+def expanded_column_count(n_features, degree):
+    """Columns ``PolynomialFeatures(degree)`` produces for ``n_features`` inputs, bias included."""
+    return math.comb(n_features + degree, degree)
+
+
+def estimate_search_bytes(n_rows, n_features, degree):
+    """Memory held by the search at ``degree``: expanded rows plus the Gram matrix and its solve."""
+    n_columns = expanded_column_count(n_features, degree)
+    return BYTES_PER_VALUE * (n_rows * n_columns + 3 * n_columns ** 2)
+
+
+def _monomial_block(x, previous, previous_index, degree):
+    """
+    Every monomial of exactly ``degree``, in ``PolynomialFeatures`` column
+    order, built from the ``degree - 1`` block by one more multiplication.
+    """
+    combos = list(combinations_with_replacement(range(x.shape[1]), degree))
+    block = np.empty((x.shape[0], len(combos)))
+    for position, combo in enumerate(combos):
+        np.multiply(previous[:, previous_index[combo[:-1]]], x[:, combo[-1]], out=block[:, position])
+    return block, {combo: position for position, combo in enumerate(combos)}
+
+
+def search_polynomial_degree(x_train, y_train, x_test, y_test, max_degree=MAX_DEGREE,
+                             memory_budget=None, patience=2):
+    """
+    Pick the polynomial degree with the best held-out R².
+
+    Degree ``d`` adds only the monomials of exactly degree ``d`` to the
+    columns already built, so the normal equations ``XᵀX`` and ``Xᵀy`` are
+    extended by one block per degree instead of being rebuilt. Before each
+    degree the expanded size is estimated and the search stops at the first
+    degree over ``memory_budget`` bytes. It also stops once R² has fallen
+    ``patience`` degrees in a row.
+
+    Returns ``(best_degree, trajectory)``; ``best_degree`` is None if no
+    degree could be evaluated.
+    """
+    x_train = np.asarray(x_train, dtype=np.float64)
+    x_test = np.asarray(x_test, dtype=np.float64)
+    y_train = np.asarray(y_train, dtype=np.float64)
+    n_rows, n_features = x_train.shape[0] + x_test.shape[0], x_train.shape[1]
+
+    train_blocks = [np.ones((x_train.shape[0], 1))]
+    test_blocks = [np.ones((x_test.shape[0], 1))]
+    index = {(): 0}
+    gram = train_blocks[0].T @ train_blocks[0]
+    xty = train_blocks[0].T @ y_train
+
+    best_degree, best_r2 = None, float('-inf')
+    previous_r2, falls = None, 0
+    trajectory = []
+
+    for degree in range(1, max_degree + 1):
+        n_columns = expanded_column_count(n_features, degree)
+        needed = estimate_search_bytes(n_rows, n_features, degree)
+        if memory_budget is not None and needed > memory_budget:
+            logger.info(f"Polynomial degree {degree} needs ~{needed} bytes, over the {memory_budget} byte budget")
+            trajectory.append({"degree": degree, "n_columns": n_columns, "skipped": "memory_budget"})
+            break
+
+        try:
+            new_train, new_index = _monomial_block(x_train, train_blocks[-1], index, degree)
+            new_test, _ = _monomial_block(x_test, test_blocks[-1], index, degree)
+            cross = np.vstack([block.T @ new_train for block in train_blocks])
+            gram = np.block([[gram, cross], [cross.T, new_train.T @ new_train]])
+            xty = np.concatenate([xty, new_train.T @ y_train])
+            train_blocks.append(new_train)
+            test_blocks.append(new_test)
+            index = new_index
+
+            coef = solve_normal_equations(gram, xty)
+            y_pred = np.hstack(test_blocks) @ coef
+            score = r2_score(y_test, y_pred)
+        except Exception as e:
+            logger.warning(f"Error evaluating polynomial degree {degree}: {str(e)}")
+            break
+
+        trajectory.append({"degree": degree, "n_columns": n_columns, "r2_score": score})
+        if score > best_r2:
+            best_degree, best_r2 = degree, score
+
+        falls = falls + 1 if previous_r2 is not None and score < previous_r2 else 0
+        previous_r2 = score
+        if falls >= patience:
+            logger.info(f"Polynomial R² fell {falls} degrees in a row, stopping at degree {degree}")
+            break
+
+    return best_degree, trajectory
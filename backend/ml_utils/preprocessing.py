@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Categorical columns with more distinct values than this switch the
+# feature matrix to scipy.sparse CSR instead of a dense dummy frame.
+SPARSE_CARDINALITY_THRESHOLD = 100
+
+
+def _categorical_columns(features):
+    return [
+        column for column in features.columns
+        if pd.api.types.is_object_dtype(features[column].dtype)
+        or isinstance(features[column].dtype, pd.CategoricalDtype)
+        or pd.api.types.is_string_dtype(features[column].dtype)
+    ]
+
+
+def should_use_sparse(features, threshold=SPARSE_CARDINALITY_THRESHOLD):
+    """True when any categorical feature column is above the cardinality threshold."""
+    if threshold is None:
+        return False
+    return any(
+        features[column].nunique() > threshold
+        for column in _categorical_columns(features)
+    )
+
+
+class FeatureEncoder:
+    """
+    Fitted one-hot layout of a training frame.
+
+    Records which columns pass through as numbers and the sorted categories
+    of every categorical column, so raw named rows can be encoded into the
+    exact column layout the model was trained on. ``transform`` works on a
+    whole frame at once; categories not seen during training encode as all
+    zeros, like ``OneHotEncoder(handle_unknown='ignore')``.
+
+    For classifiers trained on a label-encoded target, ``label_classes``
+    holds the original labels so predictions can be decoded back to them.
+    """
+
+    label_classes = None
+
+    def __init__(self, sparse_threshold=SPARSE_CARDINALITY_THRESHOLD):
+        self.sparse_threshold = sparse_threshold
+
+    def fit(self, features):
+        categorical = _categorical_columns(features)
+        return self.fit_categories(
+            list(features.columns),
+            {column: features[column].unique() for column in categorical},
+        )
+
+    def fit_categories(self, input_columns, categories):
+        """
+        Fit from the distinct values of each categorical column instead of a
+        frame, e.g. categories collected while streaming a CSV in chunks.
+        """
+        self.input_columns = list(input_columns)
+        self.passthrough_columns = [column for column in self.input_columns if column not in categories]
+        self.categories = {}
+        for column in self.input_columns:
+            if column not in categories:
+                continue
+            try:
+                self.categories[column] = sorted(categories[column])
+            except TypeError:
+                self.categories[column] = list(pd.unique(pd.Series(list(categories[column]), dtype=object)))
+        self.use_sparse = self.sparse_threshold is not None and any(
+            len(values) > self.sparse_threshold for values in self.categories.values()
+        )
+        self.feature_names = list(self.passthrough_columns)
+        for column, values in self.categories.items():
+            self.feature_names.extend(f"{column}_{category}" for category in values[1:])
+        return self
+
+    def missing_columns(self, features):
+        return [column for column in self.input_columns if column not in features.columns]
+
+    def transform(self, features):
+        """
+        Encode ``features`` into the training layout.
+        Returns a CSR matrix for sparse models, otherwise a DataFrame whose
+        columns are ``feature_names``. Raises ``ValueError`` on missing
+        columns or missing/non-numeric values in numeric columns.
+        """
+        missing = self.missing_columns(features)
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+
+        n_rows = len(features)
+        numeric = None
+        if self.passthrough_columns:
+            numeric = features[self.passthrough_columns].apply(pd.to_numeric, errors='raise')
+            null_columns = numeric.columns[numeric.isnull().any()].tolist()
+            if null_columns:
+                raise ValueError(f"Missing values in numeric columns: {', '.join(map(str, null_columns))}")
+            numeric = numeric.to_numpy(dtype=np.float64)
+
+        one_hot = []
+        for column, categories in self.categories.items():
+            width = len(categories) - 1
+            if width <= 0:
+                continue
+            values = features[column]
+            if all(isinstance(category, str) for category in categories):
+                # JSON clients may send 5 for a category read from the CSV as "5".
+                values = values.astype(str)
+            codes = pd.Categorical(values, categories=categories).codes
+            one_hot.append((np.flatnonzero(codes >= 1), codes, width))
+
+        if self.use_sparse:
+            blocks = [sparse.csr_matrix(numeric)] if numeric is not None else []
+            for rows, codes, width in one_hot:
+                blocks.append(sparse.csr_matrix(
+                    (np.ones(len(rows), dtype=np.float64), (rows, codes[rows] - 1)),
+                    shape=(n_rows, width),
+                ))
+            if blocks:
+                return sparse.hstack(blocks, format='csr')
+            return sparse.csr_matrix((n_rows, 0), dtype=np.float64)
+
+        # Dense models get one matrix filled in place, never a CSR detour.
+        X = np.zeros((n_rows, len(self.feature_names)), dtype=np.float64)
+        offset = 0
+        if numeric is not None:
+            offset = numeric.shape[1]
+            X[:, :offset] = numeric
+        for rows, codes, width in one_hot:
+            X[rows, offset + codes[rows] - 1] = 1.0
+            offset += width
+        return pd.DataFrame(X, columns=self.feature_names, index=features.index, copy=False)
+
+    def fit_transform(self, features):
+        return self.fit(features).transform(features)
+
+    def decode_labels(self, codes):
+        """Map encoded class predictions back to the target's original labels."""
+        if self.label_classes is None:
+            return np.asarray(codes)
+        return np.asarray(self.label_classes, dtype=object)[np.asarray(codes, dtype=np.intp)]
+
+
+def build_feature_matrix(df, target_col, sparse_threshold=SPARSE_CARDINALITY_THRESHOLD):
+    """
+    One-hot encode every column except the target.
+
+    Low-cardinality data gives a dense frame. When a categorical column
+    exceeds ``sparse_threshold`` distinct values the matrix is built directly
+    as CSR, so a few thousand categories never materialise as dense columns.
+    Pass ``sparse_threshold=None`` for estimators that need dense input.
+
+    Returns the feature matrix, its feature names and the fitted
+    ``FeatureEncoder`` used to encode rows at prediction time.
+    """
+    encoder = FeatureEncoder(sparse_threshold)
+    X = encoder.fit_transform(df.drop(columns=[target_col]))
+    return X, encoder.feature_names, encoder
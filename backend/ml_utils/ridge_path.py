@@ -0,0 +1,69 @@
+import numpy as np
+from scipy import linalg, sparse
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+
+def _row_slice(values, rows):
+    if hasattr(values, 'iloc'):
+        return values.iloc[rows]
+    return values[rows]
+
+
+def _fold_predictions(x_fit, y_fit, x_val, alphas):
+    """
+    Validation predictions of ridge with an intercept for every alpha.
+
+    One eigendecomposition of the centred Gram matrix (features x features,
+    or rows x rows when there are more features than rows) gives the
+    solution for any alpha as a diagonal rescaling. Sparse inputs are
+    centred implicitly and never densified.
+    """
+    mean = np.asarray(x_fit.mean(axis=0)).ravel()
+    y_mean = y_fit.mean()
+    y_centred = y_fit - y_mean
+    n_rows, n_features = x_fit.shape
+
+    if n_features <= n_rows:
+        gram = np.asarray((x_fit.T @ x_fit).todense() if sparse.issparse(x_fit) else x_fit.T @ x_fit)
+        gram -= n_rows * np.outer(mean, mean)
+        eigenvalues, eigenvectors = linalg.eigh(gram)
+        projected_val = np.asarray(x_val @ eigenvectors) - mean @ eigenvectors
+        weights = eigenvectors.T @ np.asarray(x_fit.T @ y_centred).ravel()
+    else:
+        x_fit_mean = np.asarray(x_fit @ mean).ravel()
+        kernel = np.asarray((x_fit @ x_fit.T).todense() if sparse.issparse(x_fit) else x_fit @ x_fit.T)
+        kernel += mean @ mean - x_fit_mean[:, None] - x_fit_mean[None, :]
+        cross = np.asarray((x_val @ x_fit.T).todense() if sparse.issparse(x_val) else x_val @ x_fit.T)
+        cross += mean @ mean - np.asarray(x_val @ mean).ravel()[:, None] - x_fit_mean[None, :]
+        eigenvalues, eigenvectors = linalg.eigh(kernel)
+        projected_val = cross @ eigenvectors
+        weights = eigenvectors.T @ y_centred
+
+    eigenvalues = np.clip(eigenvalues, 0, None)
+    shrunk = weights[:, None] / (eigenvalues[:, None] + np.asarray(alphas)[None, :])
+    return projected_val @ shrunk + y_mean
+
+
+def ridge_validation_curve(scaler, x_train, y_train, alphas, cv_folds=5):
+    """
+    Mean and standard deviation of the cross-validated R² of a
+    ``scaler`` + ``Ridge`` pipeline for every alpha in ``alphas``.
+
+    Uses the same unshuffled ``KFold`` splits as ``GridSearchCV(cv=cv_folds)``
+    on a regressor, so scores match a grid search over the same alphas, but
+    each fold costs one eigendecomposition however dense the alpha grid is.
+    """
+    y_train = np.asarray(y_train, dtype=np.float64)
+    scores = np.empty((cv_folds, len(alphas)))
+
+    for fold, (fit_rows, val_rows) in enumerate(KFold(n_splits=cv_folds).split(x_train)):
+        fold_scaler = clone(scaler)
+        x_fit = fold_scaler.fit_transform(_row_slice(x_train, fit_rows))
+        x_val = fold_scaler.transform(_row_slice(x_train, val_rows))
+        predictions = _fold_predictions(x_fit, y_train[fit_rows], x_val, alphas)
+        y_val = y_train[val_rows]
+        scores[fold] = [r2_score(y_val, predictions[:, column]) for column in range(len(alphas))]
+
+    return scores.mean(axis=0), scores.std(axis=0)
@@ -0,0 +1,160 @@
+import copy
+import logging
+import math
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+
+logger = logging.getLogger(__name__)
+
+HALVING_FACTOR = 3
+MIN_RESOURCE_SAMPLES = 200
+
+
+def _take(values, rows):
+    if hasattr(values, 'iloc'):
+        return values.iloc[rows]
+    return values[rows]
+
+
+def _freeze(model):
+    """Copy of a warm-started ensemble frozen at its current size, sharing its fitted members."""
+    snapshot = copy.copy(model)
+    snapshot.estimators_ = list(model.estimators_)
+    return snapshot.set_params(warm_start=False)
+
+
+def _warm_start_groups(candidates, indices, warm_start_param):
+    # Candidates that differ only in ``warm_start_param`` share one growing
+    # ensemble, visited from the smallest value up.
+    groups = {}
+    for index in indices:
+        params = candidates[index]
+        if warm_start_param is None or warm_start_param not in params:
+            groups[('single', index)] = [index]
+            continue
+        key = tuple(sorted((name, repr(value)) for name, value in params.items() if name != warm_start_param))
+        groups.setdefault(key, []).append(index)
+    return [
+        sorted(group, key=lambda index: candidates[index].get(warm_start_param, 0))
+        for group in groups.values()
+    ]
+
+
+def _resource_schedule(n_candidates, min_resource, max_resource, factor):
+    # Enough rounds for the final one to compare at most ``factor`` candidates.
+    n_rounds = 1
+    while math.ceil(n_candidates / factor ** (n_rounds - 1)) > factor:
+        n_rounds += 1
+    min_resource = min(min_resource, max_resource)
+    return [
+        int(max(min_resource, max_resource / factor ** (n_rounds - 1 - i)))
+        for i in range(n_rounds)
+    ]
+
+
+def successive_halving(estimator, candidates, x_train, y_train, x_test, y_test,
+                       factor=HALVING_FACTOR, min_resource=MIN_RESOURCE_SAMPLES,
+                       time_budget=None, scorer=accuracy_score, random_state=42,
+                       warm_start_param=None):
+    """
+    Pick the best of ``candidates`` (parameter dicts for ``estimator``) by
+    successive halving over training rows.
+
+    Every round fits the surviving candidates on a larger nested random
+    subset of the training rows, scores them on the full test set and keeps
+    the best ``1 / factor`` of them; the last round uses every row. Ties keep
+    the earlier candidate. When ``time_budget`` seconds run out the search
+    stops and the best candidate of the furthest round reached wins.
+
+    With ``warm_start_param`` (e.g. ``'n_estimators'`` for a forest),
+    candidates that differ only in that parameter are fitted once per round
+    with ``warm_start`` and scored as the ensemble grows through their
+    values. With a fixed ``random_state`` the first n members are the ones a
+    fresh n-member fit builds, so every score matches a separate fit.
+
+    The winner is refitted on all training rows if it has not been already.
+    Returns ``(best_params, best_score, best_model, trajectory)`` where
+    ``trajectory`` lists one summary per round.
+    """
+    started = time.monotonic()
+    n_rows = x_train.shape[0]
+    rows = np.random.default_rng(random_state).permutation(n_rows)
+    schedule = _resource_schedule(len(candidates), min_resource, n_rows, factor)
+
+    survivors = list(range(len(candidates)))
+    results = {}
+    trajectory = []
+    out_of_time = False
+
+    for round_index, n_samples in enumerate(schedule):
+        subset = np.sort(rows[:n_samples])
+        x_round, y_round = _take(x_train, subset), _take(y_train, subset)
+        scored = []
+
+        for group in _warm_start_groups(candidates, survivors, warm_start_param):
+            model = None
+            for index in group:
+                if index in results and results[index][2] == n_samples:
+                    # Small datasets repeat the same subset; the score still holds.
+                    scored.append(index)
+                    if len(group) > 1:
+                        model = copy.copy(results[index][1])
+                        model.estimators_ = list(model.estimators_)
+                        model.set_params(warm_start=True)
+                    continue
+                if time_budget is not None and time.monotonic() - started > time_budget:
+                    out_of_time = True
+                    break
+                try:
+                    if len(group) == 1:
+                        model = clone(estimator).set_params(**candidates[index])
+                    elif model is None:
+                        model = clone(estimator).set_params(**candidates[index], warm_start=True)
+                    else:
+                        model.set_params(**{warm_start_param: candidates[index][warm_start_param]})
+                    model.fit(x_round, y_round)
+                    score = scorer(y_test, model.predict(x_test))
+                except Exception as e:
+                    logger.warning(f"Search candidate {candidates[index]} failed: {str(e)}")
+                    # The grown ensemble is in an unknown state; skip the rest of its group.
+                    break
+                results[index] = (score, _freeze(model) if len(group) > 1 else model, n_samples)
+                scored.append(index)
+            if out_of_time:
+                break
+
+        if not scored:
+            break
+
+        # Ties keep the earlier candidate, whatever order the groups were fitted in.
+        position = {index: i for i, index in enumerate(survivors)}
+        scored.sort(key=lambda index: (-results[index][0], position[index]))
+        survivors = scored[:max(1, math.ceil(len(scored) / factor))]
+        trajectory.append({
+            "round": round_index,
+            "n_samples": n_samples,
+            "candidates": len(scored),
+            "kept": len(survivors),
+            "best_score": results[scored[0]][0],
+            "best_params": candidates[scored[0]],
+            "elapsed": round(time.monotonic() - started, 3),
+        })
+
+        if out_of_time:
+            logger.info(f"Search time budget of {time_budget}s reached after round {round_index}")
+            break
+
+    if not trajectory:
+        return None, None, None, trajectory
+
+    best = survivors[0]
+    best_score, best_model, n_samples = results[best]
+    if n_samples < n_rows:
+        best_model = clone(estimator).set_params(**candidates[best])
+        best_model.fit(x_train, y_train)
+        best_score = scorer(y_test, best_model.predict(x_test))
+
+    return candidates[best], best_score, best_model, trajectory
@@ -0,0 +1,74 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+class SharedArrays:
+    """
+    Shared-memory copies of the arrays handed to a pool of worker processes.
+
+    ``share`` copies a NumPy array, a DataFrame or a CSR matrix into shared
+    memory once and returns a small picklable handle; workers ``attach`` the
+    handle to get the same value back without another copy, and close the
+    blocks it returns once nothing refers to the value any more. Every block
+    is unlinked when the owner is closed.
+    """
+
+    def __init__(self):
+        self._blocks = []
+
+    def _share_array(self, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self._blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        return block.name, array.shape, array.dtype.str
+
+    def share(self, value):
+        if sparse.issparse(value):
+            value = sparse.csr_matrix(value)
+            parts = [self._share_array(part) for part in (value.data, value.indices, value.indptr)]
+            return 'csr', value.shape, parts
+        if isinstance(value, pd.DataFrame):
+            return 'frame', list(value.columns), self._share_array(value.to_numpy())
+        return 'array', None, self._share_array(np.asarray(value))
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _attach_array(name, shape, dtype, blocks):
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+
+def attach(handle):
+    """
+    Rebuild a value from a ``SharedArrays.share`` handle, without copying it.
+
+    Returns ``(value, blocks)``. The value is a view of the blocks, so they
+    must stay open while it is in use; close them afterwards, or the worker
+    keeps the memory mapped after the owner unlinks it.
+    """
+    kind, meta, parts = handle
+    blocks = []
+    if kind == 'csr':
+        data, indices, indptr = (_attach_array(*part, blocks) for part in parts)
+        return sparse.csr_matrix((data, indices, indptr), shape=meta, copy=False), blocks
+    array = _attach_array(*parts, blocks)
+    if kind == 'frame':
+        return pd.DataFrame(array, columns=meta, copy=False), blocks
+    return array, blocks
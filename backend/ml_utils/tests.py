@@ -0,0 +1,352 @@
+import asyncio
+import io
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from scipy import sparse
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import r2_score
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from .cpu_scheduler import CoreScheduler, process_share
+from .ingestion import DTYPE_SAMPLE_ROWS, DatasetValidationError, ingest_csv, iter_csv_chunks, scan_csv
+from .micro_batching import MicroBatcher
+from .neighbor_utils import predictions_by_k
+from .out_of_core import fit_linear_regression_out_of_core, hashed_test_mask
+from .polynomial_search import search_polynomial_degree
+from .preprocessing import FeatureEncoder
+from .ridge_path import ridge_validation_curve
+from .search import successive_halving
+from .tree_utils import path_nodes_by_depth, predict_at_depth, truncate_tree
+
+
+class SuccessiveHalvingTests(SimpleTestCase):
+
+    def test_warm_started_search_matches_separate_fits(self):
+        X, y = make_classification(n_samples=1200, n_features=8, random_state=0)
+        candidates = [
+            {'n_estimators': n_estimators, 'max_depth': max_depth}
+            for n_estimators in (5, 10, 20)
+            for max_depth in (None, 2, 4)
+        ]
+        searches = [
+            successive_halving(
+                RandomForestClassifier(random_state=42), candidates,
+                X[:1000], y[:1000], X[1000:], y[1000:],
+                min_resource=100, warm_start_param=warm_start_param,
+            )
+            for warm_start_param in (None, 'n_estimators')
+        ]
+        (params, score, model, trajectory), (warm_params, warm_score, warm_model, warm_trajectory) = searches
+
+        self.assertEqual(warm_params, params)
+        self.assertEqual(warm_score, score)
+        self.assertEqual(
+            [(row['best_score'], row['best_params'], row['kept']) for row in warm_trajectory],
+            [(row['best_score'], row['best_params'], row['kept']) for row in trajectory],
+        )
+        self.assertEqual(len(warm_model.estimators_), params['n_estimators'])
+        self.assertEqual(warm_model.predict_proba(X).tolist(), model.predict_proba(X).tolist())
+
+
+
+class TreeTruncationTests(SimpleTestCase):
+
+    def assert_matches_refits(self, X, y, depths):
+        x_train, x_test, y_train = X[:600], X[600:], y[:600]
+        full_tree = DecisionTreeClassifier(max_depth=10, random_state=42).fit(x_train, y_train)
+        nodes = path_nodes_by_depth(full_tree, x_test)
+
+        for max_depth in depths:
+            refit = DecisionTreeClassifier(max_depth=max_depth, random_state=42).fit(x_train, y_train)
+            truncated = truncate_tree(full_tree, max_depth)
+            expected = refit.predict(x_test)
+            np.testing.assert_array_equal(predict_at_depth(full_tree, nodes, max_depth), expected)
+            np.testing.assert_array_equal(truncated.predict(x_test), expected)
+            np.testing.assert_allclose(truncated.predict_proba(x_test), refit.predict_proba(x_test))
+            self.assertEqual(truncated.get_depth(), refit.get_depth())
+
+    def test_single_feature_tree_matches_refits_at_every_depth(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=(800, 1))
+        y = (np.sin(3 * x[:, 0]) + rng.normal(scale=0.3, size=800) > 0).astype(int) + (x[:, 0] > 1)
+        self.assert_matches_refits(x, y, range(1, 11))
+
+    def test_multi_feature_tree_matches_refits_above_tied_splits(self):
+        # Deep, small nodes can tie exactly between features, which sklearn
+        # breaks by a random feature order that differs from a separate fit.
+        X, y = make_classification(n_samples=800, n_features=6, n_informative=4, n_classes=3, random_state=0)
+        self.assert_matches_refits(X, y, range(1, 4))
+
+
+class NeighborSweepTests(SimpleTestCase):
+
+    def test_every_k_matches_a_classifier_fitted_with_that_k(self):
+        X, y = make_classification(n_samples=500, n_features=5, n_classes=3, n_informative=3, random_state=0)
+        labels = np.array(['high', 'low', 'mid'])[y]
+        x_train, x_test, y_train = X[:400], X[400:], labels[:400]
+        model = KNeighborsClassifier().fit(x_train, y_train)
+
+        swept = dict(predictions_by_k(model, y_train, x_test, 20))
+        self.assertEqual(sorted(swept), list(range(1, 21)))
+        for k, y_pred in swept.items():
+            refit = KNeighborsClassifier(n_neighbors=k).fit(x_train, y_train)
+            np.testing.assert_array_equal(y_pred, refit.predict(x_test))
+
+
+class PolynomialSearchTests(SimpleTestCase):
+
+    def test_every_degree_scores_like_a_refitted_pipeline(self):
+        rng = np.random.default_rng(0)
+        X = rng.uniform(-1, 1, size=(300, 3))
+        y = X[:, 0] ** 3 - 2 * X[:, 0] * X[:, 1] + X[:, 2] + rng.normal(scale=0.1, size=300)
+        x_train, x_test, y_train, y_test = X[:240], X[240:], y[:240], y[240:]
+
+        best_degree, trajectory = search_polynomial_degree(x_train, y_train, x_test, y_test, max_degree=5, patience=5)
+
+        refit_scores = []
+        for row in trajectory:
+            pipeline = make_pipeline(PolynomialFeatures(row['degree']), LinearRegression())
+            pipeline.fit(x_train, y_train)
+            refit_scores.append(r2_score(y_test, pipeline.predict(x_test)))
+            self.assertEqual(row['n_columns'], pipeline[0].n_output_features_)
+        self.assertEqual([row['degree'] for row in trajectory], [1, 2, 3, 4, 5])
+        np.testing.assert_allclose([row['r2_score'] for row in trajectory], refit_scores, rtol=1e-9)
+        self.assertEqual(best_degree, trajectory[int(np.argmax(refit_scores))]['degree'])
+
+
+class RidgePathTests(SimpleTestCase):
+    alphas = np.logspace(-2, 3, 11)
+
+    def assert_matches_grid_search(self, X, y, atol):
+        scaler = StandardScaler(with_mean=not sparse.issparse(X))
+        mean_scores, std_scores = ridge_validation_curve(scaler, X, y, self.alphas)
+        search = GridSearchCV(
+            make_pipeline(StandardScaler(with_mean=not sparse.issparse(X)), Ridge()),
+            {'ridge__alpha': self.alphas}, cv=5, scoring='r2',
+        ).fit(X, y)
+        np.testing.assert_allclose(mean_scores, search.cv_results_['mean_test_score'], rtol=0, atol=atol)
+        np.testing.assert_allclose(std_scores, search.cv_results_['std_test_score'], rtol=0, atol=atol)
+
+    def test_more_rows_than_features(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(200, 5))
+        self.assert_matches_grid_search(X, X @ rng.normal(size=5) + rng.normal(size=200), atol=1e-10)
+
+    def test_more_features_than_rows(self):
+        rng = np.random.default_rng(1)
+        X = rng.normal(size=(40, 60))
+        self.assert_matches_grid_search(X, X[:, :5] @ rng.normal(size=5) + rng.normal(size=40), atol=1e-10)
+
+    def test_sparse_features(self):
+        rng = np.random.default_rng(2)
+        X = sparse.random(200, 30, density=0.2, random_state=0, format='csr')
+        # Ridge solves sparse inputs iteratively, to its default tol of 1e-4.
+        self.assert_matches_grid_search(X, X @ rng.normal(size=30) + rng.normal(size=200), atol=1e-4)
+
+
+class OutOfCoreRegressionTests(SimpleTestCase):
+
+    def test_streamed_fit_matches_an_in_memory_fit_on_the_same_split(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'x1': rng.normal(size=500),
+            'x2': rng.integers(0, 5, size=500),
+            'city': rng.choice(['a', 'b', 'c'], size=500),
+        })
+        df['y'] = 2 * df['x1'] - df['x2'] + df['city'].map({'a': 0, 'b': 1.5, 'c': -1}) + rng.normal(scale=0.1, size=500)
+        csv_file = io.BytesIO(df.to_csv(index=False).encode())
+
+        model, encoder, y_test, y_pred, layout = fit_linear_regression_out_of_core(csv_file, 'y', chunksize=37)
+
+        frame = pd.concat(iter_csv_chunks(csv_file, layout, chunksize=1000))
+        test_rows = hashed_test_mask(frame)
+        X = encoder.transform(frame.drop(columns=['y']))
+        refit = LinearRegression().fit(X[~test_rows], frame['y'][~test_rows])
+
+        np.testing.assert_allclose(model.coef_, refit.coef_, atol=1e-10)
+        self.assertAlmostEqual(model.intercept_, refit.intercept_, places=10)
+        np.testing.assert_array_equal(y_test, frame['y'][test_rows])
+        np.testing.assert_allclose(y_pred, refit.predict(X[test_rows]), atol=1e-10)
+
+
+class IngestionTests(SimpleTestCase):
+    rows = DTYPE_SAMPLE_ROWS + 200
+
+    def csv_file(self, replace=None, extra_lines=()):
+        # Integer features and a bool label; ``replace`` swaps single cells past the dtype sample.
+        df = pd.DataFrame({
+            'count': np.arange(self.rows),
+            'city': np.where(np.arange(self.rows) % 2, 'a', 'b'),
+            'label': np.arange(self.rows) % 3 == 0,
+        }).astype(object)
+        for (row, column), value in (replace or {}).items():
+            df.loc[row, column] = value
+        text = df.to_csv(index=False) + ''.join(f'{line}\n' for line in extra_lines)
+        return io.BytesIO(text.encode())
+
+    def test_clean_file_keeps_integer_and_bool_columns(self):
+        df, raw_rows = ingest_csv(self.csv_file(), 'label', chunksize=300)
+        self.assertEqual(raw_rows, self.rows)
+        self.assertEqual(df['count'].dtype, np.int64)
+        self.assertEqual(df['label'].dtype, bool)
+
+    def test_null_past_the_sample_keeps_the_integer_column(self):
+        late = DTYPE_SAMPLE_ROWS + 50
+        csv_file = self.csv_file({(late, 'count'): None, (late + 1, 'label'): None})
+        df, raw_rows = ingest_csv(csv_file, 'label', chunksize=300)
+
+        self.assertEqual(raw_rows, self.rows)
+        self.assertEqual(len(df), self.rows - 2)
+        self.assertEqual(df['count'].dtype, np.int64)
+        self.assertEqual(df['label'].dtype, bool)
+        self.assertNotIn(late, df['count'].tolist())
+
+    def test_float_past_the_sample_widens_the_column_for_every_chunk(self):
+        late = DTYPE_SAMPLE_ROWS + 50
+        csv_file = self.csv_file({(late, 'count'): 2.5})
+        df, raw_rows = ingest_csv(csv_file, 'label', chunksize=300)
+
+        self.assertEqual(raw_rows, self.rows)
+        self.assertEqual(len(df), self.rows)
+        self.assertEqual(df['count'].dtype, np.float64)
+        self.assertEqual(df['count'][late], 2.5)
+        self.assertEqual(df['count'][0], 0.0)
+
+        layout = scan_csv(csv_file, 'label', chunksize=300)
+        self.assertEqual(layout.dtypes['count'], 'float64')
+        self.assertEqual(sorted(layout.categories), ['city'])
+        self.assertEqual(sorted(layout.categories['city']), ['a', 'b'])
+        self.assertEqual(layout.clean_rows, self.rows)
+
+    def test_too_many_nulls_stops_at_the_offending_chunk(self):
+        nulls = {(row, 'count'): None for row in range(60)}
+        # An unterminated quote further down would fail the parse if it were ever read.
+        csv_file = self.csv_file(nulls, extra_lines=['1,"a,True'])
+        for read in (ingest_csv, scan_csv):
+            with self.assertRaises(DatasetValidationError) as raised:
+                read(csv_file, 'label', max_nulls=50, chunksize=100)
+            self.assertEqual(raised.exception.code, 'TOO_MANY_NULLS')
+            self.assertEqual(raised.exception.extra['null_count'], 60)
+
+
+class FeatureEncoderTests(SimpleTestCase):
+
+    def test_dense_frame_matches_the_sparse_matrix(self):
+        rng = np.random.default_rng(0)
+        train = pd.DataFrame({
+            'x': rng.normal(size=50),
+            'n': rng.integers(0, 4, size=50),
+            'city': rng.choice(['a', 'b', 'c'], size=50),
+            'plan': rng.choice(['basic', 'pro'], size=50),
+        })
+        rows = train.head(5).copy()
+        rows.loc[0, 'city'] = 'unseen'
+
+        dense = FeatureEncoder(sparse_threshold=None).fit(train).transform(rows)
+        encoded = FeatureEncoder(sparse_threshold=0).fit(train).transform(rows)
+
+        self.assertTrue(sparse.isspmatrix_csr(encoded))
+        self.assertEqual(list(dense.columns), ['x', 'n', 'city_b', 'city_c', 'plan_pro'])
+        self.assertEqual(list(dense.index), list(rows.index))
+        np.testing.assert_array_equal(dense.to_numpy(), encoded.toarray())
+        self.assertEqual(dense.loc[0, ['city_b', 'city_c']].tolist(), [0.0, 0.0])
+
+
+class CoreSchedulerTests(SimpleTestCase):
+
+    def test_leases_get_a_fair_share_of_the_free_cores(self):
+        scheduler = CoreScheduler(total_cores=9)
+        self.assertEqual(scheduler.acquire('small', requested=1)[1], 1)
+        self.assertEqual(scheduler.acquire('second')[1], 4)
+        self.assertEqual(scheduler.acquire('third')[1], 3)
+        self.assertEqual(scheduler.available_cores, 1)
+
+        capped = CoreScheduler(total_cores=8, max_cores_per_lease=2)
+        self.assertEqual(capped.acquire('capped')[1], 2)
+
+    def test_waiting_leases_are_granted_in_arrival_order(self):
+        scheduler = CoreScheduler(total_cores=1)
+        held, _ = scheduler.acquire('held')
+        granted = []
+
+        def take(name):
+            with scheduler.lease(name):
+                granted.append(name)
+
+        threads = []
+        for waiting, name in enumerate(('first', 'second'), start=1):
+            thread = threading.Thread(target=take, args=(name,))
+            thread.start()
+            threads.append(thread)
+            while scheduler.allocations()['waiting'] < waiting:
+                time.sleep(0.001)
+
+        scheduler.release(held)
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertEqual(granted, ['first', 'second'])
+        self.assertEqual(scheduler.available_cores, 1)
+
+    def test_acquire_times_out_and_leaves_the_queue(self):
+        scheduler = CoreScheduler(total_cores=2)
+        scheduler.acquire('held', requested=2)
+        with self.assertRaises(TimeoutError):
+            scheduler.acquire('late', timeout=0.05)
+        self.assertEqual(scheduler.allocations()['waiting'], 0)
+
+    def test_process_share_splits_the_budget(self):
+        self.assertEqual(process_share(8, 3), 2)
+        self.assertEqual(process_share(2, 4), 1)
+
+
+class MicroBatcherTests(SimpleTestCase):
+
+    def run_concurrently(self, batcher, run_batch, *requests):
+        async def submit_all():
+            return await asyncio.gather(
+                *(batcher.submit('model', items, run_batch) for items in requests),
+                return_exceptions=True,
+            )
+        return asyncio.run(submit_all())
+
+    def test_concurrent_calls_share_one_batch(self):
+        batches = []
+
+        def run_batch(items):
+            batches.append(list(items))
+            return [item * 10 for item in items]
+
+        results = self.run_concurrently(MicroBatcher(max_wait=0.05), run_batch, [1], [2, 3])
+        self.assertEqual(batches, [[1, 2, 3]])
+        self.assertEqual(results, [([10], 3), ([20, 30], 3)])
+
+    def test_full_batch_runs_without_waiting_and_the_rest_start_another(self):
+        batches = []
+
+        def run_batch(items):
+            batches.append(list(items))
+            return list(items)
+
+        results = self.run_concurrently(MicroBatcher(max_wait=0.05, max_batch_size=2), run_batch, [1], [2], [3])
+        self.assertEqual(batches, [[1, 2], [3]])
+        self.assertEqual(results, [([1], 2), ([2], 2), ([3], 1)])
+
+    def test_failing_batch_fails_only_the_bad_caller(self):
+        def run_batch(items):
+            if 'bad' in items:
+                raise ValueError("bad row")
+            return list(items)
+
+        good, bad = self.run_concurrently(MicroBatcher(max_wait=0.05), run_batch, ['ok'], ['bad'])
+        self.assertEqual(good, (['ok'], 1))
+        self.assertIsInstance(bad, ValueError)
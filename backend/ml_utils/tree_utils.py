@@ -0,0 +1,87 @@
+import copy
+
+import numpy as np
+from sklearn.tree import _tree
+
+
+def node_depths(tree):
+    """Depth of every node in a fitted sklearn ``Tree``."""
+    depths = np.zeros(tree.node_count, dtype=np.int64)
+    for node in range(tree.node_count):
+        for child in (tree.children_left[node], tree.children_right[node]):
+            if child != _tree.TREE_LEAF:
+                depths[child] = depths[node] + 1
+    return depths
+
+
+def path_nodes_by_depth(model, X):
+    """
+    For every row of ``X``, the node it reaches at each depth of the tree.
+
+    Returns an ``(n_rows, max_depth + 1)`` array. Column ``d`` holds the node
+    a tree truncated at depth ``d`` would predict from; rows whose leaf is
+    shallower than ``d`` keep their leaf.
+    """
+    tree = model.tree_
+    depths = node_depths(tree)
+    paths = model.decision_path(X).tocsr()
+    n_rows = paths.shape[0]
+
+    nodes = np.empty((n_rows, tree.max_depth + 1), dtype=np.int64)
+    row_ids = np.repeat(np.arange(n_rows), np.diff(paths.indptr))
+    nodes[row_ids, depths[paths.indices]] = paths.indices
+
+    leaves = model.apply(X)
+    leaf_depths = depths[leaves]
+    for depth in range(1, tree.max_depth + 1):
+        beyond_leaf = leaf_depths < depth
+        nodes[beyond_leaf, depth] = leaves[beyond_leaf]
+    return nodes
+
+
+def predict_at_depth(model, nodes, depth):
+    """Class predictions of ``model`` truncated at ``depth``, from ``path_nodes_by_depth`` output."""
+    values = model.tree_.value[nodes[:, min(depth, nodes.shape[1] - 1)], 0]
+    return model.classes_.take(np.argmax(values, axis=1), axis=0)
+
+
+def truncate_tree(model, max_depth):
+    """
+    Copy of a fitted single-output decision tree cut back to ``max_depth``.
+
+    Nodes at ``max_depth`` become leaves that keep the class distribution
+    they had as internal nodes, so the copy predicts exactly like the
+    truncated tree and can be pickled and used like any fitted estimator.
+    """
+    tree = model.tree_
+    if max_depth >= tree.max_depth:
+        truncated = copy.copy(model)
+        truncated.max_depth = max_depth
+        return truncated
+
+    state = tree.__getstate__()
+    depths = node_depths(tree)
+    kept = np.flatnonzero(depths <= max_depth)
+    new_ids = np.full(tree.node_count, _tree.TREE_LEAF, dtype=np.int64)
+    new_ids[kept] = np.arange(len(kept))
+
+    nodes = state['nodes'][kept].copy()
+    at_limit = depths[kept] == max_depth
+    is_split = nodes['left_child'] != _tree.TREE_LEAF
+    nodes['left_child'][is_split] = new_ids[nodes['left_child'][is_split]]
+    nodes['right_child'][is_split] = new_ids[nodes['right_child'][is_split]]
+    nodes['left_child'][at_limit] = _tree.TREE_LEAF
+    nodes['right_child'][at_limit] = _tree.TREE_LEAF
+    nodes['feature'][at_limit] = _tree.TREE_UNDEFINED
+    nodes['threshold'][at_limit] = _tree.TREE_UNDEFINED
+
+    truncated = copy.copy(model)
+    truncated.max_depth = max_depth
+    truncated.tree_ = _tree.Tree(*tree.__reduce__()[1])
+    truncated.tree_.__setstate__({
+        'max_depth': int(depths[kept].max()),
+        'node_count': len(kept),
+        'nodes': nodes,
+        'values': state['values'][kept].copy(),
+    })
+    return truncated
@@ -1,4 +1,5 @@
 import logging
+from django.conf import settings
 from django.core.files import File
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -8,7 +9,6 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import pandas as pd
-import joblib
 from tempfile import NamedTemporaryFile
 import os
 from django.core.files.images import ImageFile
@@ -16,67 +16,66 @@ from sklearn.preprocessing import LabelEncoder
 import numpy as np
 
 from trained_model.models import TrainedModel, ModelStats, ModelGraph
+from trained_model.datasets import load_training_data
+from trained_model.artifacts import dump_artifact, save_preprocessor, save_model_metadata
+from trained_model.result_cache import cached_training
 from ml_utils.graph_utils import *
 from ml_utils.stats_utils import *
+from ml_utils.ingestion import DatasetValidationError
+from ml_utils.preprocessing import build_feature_matrix
+from ml_utils.cpu_scheduler import core_lease
+from ml_utils.search import successive_halving
 from trained_model.serializer import ModelStatsSerializer, ModelGraphSerializer
 
 logger = logging.getLogger(__name__)
 
+
 class RandomForestView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def hyperparameter_tuning(self, x_train, y_train, x_test, y_test):
-        best_score = 0
-        best_params = {}
-        
+    def hyperparameter_tuning(self, x_train, y_train, x_test, y_test, n_jobs=1):
         n_estimators_options = [50, 100, 200]
         max_depth_options = [None, 5, 10, 15]
         min_samples_split_options = [2, 5, 10]
         min_samples_leaf_options = [1, 2, 4]
         
-        for n_estimators in n_estimators_options:
-            for max_depth in max_depth_options:
-                for min_samples_split in min_samples_split_options:
-                    for min_samples_leaf in min_samples_leaf_options:
-                        try:
-                            model = RandomForestClassifier(
-                                n_estimators=n_estimators,
-                                max_depth=max_depth,
-                                min_samples_split=min_samples_split,
-                                min_samples_leaf=min_samples_leaf,
-                                random_state=42,
-                                n_jobs=-1
-                            )
-                            model.fit(x_train, y_train)
-                            y_pred = model.predict(x_test)
-                            score = accuracy_score(y_test, y_pred)
-                            
-                            if score > best_score:
-                                best_score = score
-                                best_params = {
-                                    'n_estimators': n_estimators,
-                                    'max_depth': max_depth,
-                                    'min_samples_split': min_samples_split,
-                                    'min_samples_leaf': min_samples_leaf,
-                                    'model': model
-                                }
-                            logger.info(f"Best Params After n_estimators:{n_estimators}, max_depth:{max_depth}, min_samples_split:{min_samples_split}, min_samples_leaf:{min_samples_leaf}")
-                        except Exception as e:
-                            logger.warning(f"Error in hyperparameter tuning: {str(e)}")
-                            continue
+        candidates = [
+            {
+                'n_estimators': n_estimators,
+                'max_depth': max_depth,
+                'min_samples_split': min_samples_split,
+                'min_samples_leaf': min_samples_leaf,
+            }
+            for n_estimators in n_estimators_options
+            for max_depth in max_depth_options
+            for min_samples_split in min_samples_split_options
+            for min_samples_leaf in min_samples_leaf_options
+        ]
+        # Rows are the halving resource; within a round, the tree counts of
+        # one configuration are grown from a single warm-started forest.
+        params, best_score, model, trajectory = successive_halving(
+            RandomForestClassifier(random_state=42, n_jobs=n_jobs),
+            candidates, x_train, y_train, x_test, y_test,
+            time_budget=settings.TRAINING_SEARCH_TIME_BUDGET,
+            warm_start_param='n_estimators'
+        )
+        if model is not None:
+            logger.info(f"Best Params After successive halving: {params}")
+            return {**params, 'model': model}, best_score, trajectory
         
-        if not best_params:
-            model = RandomForestClassifier(random_state=42, n_jobs=-1)
-            model.fit(x_train, y_train)
-            y_pred = model.predict(x_test)
-            best_score = accuracy_score(y_test, y_pred)
-            best_params = {'model': model}
-            
-        return best_params, best_score
+        model = RandomForestClassifier(random_state=42, n_jobs=n_jobs)
+        model.fit(x_train, y_train)
+        y_pred = model.predict(x_test)
+        best_score = accuracy_score(y_test, y_pred)
+        return {'model': model}, best_score, trajectory
 
     def post(self, request):
+        return self.train(request.data, request.FILES.get('csv_file'), request.user)
+
+    @cached_training(TrainedModel.ModelType.RANDOM_FOREST)
+    def train(self, data, csv_file, user):
+        """Train and save a model; shared by the HTTP endpoint and background training jobs."""
         try:
-            data = request.data
             model_name = data.get('model_name', 'Random Forest')
             target_col = data.get('target_col')
 
@@ -86,14 +85,12 @@ class RandomForestView(APIView):
                     "code": "MISSING_TARGET_COLUMN"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if 'csv_file' not in request.FILES:
+            if csv_file is None:
                 return Response({
                     "error": "CSV file is required.",
                     "code": "MISSING_CSV_FILE"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            csv_file = request.FILES['csv_file']
-
             if not csv_file.name.lower().endswith('.csv'):
                 return Response({
                     "error": "File must be a CSV.",
@@ -101,56 +98,19 @@ class RandomForestView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                df = pd.read_csv(csv_file)
-            except pd.errors.EmptyDataError:
-                return Response({
-                    "error": "CSV file is empty.",
-                    "code": "EMPTY_CSV_FILE"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except pd.errors.ParserError as e:
-                return Response({
-                    "error": f"CSV parse error: {str(e)}",
-                    "code": "CSV_PARSE_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error reading CSV: {str(e)}",
-                    "code": "CSV_READ_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.empty:
-                return Response({
-                    "error": "CSV contains no data.",
-                    "code": "EMPTY_DATASET"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if target_col not in df.columns:
-                return Response({
-                    "error": f"Target column '{target_col}' not found.",
-                    "code": "TARGET_COLUMN_NOT_FOUND",
-                    "available_columns": list(df.columns)
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.isnull().sum().sum() > 50:
-                return Response({
-                    "error": "Dataset has too many null values.",
-                    "code": "TOO_MANY_NULLS"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            df = df.dropna()
-            if df.empty or len(df) < 5:
-                return Response({
-                    "error": "Insufficient data after cleaning.",
-                    "code": "INSUFFICIENT_DATA"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                dataset, df = load_training_data(csv_file, target_col)
+            except DatasetValidationError as e:
+                return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
 
             y_raw = df[target_col]
+            label_classes = None
             try:
                 y = y_raw.astype(int)
             except (ValueError, TypeError):
                 try:
                     le = LabelEncoder()
                     y = le.fit_transform(y_raw)
+                    label_classes = le.classes_
                 except Exception as e:
                     return Response({
                         "error": f"Error encoding target: {str(e)}",
@@ -158,14 +118,14 @@ class RandomForestView(APIView):
                     }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                X = pd.get_dummies(df.drop(columns=[target_col]), drop_first=True)
+                X, feature_names, encoder = build_feature_matrix(df, target_col)
             except Exception as e:
                 return Response({
                     "error": f"Error creating features: {str(e)}",
                     "code": "FEATURE_PREPARATION_ERROR"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if X.empty or X.shape[1] == 0:
+            if X.shape[0] == 0 or X.shape[1] == 0:
                 return Response({
                     "error": "No features after preprocessing.",
                     "code": "NO_FEATURES"
@@ -180,23 +140,27 @@ class RandomForestView(APIView):
                     X, y, test_size=0.2, random_state=42
                 )
 
-            best_params, _ = self.hyperparameter_tuning(x_train, y_train, x_test, y_test)
+            with core_lease("random-forest") as n_jobs:
+                best_params, _, search_trajectory = self.hyperparameter_tuning(x_train, y_train, x_test, y_test, n_jobs=n_jobs)
             model = best_params['model']
 
             try:
                 temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
-                joblib.dump(model, temp_file.name)
+                dump_artifact(model, temp_file.name)
                 with open(temp_file.name, 'rb') as f:
                     django_file = File(f)
                     ml_model = TrainedModel.objects.create(
                         model_type=TrainedModel.ModelType.RANDOM_FOREST,
                         model_name=model_name,
                         target_column=target_col,
-                        features=",".join(X.columns),
-                        user_id=request.user.id
+                        features=",".join(feature_names),
+                        user_id=user.id,
+                        dataset=dataset,
+                        csv_file=dataset.csv_file.name
                     )
                     ml_model.model_file.save(f"{ml_model.id}_model.pkl", django_file)
-                    ml_model.csv_file.save(f"{ml_model.id}_data.csv", csv_file)
+                    save_preprocessor(ml_model, encoder, label_classes)
+                    save_model_metadata(ml_model, model)
                     ml_model.save()
                 # os.remove(temp_file.name)
             except Exception as e:
@@ -257,7 +221,7 @@ class RandomForestView(APIView):
 
                 try:
                     feature_importance_path = os.path.join(graph_dir, f'feature_importance_{ml_model.id}.png')
-                    save_feature_importance_graph(model.feature_importances_, X.columns, feature_importance_path)
+                    save_feature_importance_graph(model.feature_importances_, feature_names, feature_importance_path)
                     with open(feature_importance_path, 'rb') as img_file:
                         ModelGraph.objects.create(
                             trained_model=ml_model,
@@ -278,7 +242,7 @@ class RandomForestView(APIView):
                 'min_samples_leaf': model.min_samples_leaf,
                 'max_features': model.max_features,
                 'feature_importances': model.feature_importances_.tolist() if hasattr(model, 'feature_importances_') else None,
-                'feature_names': X.columns.tolist()
+                'feature_names': feature_names
             }
 
             return Response({
@@ -296,10 +260,11 @@ class RandomForestView(APIView):
                 "metrics": ModelStatsSerializer(ml_model.stats).data if hasattr(ml_model, "stats") else {},
                 "graphs": ModelGraphSerializer(ml_model.graphs.all(), many=True).data,
                 "model_parameters": rf_params,
+                "search_trajectory": search_trajectory,
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            logger.error("Unexpected error in RandomForestView.post", exc_info=True)
+            logger.error("Unexpected error in RandomForestView.train", exc_info=True)
             return Response({
                 "error": "Unexpected server error occurred.",
                 "code": "UNEXPECTED_ERROR",
@@ -1,4 +1,5 @@
 import logging
+from django.conf import settings
 from django.core.files import File
 from django.core.files.images import ImageFile
 from rest_framework.views import APIView
@@ -11,11 +12,13 @@ from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import pandas as pd
-import joblib
 import os
 from tempfile import NamedTemporaryFile
 
 from trained_model.models import TrainedModel, ModelStats, ModelGraph
+from trained_model.datasets import load_training_data, store_streamed_dataset
+from trained_model.artifacts import dump_artifact, save_preprocessor, save_model_metadata
+from trained_model.result_cache import cached_training
 from ml_utils.graph_utils import (
     save_residual_plot,
     save_actual_vs_predicted_plot,
@@ -23,6 +26,11 @@ from ml_utils.graph_utils import (
     save_qq_plot
 )
 from ml_utils.stats_utils import calculate_regression_metrics
+from ml_utils.ingestion import DatasetValidationError
+from ml_utils.preprocessing import build_feature_matrix
+from ml_utils.out_of_core import fit_linear_regression_out_of_core
+from ml_utils.cpu_scheduler import core_lease
+from ml_utils.polynomial_search import search_polynomial_degree
 from trained_model.serializer import ModelStatsSerializer, ModelGraphSerializer
 
 logger = logging.getLogger(__name__)
@@ -30,9 +38,18 @@ logger = logging.getLogger(__name__)
 class LinearRegressionView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def use_out_of_core(self, data, csv_file):
+        """Stream the CSV instead of loading it when asked to, or when the upload is too large to load."""
+        requested = str(data.get('out_of_core', '')).lower() in ('1', 'true', 'yes')
+        return requested or csv_file.size >= settings.LINEAR_OUT_OF_CORE_MIN_BYTES
+
     def post(self, request):
+        return self.train(request.data, request.FILES.get('csv_file'), request.user)
+
+    @cached_training(TrainedModel.ModelType.LINEAR_REGRESSION)
+    def train(self, data, csv_file, user):
+        """Train and save a model; shared by the HTTP endpoint and background training jobs."""
         try:
-            data = request.data
             model_name = data.get('model_name', 'Linear Regression')
             target_col = data.get('target_col')
 
@@ -42,110 +59,88 @@ class LinearRegressionView(APIView):
                     "code": "MISSING_TARGET_COLUMN"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if 'csv_file' not in request.FILES:
+            if csv_file is None:
                 return Response({
                     "error": "CSV file is required.",
                     "code": "MISSING_CSV_FILE"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            csv_file = request.FILES['csv_file']
-
             if not csv_file.name.lower().endswith('.csv'):
                 return Response({
                     "error": "File must be a CSV.",
                     "code": "INVALID_FILE_TYPE"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                df = pd.read_csv(csv_file)
-            except pd.errors.EmptyDataError:
-                return Response({
-                    "error": "CSV file is empty.",
-                    "code": "EMPTY_CSV_FILE"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except pd.errors.ParserError as e:
-                return Response({
-                    "error": f"CSV parse error: {str(e)}",
-                    "code": "CSV_PARSE_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error reading CSV: {str(e)}",
-                    "code": "CSV_READ_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.empty:
-                return Response({
-                    "error": "CSV contains no data.",
-                    "code": "EMPTY_DATASET"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if target_col not in df.columns:
-                return Response({
-                    "error": f"Target column '{target_col}' not found.",
-                    "code": "TARGET_COLUMN_NOT_FOUND",
-                    "available_columns": list(df.columns)
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.isnull().sum().sum() > 50:
-                return Response({
-                    "error": "Dataset has too many null values.",
-                    "code": "TOO_MANY_NULLS"
-                }, status=status.HTTP_400_BAD_REQUEST)
+            if self.use_out_of_core(data, csv_file):
+                try:
+                    with core_lease("linear-regression", requested=1):
+                        model, encoder, y_test, y_pred, layout = fit_linear_regression_out_of_core(csv_file, target_col)
+                    dataset = store_streamed_dataset(csv_file, layout.clean_rows, layout.raw_rows)
+                except DatasetValidationError as e:
+                    return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
+                except Exception as e:
+                    logger.error(f"Out-of-core training error: {str(e)}")
+                    return Response({
+                        "error": f"Failed to train model: {str(e)}",
+                        "code": "MODEL_TRAINING_ERROR"
+                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                feature_names = encoder.feature_names
+                training_mode = "out_of_core"
+            else:
+                try:
+                    dataset, df = load_training_data(csv_file, target_col)
+                except DatasetValidationError as e:
+                    return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
 
-            df = df.dropna()
-            if df.empty or len(df) < 5:
-                return Response({
-                    "error": "Insufficient data after cleaning.",
-                    "code": "INSUFFICIENT_DATA"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                # Validate target column is numeric for regression
+                try:
+                    y = pd.to_numeric(df[target_col], errors='coerce')
+                    if y.isnull().any():
+                        return Response({
+                            "error": "Target column must contain numeric values for regression.",
+                            "code": "NON_NUMERIC_TARGET"
+                        }, status=status.HTTP_400_BAD_REQUEST)
+                except Exception as e:
+                    return Response({
+                        "error": f"Error processing target column: {str(e)}",
+                        "code": "TARGET_PROCESSING_ERROR"
+                    }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Validate target column is numeric for regression
-            try:
-                y = pd.to_numeric(df[target_col], errors='coerce')
-                if y.isnull().any():
+                try:
+                    X, feature_names, encoder = build_feature_matrix(df, target_col)
+                except Exception as e:
                     return Response({
-                        "error": "Target column must contain numeric values for regression.",
-                        "code": "NON_NUMERIC_TARGET"
+                        "error": f"Error creating features: {str(e)}",
+                        "code": "FEATURE_PREPARATION_ERROR"
                     }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error processing target column: {str(e)}",
-                    "code": "TARGET_PROCESSING_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                X = pd.get_dummies(df.drop(columns=[target_col]), drop_first=True)
-            except Exception as e:
-                return Response({
-                    "error": f"Error creating features: {str(e)}",
-                    "code": "FEATURE_PREPARATION_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                if X.shape[0] == 0 or X.shape[1] == 0:
+                    return Response({
+                        "error": "No features after preprocessing.",
+                        "code": "NO_FEATURES"
+                    }, status=status.HTTP_400_BAD_REQUEST)
 
-            if X.empty or X.shape[1] == 0:
-                return Response({
-                    "error": "No features after preprocessing.",
-                    "code": "NO_FEATURES"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+                except Exception as e:
+                    return Response({
+                        "error": f"Error splitting data: {str(e)}",
+                        "code": "DATA_SPLIT_ERROR"
+                    }, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            except Exception as e:
-                return Response({
-                    "error": f"Error splitting data: {str(e)}",
-                    "code": "DATA_SPLIT_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    model = LinearRegression()
+                    with core_lease("linear-regression", requested=1):
+                        model.fit(x_train, y_train)
+                    y_pred = model.predict(x_test)
+                except Exception as e:
+                    logger.error(f"Model training error: {str(e)}")
+                    return Response({
+                        "error": f"Failed to train model: {str(e)}",
+                        "code": "MODEL_TRAINING_ERROR"
+                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            try:
-                model = LinearRegression()
-                model.fit(x_train, y_train)
-                y_pred = model.predict(x_test)
-            except Exception as e:
-                logger.error(f"Model training error: {str(e)}")
-                return Response({
-                    "error": f"Failed to train model: {str(e)}",
-                    "code": "MODEL_TRAINING_ERROR"
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                training_mode = "in_memory"
 
             try:
                 metrics = calculate_regression_metrics(y_test, y_pred)
@@ -162,18 +157,21 @@ class LinearRegressionView(APIView):
 
             try:
                 temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
-                joblib.dump(model, temp_file.name)
+                dump_artifact(model, temp_file.name)
                 with open(temp_file.name, 'rb') as f:
                     django_file = File(f)
                     ml_model = TrainedModel.objects.create(
                         model_type=TrainedModel.ModelType.LINEAR_REGRESSION,
                         model_name=model_name,
                         target_column=target_col,
-                        features=",".join(X.columns),
-                        user_id=request.user.id
+                        features=",".join(feature_names),
+                        user_id=user.id,
+                        dataset=dataset,
+                        csv_file=dataset.csv_file.name
                     )
                     ml_model.model_file.save(f"{ml_model.id}_model.pkl", django_file)
-                    ml_model.csv_file.save(f"{ml_model.id}_data.csv", csv_file)
+                    save_preprocessor(ml_model, encoder)
+                    save_model_metadata(ml_model, model)
                     ml_model.save()
                 # os.remove(temp_file.name)
             except Exception as e:
@@ -244,10 +242,11 @@ class LinearRegressionView(APIView):
                 "intercept": (
                     model.intercept_.tolist() if hasattr(model, "intercept_") else None
                 ),
+                "training_mode": training_mode,
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            logger.error("Unexpected error in LinearRegressionView.post", exc_info=True)
+            logger.error("Unexpected error in LinearRegressionView.train", exc_info=True)
             return Response({
                 "error": "Unexpected server error occurred.",
                 "code": "UNEXPECTED_ERROR",
@@ -272,8 +271,12 @@ class PolynomialRegressionView(APIView):
             return None, None
 
     def post(self, request):
+        return self.train(request.data, request.FILES.get('csv_file'), request.user)
+
+    @cached_training(TrainedModel.ModelType.POLYNOMIAL_REGRESSION)
+    def train(self, data, csv_file, user):
+        """Train and save a model; shared by the HTTP endpoint and background training jobs."""
         try:
-            data = request.data
             model_name = data.get('model_name', 'Polynomial Regression')
             target_col = data.get('target_col')
 
@@ -283,14 +286,12 @@ class PolynomialRegressionView(APIView):
                     "code": "MISSING_TARGET_COLUMN"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if 'csv_file' not in request.FILES:
+            if csv_file is None:
                 return Response({
                     "error": "CSV file is required.",
                     "code": "MISSING_CSV_FILE"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            csv_file = request.FILES['csv_file']
-
             if not csv_file.name.lower().endswith('.csv'):
                 return Response({
                     "error": "File must be a CSV.",
@@ -298,48 +299,9 @@ class PolynomialRegressionView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                df = pd.read_csv(csv_file)
-            except pd.errors.EmptyDataError:
-                return Response({
-                    "error": "CSV file is empty.",
-                    "code": "EMPTY_CSV_FILE"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except pd.errors.ParserError as e:
-                return Response({
-                    "error": f"CSV parse error: {str(e)}",
-                    "code": "CSV_PARSE_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error reading CSV: {str(e)}",
-                    "code": "CSV_READ_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.empty:
-                return Response({
-                    "error": "CSV contains no data.",
-                    "code": "EMPTY_DATASET"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if target_col not in df.columns:
-                return Response({
-                    "error": f"Target column '{target_col}' not found.",
-                    "code": "TARGET_COLUMN_NOT_FOUND",
-                    "available_columns": list(df.columns)
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.isnull().sum().sum() > 50:
-                return Response({
-                    "error": "Dataset has too many null values.",
-                    "code": "TOO_MANY_NULLS"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            df = df.dropna()
-            if df.empty or len(df) < 5:
-                return Response({
-                    "error": "Insufficient data after cleaning.",
-                    "code": "INSUFFICIENT_DATA"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                dataset, df = load_training_data(csv_file, target_col)
+            except DatasetValidationError as e:
+                return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
 
             # Validate target column is numeric for regression
             try:
@@ -356,14 +318,14 @@ class PolynomialRegressionView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                X = pd.get_dummies(df.drop(columns=[target_col]), drop_first=True)
+                X, feature_names, encoder = build_feature_matrix(df, target_col, sparse_threshold=None)
             except Exception as e:
                 return Response({
                     "error": f"Error creating features: {str(e)}",
                     "code": "FEATURE_PREPARATION_ERROR"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if X.empty or X.shape[1] == 0:
+            if X.shape[0] == 0 or X.shape[1] == 0:
                 return Response({
                     "error": "No features after preprocessing.",
                     "code": "NO_FEATURES"
@@ -377,25 +339,21 @@ class PolynomialRegressionView(APIView):
                     "code": "DATA_SPLIT_ERROR"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            best_r2 = float('-inf')
-            best_degree = 0
-            best_metrics = {}
-            best_pipeline = None
-
             try:
-                for degree in range(1, 10):
-                    pipeline, metrics = self.polynomial_degree_trainer(degree, x_train, y_train, x_test, y_test)
-                    if pipeline is not None and metrics is not None:
-                        if metrics['r2_score'] > best_r2:
-                            best_r2 = metrics['r2_score']
-                            best_degree = degree
-                            best_metrics = metrics
-                            best_pipeline = pipeline
+                with core_lease("polynomial-regression", requested=1):
+                    best_degree, degree_search = search_polynomial_degree(
+                        x_train, y_train, x_test, y_test,
+                        memory_budget=settings.POLYNOMIAL_SEARCH_MEMORY_BUDGET
+                    )
+                    best_pipeline, best_metrics = None, None
+                    if best_degree is not None:
+                        best_pipeline, best_metrics = self.polynomial_degree_trainer(best_degree, x_train, y_train, x_test, y_test)
 
                 if best_pipeline is None:
                     return Response({
                         "error": "Failed to train any polynomial model.",
-                        "code": "POLYNOMIAL_TRAINING_FAILED"
+                        "code": "POLYNOMIAL_TRAINING_FAILED",
+                        "degree_search": degree_search
                     }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             except Exception as e:
@@ -407,7 +365,7 @@ class PolynomialRegressionView(APIView):
 
             try:
                 temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
-                joblib.dump(best_pipeline, temp_file.name)
+                dump_artifact(best_pipeline, temp_file.name)
                 with open(temp_file.name, 'rb') as f:
                     django_file = File(f)
                     ml_model = TrainedModel.objects.create(
@@ -415,11 +373,14 @@ class PolynomialRegressionView(APIView):
                         model_name=model_name,
                         polynomial_degree=best_degree,
                         target_column=target_col,
-                        features=",".join(X.columns),
-                        user_id=request.user.id
+                        features=",".join(feature_names),
+                        user_id=user.id,
+                        dataset=dataset,
+                        csv_file=dataset.csv_file.name
                     )
                     ml_model.model_file.save(f"{ml_model.id}_model.pkl", django_file)
-                    ml_model.csv_file.save(f"{ml_model.id}_data.csv", csv_file)
+                    save_preprocessor(ml_model, encoder)
+                    save_model_metadata(ml_model, best_pipeline)
                     ml_model.save()
                 # os.remove(temp_file.name)
             except Exception as e:
@@ -497,10 +458,11 @@ class PolynomialRegressionView(APIView):
                 "graphs": ModelGraphSerializer(ml_model.graphs.all(), many=True).data,
                 "coefficients": coefficients,
                 "intercept": intercept,
+                "degree_search": degree_search,
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            logger.error("Unexpected error in PolynomialRegressionView.post", exc_info=True)
+            logger.error("Unexpected error in PolynomialRegressionView.train", exc_info=True)
             return Response({
                 "error": "Unexpected server error occurred.",
                 "code": "UNEXPECTED_ERROR",
@@ -6,17 +6,20 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from sklearn.linear_model import Ridge
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import pandas as pd
-import joblib
 import os
 from tempfile import NamedTemporaryFile
 import numpy as np
+from scipy import sparse
 
 from trained_model.models import TrainedModel, ModelStats, ModelGraph
+from trained_model.datasets import load_training_data
+from trained_model.artifacts import dump_artifact, save_preprocessor, save_model_metadata
+from trained_model.result_cache import cached_training
 from ml_utils.graph_utils import (
     save_residual_plot,
     save_actual_vs_predicted_plot,
@@ -24,41 +27,58 @@ from ml_utils.graph_utils import (
     save_qq_plot
 )
 from ml_utils.stats_utils import calculate_regression_metrics
+from ml_utils.ingestion import DatasetValidationError
+from ml_utils.preprocessing import build_feature_matrix
+from ml_utils.ridge_path import ridge_validation_curve
+from ml_utils.cpu_scheduler import core_lease
 from trained_model.serializer import ModelStatsSerializer, ModelGraphSerializer
 
 logger = logging.getLogger(__name__)
 
+# 51 log-spaced alphas from 0.01 to 1000, ten per decade.
+RIDGE_ALPHAS = np.logspace(-2, 3, 51)
+
+def make_ridge_pipeline(x_train, alpha=1.0):
+    # Sparse one-hot matrices cannot be mean-centred without densifying them.
+    # Ridge fits its own intercept, so scaling without centring is equivalent.
+    scaler = StandardScaler(with_mean=not sparse.issparse(x_train))
+    return make_pipeline(scaler, Ridge(alpha=alpha))
+
 class RidgeRegressionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def find_best_alpha(self, x_train, y_train, cv_folds=5):
         try:
-            alphas = [0.01, 0.1, 1.0, 10.0, 100.0, 1000.0]
+            alphas = RIDGE_ALPHAS
             
-            pipeline = make_pipeline(StandardScaler(), Ridge())
-            
-            param_grid = {'ridge__alpha': alphas}
-            grid_search = GridSearchCV(
-                pipeline, 
-                param_grid, 
-                cv=cv_folds, 
-                scoring='r2',
-                n_jobs=-1
+            pipeline = make_ridge_pipeline(x_train)
+            mean_scores, std_scores = ridge_validation_curve(
+                pipeline.named_steps['standardscaler'], x_train, y_train, alphas, cv_folds=cv_folds
             )
+            best_alpha = float(alphas[int(np.argmax(mean_scores))])
+            validation_curve = [
+                {"alpha": float(alpha), "mean_r2": float(mean), "std_r2": float(std)}
+                for alpha, mean, std in zip(alphas, mean_scores, std_scores)
+            ]
             
-            grid_search.fit(x_train, y_train)
+            pipeline.set_params(ridge__alpha=best_alpha)
+            pipeline.fit(x_train, y_train)
             
-            return grid_search.best_params_['ridge__alpha'], grid_search.best_estimator_
+            return best_alpha, pipeline, validation_curve
         except Exception as e:
-            logger.warning(f"Error in grid search, using default alpha: {str(e)}")
+            logger.warning(f"Error in alpha search, using default alpha: {str(e)}")
             # Fallback to default pipeline
-            pipeline = make_pipeline(StandardScaler(), Ridge(alpha=1.0))
+            pipeline = make_ridge_pipeline(x_train, alpha=1.0)
             pipeline.fit(x_train, y_train)
-            return 1.0, pipeline
+            return 1.0, pipeline, None
 
     def post(self, request):
+        return self.train(request.data, request.FILES.get('csv_file'), request.user)
+
+    @cached_training(TrainedModel.ModelType.RIDGE_REGRESSION)
+    def train(self, data, csv_file, user):
+        """Train and save a model; shared by the HTTP endpoint and background training jobs."""
         try:
-            data = request.data
             model_name = data.get('model_name', 'Ridge Regression')
             target_col = data.get('target_col')
             custom_alpha = data.get('alpha') 
@@ -69,14 +89,12 @@ class RidgeRegressionView(APIView):
                     "code": "MISSING_TARGET_COLUMN"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if 'csv_file' not in request.FILES:
+            if csv_file is None:
                 return Response({
                     "error": "CSV file is required.",
                     "code": "MISSING_CSV_FILE"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            csv_file = request.FILES['csv_file']
-
             if not csv_file.name.lower().endswith('.csv'):
                 return Response({
                     "error": "File must be a CSV.",
@@ -84,48 +102,9 @@ class RidgeRegressionView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                df = pd.read_csv(csv_file)
-            except pd.errors.EmptyDataError:
-                return Response({
-                    "error": "CSV file is empty.",
-                    "code": "EMPTY_CSV_FILE"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except pd.errors.ParserError as e:
-                return Response({
-                    "error": f"CSV parse error: {str(e)}",
-                    "code": "CSV_PARSE_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                return Response({
-                    "error": f"Error reading CSV: {str(e)}",
-                    "code": "CSV_READ_ERROR"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.empty:
-                return Response({
-                    "error": "CSV contains no data.",
-                    "code": "EMPTY_DATASET"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if target_col not in df.columns:
-                return Response({
-                    "error": f"Target column '{target_col}' not found.",
-                    "code": "TARGET_COLUMN_NOT_FOUND",
-                    "available_columns": list(df.columns)
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            if df.isnull().sum().sum() > 50:
-                return Response({
-                    "error": "Dataset has too many null values.",
-                    "code": "TOO_MANY_NULLS"
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            df = df.dropna()
-            if df.empty or len(df) < 5:
-                return Response({
-                    "error": "Insufficient data after cleaning.",
-                    "code": "INSUFFICIENT_DATA"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                dataset, df = load_training_data(csv_file, target_col)
+            except DatasetValidationError as e:
+                return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
 
             try:
                 y = pd.to_numeric(df[target_col], errors='coerce')
@@ -141,14 +120,14 @@ class RidgeRegressionView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                X = pd.get_dummies(df.drop(columns=[target_col]), drop_first=True)
+                X, feature_names, encoder = build_feature_matrix(df, target_col)
             except Exception as e:
                 return Response({
                     "error": f"Error creating features: {str(e)}",
                     "code": "FEATURE_PREPARATION_ERROR"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            if X.empty or X.shape[1] == 0:
+            if X.shape[0] == 0 or X.shape[1] == 0:
                 return Response({
                     "error": "No features after preprocessing.",
                     "code": "NO_FEATURES"
@@ -172,16 +151,19 @@ class RidgeRegressionView(APIView):
                                 "code": "INVALID_ALPHA_VALUE"
                             }, status=status.HTTP_400_BAD_REQUEST)
                         
-                        model_pipeline = make_pipeline(StandardScaler(), Ridge(alpha=alpha_value))
-                        model_pipeline.fit(x_train, y_train)
+                        model_pipeline = make_ridge_pipeline(x_train, alpha=alpha_value)
+                        with core_lease("ridge-regression", requested=1):
+                            model_pipeline.fit(x_train, y_train)
                         best_alpha = alpha_value
+                        validation_curve = None
                     except ValueError:
                         return Response({
                             "error": "Alpha must be a valid number.",
                             "code": "INVALID_ALPHA_FORMAT"
                         }, status=status.HTTP_400_BAD_REQUEST)
                 else:
-                    best_alpha, model_pipeline = self.find_best_alpha(x_train, y_train)
+                    with core_lease("ridge-regression", requested=1):
+                        best_alpha, model_pipeline, validation_curve = self.find_best_alpha(x_train, y_train)
                 
                 y_pred = model_pipeline.predict(x_test)
                 
@@ -207,19 +189,22 @@ class RidgeRegressionView(APIView):
 
             try:
                 temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
-                joblib.dump(model_pipeline, temp_file.name)
+                dump_artifact(model_pipeline, temp_file.name)
                 with open(temp_file.name, 'rb') as f:
                     django_file = File(f)
                     ml_model = TrainedModel.objects.create(
                         model_type=TrainedModel.ModelType.RIDGE_REGRESSION,
                         model_name=model_name,
                         target_column=target_col,
-                        features=",".join(X.columns),
-                        user_id=request.user.id,
+                        features=",".join(feature_names),
+                        user_id=user.id,
+                        dataset=dataset,
+                        csv_file=dataset.csv_file.name,
                         # alpha_value=best_alpha if hasattr(TrainedModel, 'alpha_value') else None
                     )
                     ml_model.model_file.save(f"{ml_model.id}_model.pkl", django_file)
-                    ml_model.csv_file.save(f"{ml_model.id}_data.csv", csv_file)
+                    save_preprocessor(ml_model, encoder)
+                    save_model_metadata(ml_model, model_pipeline)
                     ml_model.save()
                 
             except Exception as e:
@@ -296,10 +281,11 @@ class RidgeRegressionView(APIView):
                 "graphs": ModelGraphSerializer(ml_model.graphs.all(), many=True).data,
                 "coefficients": coefficients,
                 "intercept": intercept,
+                "validation_curve": validation_curve,
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            logger.error("Unexpected error in RidgeRegressionView.post", exc_info=True)
+            logger.error("Unexpected error in RidgeRegressionView.train", exc_info=True)
             return Response({
                 "error": "Unexpected server error occurred.",
                 "code": "UNEXPECTED_ERROR",
@@ -1,7 +1,12 @@
 from django.contrib import admin
-from .models import TrainedModel, ModelStats, ModelGraph
+from .models import Dataset, TrainedModel, ModelStats, ModelGraph, TrainingJob, TrainingResult, ModelMetadata, ModelLike
 
 # Register your models here.
 admin.site.register(TrainedModel)
 admin.site.register(ModelStats)
-admin.site.register(ModelGraph)
\ No newline at end of file
+admin.site.register(ModelGraph)
+admin.site.register(Dataset)
+admin.site.register(TrainingJob)
+admin.site.register(TrainingResult)
+admin.site.register(ModelMetadata)
+admin.site.register(ModelLike)
\ No newline at end of file
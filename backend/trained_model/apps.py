@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class TrainedModelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trained_model'
+
+    def ready(self):
+        from django.conf import settings
+        from ml_utils.cpu_scheduler import process_share, scheduler
+        from ml_utils.micro_batching import prediction_batcher
+        from ml_utils.model_cache import model_cache
+        from . import signals  # noqa: F401 - connects the model receivers
+
+        scheduler.configure(
+            process_share(settings.TRAINING_CPU_CORES, settings.TRAINING_SERVER_PROCESSES),
+            settings.TRAINING_MAX_CORES_PER_JOB,
+        )
+        model_cache.configure(settings.MODEL_CACHE_MAX_BYTES)
+        prediction_batcher.configure(
+            settings.PREDICTION_BATCH_MAX_WAIT_MS / 1000,
+            settings.PREDICTION_BATCH_MAX_ROWS,
+        )
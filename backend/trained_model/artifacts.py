@@ -0,0 +1,90 @@
+import copy
+import os
+from tempfile import NamedTemporaryFile
+
+import joblib
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from ml_utils.model_cache import model_cache
+from ml_utils.model_metadata import extract_model_metadata
+from .models import TrainedModel, ModelGraph, ModelMetadata, TrainingResult
+
+
+def dump_artifact(value, path):
+    """
+    Pickle ``value`` uncompressed, so its numpy arrays can be memory-mapped by
+    ``load_artifact`` and share page-cache pages across worker processes.
+    """
+    joblib.dump(value, path, compress=0)
+
+
+def load_artifact(path):
+    """Unpickle an artifact, mapping its numpy arrays read-only when ``MODEL_ARTIFACT_MMAP_MODE`` is set."""
+    return joblib.load(path, mmap_mode=settings.MODEL_ARTIFACT_MMAP_MODE)
+
+
+def save_preprocessor(ml_model, encoder, label_classes=None):
+    """
+    Persist the fitted feature encoder next to the model artifact, with the
+    original target labels when a classifier was trained on encoded ones.
+    """
+    if label_classes is not None:
+        encoder = copy.copy(encoder)
+        encoder.label_classes = list(label_classes)
+    temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
+    temp_file.close()
+    try:
+        dump_artifact(encoder, temp_file.name)
+        with open(temp_file.name, 'rb') as f:
+            ml_model.preprocessor_file.save(f"{ml_model.id}_preprocessor.pkl", File(f), save=False)
+    finally:
+        os.remove(temp_file.name)
+
+
+def save_model_metadata(ml_model, model):
+    """Record the fitted model's coefficients, importances and hyperparameters."""
+    ModelMetadata.objects.update_or_create(
+        trained_model=ml_model,
+        defaults=extract_model_metadata(model),
+    )
+
+
+def load_preprocessor(ml_model):
+    """Return the model's fitted feature encoder, or None for models trained before it was stored."""
+    if not ml_model.preprocessor_file:
+        return None
+    path = ml_model.preprocessor_file.path
+    if not os.path.exists(path):
+        return None
+    return model_cache.load(ml_model.id, path, loader=load_artifact)
+
+
+def is_artifact_referenced(name):
+    """Whether any model, graph or cached training result still uses the stored file ``name``."""
+    return (
+        TrainedModel.objects.filter(Q(model_file=name) | Q(preprocessor_file=name)).exists()
+        or ModelGraph.objects.filter(graph_image=name).exists()
+        or TrainingResult.objects.filter(Q(model_file=name) | Q(preprocessor_file=name)).exists()
+    )
+
+
+def discard_models(model_ids):
+    """
+    Delete models left behind by a failed training, along with the stored
+    model, preprocessor and graph files that nothing else uses.
+    """
+    for ml_model in TrainedModel.objects.filter(id__in=model_ids).prefetch_related('graphs'):
+        names = [ml_model.model_file.name, ml_model.preprocessor_file.name]
+        names += [graph.graph_image.name for graph in ml_model.graphs.all()]
+        ml_model.delete()
+        for name in names:
+            if name and not is_artifact_referenced(name):
+                default_storage.delete(name)
+
+
+def load_model(ml_model):
+    """Return the model's fitted estimator, unpickled once per process while its file is unchanged."""
+    return model_cache.load(ml_model.id, ml_model.model_file.path, loader=load_artifact)
@@ -0,0 +1,124 @@
+import logging
+import os
+
+from django.conf import settings
+from django.db import IntegrityError
+
+from ml_utils.dataset_store import hash_file, write_columns, read_columns
+from ml_utils.ingestion import ingest_csv, DatasetValidationError
+from .models import Dataset
+
+logger = logging.getLogger(__name__)
+
+DATASET_DIR = 'datasets'
+
+
+def _columns_dir(dataset):
+    return os.path.join(settings.MEDIA_ROOT, dataset.columns_path)
+
+
+def _validate_cached(dataset, df, target_col, min_rows):
+    if target_col is not None and target_col not in df.columns:
+        raise DatasetValidationError(
+            f"Target column '{target_col}' not found.",
+            "TARGET_COLUMN_NOT_FOUND",
+            available_columns=list(df.columns),
+        )
+    if dataset.raw_row_count < min_rows:
+        raise DatasetValidationError(
+            f"Dataset must contain at least {min_rows} rows for meaningful analysis.",
+            "INSUFFICIENT_DATA",
+        )
+
+
+def _has_columns(dataset):
+    return bool(dataset.columns_path) and os.path.exists(_columns_dir(dataset))
+
+
+def _write_dataset_columns(digest, df):
+    columns_path = os.path.join(DATASET_DIR, digest)
+    write_columns(df, os.path.join(settings.MEDIA_ROOT, columns_path))
+    return columns_path
+
+
+def _save_new_dataset(dataset, csv_file):
+    dataset.csv_file.save(f"{dataset.sha256}.csv", csv_file, save=False)
+    csv_file.seek(0)
+    try:
+        dataset.save()
+    except IntegrityError:
+        # The same file was stored by a concurrent upload.
+        dataset.csv_file.delete(save=False)
+        dataset = Dataset.objects.get(sha256=dataset.sha256)
+    return dataset
+
+
+def upload_digest(csv_file):
+    """
+    SHA-256 of an upload's bytes. The digest is kept on the upload, so the
+    result cache and the dataset store hash each request's file once.
+    """
+    digest = getattr(csv_file, 'sha256', None)
+    if digest is None:
+        digest = hash_file(csv_file)
+        csv_file.sha256 = digest
+    return digest
+
+
+def store_dataset(digest, csv_file, df, raw_rows):
+    dataset = Dataset(
+        sha256=digest,
+        columns_path=_write_dataset_columns(digest, df),
+        row_count=len(df),
+        raw_row_count=raw_rows,
+    )
+    return _save_new_dataset(dataset, csv_file)
+
+
+def store_streamed_dataset(csv_file, row_count, raw_row_count):
+    """
+    Return the ``Dataset`` for an upload that was trained on by streaming.
+
+    Only the CSV is stored; its columns are written the first time
+    ``load_training_data`` needs the file in memory.
+    """
+    digest = upload_digest(csv_file)
+    dataset = Dataset.objects.filter(sha256=digest).first()
+    if dataset is not None:
+        return dataset
+    return _save_new_dataset(Dataset(
+        sha256=digest,
+        columns_path='',
+        row_count=row_count,
+        raw_row_count=raw_row_count,
+    ), csv_file)
+
+
+def load_training_data(csv_file, target_col, min_rows=0):
+    """
+    Return the stored ``Dataset`` for an upload and its cleaned frame.
+
+    Uploads are keyed by the SHA-256 of their bytes. The first upload of a
+    file is parsed and validated by ``ingest_csv`` and its cleaned columns are
+    written once to the columnar store; later uploads of the same bytes, for
+    any model type, load the typed columns directly and skip CSV parsing.
+    """
+    digest = upload_digest(csv_file)
+    dataset = Dataset.objects.filter(sha256=digest).first()
+
+    if dataset is not None and _has_columns(dataset):
+        df = read_columns(_columns_dir(dataset))
+        _validate_cached(dataset, df, target_col, min_rows)
+        return dataset, df
+
+    df, raw_rows = ingest_csv(csv_file, target_col, min_rows=min_rows)
+    if dataset is None:
+        return store_dataset(digest, csv_file, df, raw_rows), df
+
+    if dataset.columns_path:
+        logger.warning(f"Columns for dataset {digest} are missing, re-ingesting")
+    dataset.columns_path = _write_dataset_columns(digest, df)
+    dataset.row_count = len(df)
+    dataset.raw_row_count = raw_rows
+    dataset.save(update_fields=['columns_path', 'row_count', 'raw_row_count'])
+    return dataset, df
@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import TrainingJob
+from .registry import run_training, normalize_endpoint
+from ml_utils.cpu_scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+# Request fields that are forwarded to the training view as ``data``.
+JOB_PARAM_EXCLUDE = {'endpoint', 'csv_file'}
+
+
+def submit_job(user, endpoint, params, csv_file):
+    """Store the upload and queue a training job; returns the pending job."""
+    job = TrainingJob(user=user, endpoint=normalize_endpoint(endpoint), params=params)
+    job.csv_file.save(f"{job.id}.csv", csv_file, save=False)
+    job.save()
+    return job
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest pending job to RUNNING and return it.
+    The conditional UPDATE makes the claim safe across worker processes
+    without any broker: only one worker can flip a given job out of PENDING.
+    """
+    while True:
+        job_id = (
+            TrainingJob.objects
+            .filter(status=TrainingJob.Status.PENDING)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        claimed = TrainingJob.objects.filter(
+            id=job_id, status=TrainingJob.Status.PENDING
+        ).update(status=TrainingJob.Status.RUNNING, started_at=timezone.now())
+
+        if claimed:
+            return TrainingJob.objects.select_related('user').get(id=job_id)
+
+
+def run_job(job):
+    """Run a claimed job through its training view and record the outcome."""
+    try:
+        with job.csv_file.open('rb') as f:
+            upload = File(f, name=os.path.basename(job.csv_file.name))
+            response = run_training(job.endpoint, job.params, upload, job.user)
+
+        job.status_code = response.status_code
+        job.result = json.loads(JSONRenderer().render(response.data))
+
+        if response.status_code == 200:
+            job.status = TrainingJob.Status.SUCCEEDED
+            job.trained_model_id = job.result.get('model', {}).get('id')
+        else:
+            job.status = TrainingJob.Status.FAILED
+            job.error = job.result.get('error') or job.result.get('message')
+    except Exception as e:
+        logger.exception(f"Training job {job.id} crashed")
+        job.status = TrainingJob.Status.FAILED
+        job.status_code = 500
+        job.error = str(e)
+    finally:
+        job.finished_at = timezone.now()
+        if job.csv_file:
+            job.csv_file.delete(save=False)
+        job.save()
+
+    logger.info(f"Training job {job.id} finished with status {job.status}")
+    return job
+
+
+def requeue_running_jobs():
+    """Return jobs left RUNNING by workers that died back to the queue."""
+    return TrainingJob.objects.filter(status=TrainingJob.Status.RUNNING).update(
+        status=TrainingJob.Status.PENDING, started_at=None
+    )
+
+
+def work(poll_interval=None, burst=False, cpu_cores=None):
+    """
+    Worker loop: claim and run jobs until stopped.
+    With ``burst`` the worker exits as soon as the queue is empty.
+    ``cpu_cores`` sets this process's share of the training CPU budget.
+    """
+    if poll_interval is None:
+        poll_interval = settings.TRAINING_JOB_POLL_INTERVAL
+    if cpu_cores is not None:
+        scheduler.configure(cpu_cores, settings.TRAINING_MAX_CORES_PER_JOB)
+
+    while True:
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            if burst:
+                return
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
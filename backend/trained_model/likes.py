@@ -0,0 +1,69 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import TrainedModel, ModelLike
+
+
+def _add_like(user, trained_model_id):
+    try:
+        with transaction.atomic():
+            ModelLike.objects.create(user=user, trained_model_id=trained_model_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _remove_like(user, trained_model_id):
+    deleted, _ = ModelLike.objects.filter(user=user, trained_model_id=trained_model_id).delete()
+    return deleted > 0
+
+
+def _count_change(trained_model_id, changed, delta):
+    # Moves the counter only when the like row changed; raises for an unknown model.
+    if changed:
+        found = TrainedModel.objects.filter(pk=trained_model_id).update(likes=F('likes') + delta)
+    else:
+        found = TrainedModel.objects.filter(pk=trained_model_id).exists()
+    if not found:
+        raise TrainedModel.DoesNotExist()
+
+
+def set_like(user, trained_model_id, liked):
+    """
+    Make ``user`` like (``liked=True``) or stop liking a model, and keep
+    ``TrainedModel.likes`` in step. Idempotent: repeating a request changes
+    nothing, and concurrent ones never lose or double-count a like.
+
+    The insert or delete of the ``ModelLike`` row comes first, so the
+    transaction takes the write lock before it reads anything, and the
+    counter follows that statement's row count.
+
+    Returns whether anything changed. Raises ``TrainedModel.DoesNotExist`` for
+    an unknown model.
+    """
+    with transaction.atomic():
+        if liked:
+            changed = _add_like(user, trained_model_id)
+        else:
+            changed = _remove_like(user, trained_model_id)
+        _count_change(trained_model_id, changed, 1 if liked else -1)
+    return changed
+
+
+def toggle_like(user, trained_model_id):
+    """Flip ``user``'s like of a model. Returns ``'like'`` or ``'dislike'``, the state applied."""
+    with transaction.atomic():
+        if _remove_like(user, trained_model_id):
+            _count_change(trained_model_id, True, -1)
+            return 'dislike'
+        # Nothing to remove, so this request likes the model.
+        _count_change(trained_model_id, _add_like(user, trained_model_id), 1)
+        return 'like'
+
+
+def liked_model_ids(user):
+    """Ids, as strings, of the models ``user`` likes, most recently liked first."""
+    return [
+        str(pk) for pk in
+        ModelLike.objects.filter(user=user).order_by('-created_at').values_list('trained_model_id', flat=True)
+    ]
@@ -0,0 +1,26 @@
+import os
+
+import joblib
+from django.core.management.base import BaseCommand
+
+from trained_model.artifacts import save_model_metadata
+from trained_model.models import TrainedModel
+
+
+class Command(BaseCommand):
+    help = "Record coefficients and hyperparameters for models trained before they were stored with the model."
+
+    def handle(self, *args, **options):
+        missing = TrainedModel.objects.filter(metadata__isnull=True).exclude(model_file='')
+        saved = 0
+        for ml_model in missing.iterator():
+            path = ml_model.model_file.path
+            if not os.path.exists(path):
+                self.stderr.write(f"Model file not found for {ml_model.id}: {path}")
+                continue
+            try:
+                save_model_metadata(ml_model, joblib.load(path))
+                saved += 1
+            except Exception as e:
+                self.stderr.write(f"Could not read model {ml_model.id}: {str(e)}")
+        self.stdout.write(f"Stored metadata for {saved} model(s).")
@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from trained_model.models import TrainedModel
+from trained_model.pagination import ModelCursorPagination
+
+BENCHMARK_EMAIL = 'gallery-benchmark@example.com'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the database with synthetic trained models and time public gallery pages "
+        "at increasing depths, failing if deep pages get slower than the first. "
+        "Run it against a scratch database: seeded models show up in the gallery."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Models to seed (rows already seeded are reused).")
+        parser.add_argument('--samples', type=int, default=20, help="Requests timed per page.")
+        parser.add_argument('--page-size', type=int, default=ModelCursorPagination.page_size)
+        parser.add_argument(
+            '--max-ratio', type=float, default=3.0,
+            help="Largest allowed ratio of a deep page's median latency to the first page's.",
+        )
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--delete', action='store_true', help="Delete the seeded models and exit.")
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(email=BENCHMARK_EMAIL)
+        seeded = TrainedModel.objects.filter(user=user)
+
+        if options['delete']:
+            deleted = 0
+            while ids := list(seeded.values_list('pk', flat=True)[:options['batch_size']]):
+                TrainedModel.objects.filter(pk__in=ids).delete()
+                deleted += len(ids)
+            user.delete()
+            self.stdout.write(f"Deleted {deleted} seeded model(s).")
+            return
+
+        self.seed(user, options['rows'] - seeded.count(), options['batch_size'])
+
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(user)
+        public = TrainedModel.objects.filter(is_public=True)
+        total = public.count()
+        depths = sorted({0, total // 100, total // 2, max(total - options['page_size'], 0)})
+        self.stdout.write(f"{total} public models, {options['samples']} requests per page")
+
+        slow_pages = []
+        for ordering in ModelCursorPagination.orderings:
+            field = ModelCursorPagination.orderings[ordering]
+            ordered = public.order_by(f'-{field}', '-pk')
+            first_page = None
+            for depth in depths:
+                url = f"/api/v1/trained-model/?ordering={ordering}&page_size={options['page_size']}"
+                if depth:
+                    # Untimed: the cursor a client would hold after scrolling `depth` rows.
+                    cursor = ModelCursorPagination().encode_cursor(ordered[depth - 1], field)
+                    url += f"&cursor={cursor}"
+                median = self.time_page(client, url, options['samples'])
+                first_page = first_page or median
+                self.stdout.write(f"  ordering={ordering:<10} depth={depth:>9}  median {median:7.2f} ms")
+                if median > first_page * options['max_ratio']:
+                    slow_pages.append(f"ordering={ordering} depth={depth}")
+
+            plan_cursor = ordered[max(depths) - 1] if max(depths) else None
+            if plan_cursor is not None:
+                value = getattr(plan_cursor, field)
+                plan = ordered.filter(**{f'{field}__lt': value})[:options['page_size']].explain()
+                self.stdout.write(f"  plan past the cursor: {plan}")
+
+        if slow_pages:
+            raise CommandError(
+                f"Page latency grew more than {options['max_ratio']}x with depth: {', '.join(slow_pages)}"
+            )
+        self.stdout.write(self.style.SUCCESS("Gallery page latency stays flat with depth."))
+
+    def seed(self, user, count, batch_size):
+        if count <= 0:
+            return
+        self.stdout.write(f"Seeding {count} models...")
+        rng = random.Random(0)
+        now = timezone.now()
+        model_types = TrainedModel.ModelType.values
+        created_at = TrainedModel._meta.get_field('created_at')
+
+        # Spread creation times over two years; bulk_create would stamp every row with now.
+        created_at.auto_now_add = False
+        try:
+            for start in range(0, count, batch_size):
+                TrainedModel.objects.bulk_create([
+                    TrainedModel(
+                        user=user,
+                        model_type=rng.choice(model_types),
+                        model_name=f"benchmark {start + i}",
+                        target_column='target',
+                        features='x1,x2,x3',
+                        is_public=rng.random() < 0.5,
+                        # Most models are never liked, so likes carry long runs of ties.
+                        likes=0 if rng.random() < 0.8 else int(rng.paretovariate(1.2)),
+                        created_at=now - timedelta(seconds=rng.uniform(0, 2 * 365 * 24 * 3600)),
+                    )
+                    for i in range(min(batch_size, count - start))
+                ], batch_size=batch_size)
+        finally:
+            created_at.auto_now_add = True
+
+    def time_page(self, client, url, samples):
+        # The first request of a process pays for imports and URL resolution.
+        client.get(url)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}: {response.content[:200]}")
+        return statistics.median(timings)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from trained_model.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the model search index from scratch, e.g. after rows were bulk-loaded without save signals."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(f"Rebuilt the search index with {type(backend).__name__}.")
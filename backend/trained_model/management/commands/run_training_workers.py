@@ -0,0 +1,55 @@
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ml_utils.cpu_scheduler import process_share
+from trained_model.jobs import requeue_running_jobs, work
+
+
+class Command(BaseCommand):
+    help = "Run a pool of local worker processes that execute queued training jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.TRAINING_WORKERS)
+        parser.add_argument('--poll-interval', type=float, default=settings.TRAINING_JOB_POLL_INTERVAL)
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty.")
+        parser.add_argument(
+            '--requeue-running', action='store_true',
+            help="Put jobs left running by a previous worker pool back in the queue.",
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_running']:
+            count = requeue_running_jobs()
+            self.stdout.write(f"Requeued {count} running job(s).")
+
+        # Worker processes must open their own database connections.
+        connections.close_all()
+
+        workers = max(1, options['workers'])
+        # Split the CPU budget so the pool as a whole never oversubscribes it.
+        cpu_cores = process_share(settings.TRAINING_CPU_CORES, workers)
+
+        processes = [
+            multiprocessing.Process(
+                target=work,
+                kwargs={
+                    'poll_interval': options['poll_interval'],
+                    'burst': options['burst'],
+                    'cpu_cores': cpu_cores,
+                },
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} training worker(s) with {cpu_cores} core(s) each.")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0002_remove_trainedmodel_user_id_trainedmodel_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('csv_file', models.FileField(upload_to='datasets/')),
+                ('columns_path', models.CharField(max_length=255)),
+                ('row_count', models.IntegerField()),
+                ('raw_row_count', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='trainedmodel',
+            name='dataset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trained_models', to='trained_model.dataset'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0003_dataset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainedmodel',
+            name='preprocessor_file',
+            field=models.FileField(blank=True, null=True, upload_to='preprocessors/'),
+        ),
+    ]
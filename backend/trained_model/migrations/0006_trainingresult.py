@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0005_trainingjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model_type', models.CharField(choices=[('LinearRegression', 'Linear Regression'), ('PolynomialRegression', 'Polynomial Regression'), ('DecisionTree', 'Decision Tree'), ('KNN', 'K-Nearest Neighbors'), ('RandomForest', 'Random Forest'), ('RidgeRegression', 'Ridge Regression')], max_length=50)),
+                ('target_column', models.CharField(max_length=100)),
+                ('parameters', models.JSONField(default=dict)),
+                ('code_version', models.CharField(max_length=50)),
+                ('model_name', models.CharField(max_length=100)),
+                ('polynomial_degree', models.IntegerField(blank=True, null=True)),
+                ('features', models.TextField(blank=True, null=True)),
+                ('model_file', models.FileField(upload_to='models/')),
+                ('preprocessor_file', models.FileField(blank=True, null=True, upload_to='preprocessors/')),
+                ('metrics', models.JSONField(default=dict)),
+                ('graphs', models.JSONField(default=list)),
+                ('response', models.JSONField(default=dict)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('hits', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_results', to='trained_model.dataset')),
+            ],
+        ),
+    ]
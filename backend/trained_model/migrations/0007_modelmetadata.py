@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0006_trainingresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingresult',
+            name='model_metadata',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.CreateModel(
+            name='ModelMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coefficients', models.JSONField(blank=True, null=True)),
+                ('intercept', models.JSONField(blank=True, null=True)),
+                ('feature_importances', models.JSONField(blank=True, null=True)),
+                ('hyperparameters', models.JSONField(default=dict)),
+                ('trained_model', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metadata', to='trained_model.trainedmodel')),
+            ],
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:58
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _valid_ids(values):
+    ids = set()
+    for value in values or []:
+        try:
+            ids.add(uuid.UUID(str(value)))
+        except ValueError:
+            pass
+    return ids
+
+
+def copy_liked_models(apps, schema_editor):
+    """Turn each user's liked_models list into like rows, then recount TrainedModel.likes from them."""
+    User = apps.get_model('accounts', 'User')
+    TrainedModel = apps.get_model('trained_model', 'TrainedModel')
+    ModelLike = apps.get_model('trained_model', 'ModelLike')
+
+    for user in User.objects.only('id', 'liked_models').iterator():
+        ids = _valid_ids(user.liked_models)
+        if not ids:
+            continue
+        ModelLike.objects.bulk_create(
+            [
+                ModelLike(user_id=user.id, trained_model_id=pk)
+                for pk in TrainedModel.objects.filter(id__in=ids).values_list('id', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+    counts = (
+        ModelLike.objects.filter(trained_model=OuterRef('pk'))
+        .order_by()
+        .values('trained_model')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    TrainedModel.objects.update(likes=Coalesce(Subquery(counts), 0))
+
+
+def restore_liked_models(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    ModelLike = apps.get_model('trained_model', 'ModelLike')
+
+    liked = {}
+    for user_id, model_id in ModelLike.objects.order_by('created_at').values_list('user_id', 'trained_model_id'):
+        liked.setdefault(user_id, []).append(str(model_id))
+    for user_id, model_ids in liked.items():
+        User.objects.filter(id=user_id).update(liked_models=model_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0007_modelmetadata'),
+        ('accounts', '0002_user_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('trained_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='model_likes', to='trained_model.trainedmodel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='model_likes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'trained_model'), name='unique_model_like')],
+            },
+        ),
+        migrations.RunPython(copy_liked_models, restore_liked_models),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0008_modellike'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainedmodel',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['created_at', 'id'], name='public_model_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainedmodel',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['likes', 'id'], name='public_model_likes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainedmodel',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='user_model_created_idx'),
+        ),
+    ]
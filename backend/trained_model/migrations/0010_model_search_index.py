@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Create and fill the FTS5 table behind SQLiteFTS5Backend. Other databases use DatabaseSearchBackend."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    TrainedModel = apps.get_model('trained_model', 'TrainedModel')
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS trained_model_search USING fts5("
+        "model_id UNINDEXED, model_name, target_column, features, tokenize = 'unicode61')"
+    )
+    for trained_model in TrainedModel.objects.filter(is_public=True).iterator():
+        schema_editor.execute(
+            "INSERT INTO trained_model_search (rowid, model_id, model_name, target_column, features) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [
+                trained_model.pk.int >> 65,
+                trained_model.pk.hex,
+                trained_model.model_name,
+                trained_model.target_column,
+                (trained_model.features or '').replace(',', ' '),
+            ],
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS trained_model_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trained_model', '0009_trainedmodel_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
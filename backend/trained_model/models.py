@@ -3,6 +3,17 @@ import uuid
 from accounts.models import User
 
 # Create your models here.
+class Dataset(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    csv_file = models.FileField(upload_to='datasets/')
+    columns_path = models.CharField(max_length=255)
+    row_count = models.IntegerField()
+    raw_row_count = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Dataset {self.sha256[:12]} | Rows: {self.row_count}"
+
 class TrainedModel(models.Model):
     class ModelType(models.TextChoices):
         LINEAR_REGRESSION = 'LinearRegression', 'Linear Regression'
@@ -27,11 +38,25 @@ class TrainedModel(models.Model):
     target_column = models.CharField(max_length=100)
     features = models.TextField(null=True, blank=True)
     model_file = models.FileField(upload_to='models/', null=True, blank=True)
+    preprocessor_file = models.FileField(upload_to='preprocessors/', null=True, blank=True)
     csv_file = models.FileField(upload_to='data/', null=True, blank=True)
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='trained_models')
     created_at = models.DateTimeField(auto_now_add=True)
     is_public = models.BooleanField(default=False)
     likes = models.IntegerField(default=0)
 
+    class Meta:
+        # Listings page on (value, id) keysets; the trailing id lets an index
+        # serve the tie-break too, so deep pages never sort or rescan rows.
+        # The gallery's is_public filter compiles to a bare boolean test, which
+        # SQLite matches against a partial index's condition but cannot seek
+        # as a leading index column, so the public indexes are partial.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_public=True), name='public_model_created_idx'),
+            models.Index(fields=['likes', 'id'], condition=models.Q(is_public=True), name='public_model_likes_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='user_model_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.model_type} | Target: {self.target_column}"
     
@@ -60,4 +85,87 @@ class ModelGraph(models.Model):
     graph_json = models.TextField(null=True, blank=True)
 
     def __str__(self):
-        return f"Graph: {self.title} for {self.trained_model.model_name}"
\ No newline at end of file
+        return f"Graph: {self.title} for {self.trained_model.model_name}"
+
+class ModelMetadata(models.Model):
+    """Fitted attributes read from the estimator when training finishes, so they can be served without the artifact."""
+    trained_model = models.OneToOneField(TrainedModel, on_delete=models.CASCADE, related_name='metadata')
+    coefficients = models.JSONField(null=True, blank=True)
+    intercept = models.JSONField(null=True, blank=True)
+    feature_importances = models.JSONField(null=True, blank=True)
+    hyperparameters = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Metadata for {self.trained_model.model_name}"
+
+class ModelLike(models.Model):
+    """A user's like of a model; ``TrainedModel.likes`` counts these rows."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='model_likes')
+    trained_model = models.ForeignKey(TrainedModel, on_delete=models.CASCADE, related_name='model_likes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'trained_model'], name='unique_model_like'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} likes {self.trained_model.model_name}"
+
+class TrainingJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='training_jobs')
+    endpoint = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    csv_file = models.FileField(upload_to='jobs/', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    status_code = models.IntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    trained_model = models.ForeignKey(TrainedModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} | {self.endpoint} | {self.status}"
+
+class TrainingResult(models.Model):
+    """A finished training, reusable for later requests with the same dataset and configuration."""
+    key = models.CharField(max_length=64, unique=True)
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='training_results')
+    model_type = models.CharField(max_length=50, choices=TrainedModel.ModelType.choices)
+    target_column = models.CharField(max_length=100)
+    parameters = models.JSONField(default=dict)
+    code_version = models.CharField(max_length=50)
+    model_name = models.CharField(max_length=100)
+    polynomial_degree = models.IntegerField(null=True, blank=True)
+    features = models.TextField(null=True, blank=True)
+    model_file = models.FileField(upload_to='models/')
+    preprocessor_file = models.FileField(upload_to='preprocessors/', null=True, blank=True)
+    metrics = models.JSONField(default=dict)
+    graphs = models.JSONField(default=list)
+    response = models.JSONField(default=dict)
+    model_metadata = models.JSONField(default=dict)
+    size_bytes = models.BigIntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Result {self.key[:12]} | {self.model_type} | Target: {self.target_column}"
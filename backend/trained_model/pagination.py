@@ -0,0 +1,111 @@
+import base64
+import json
+import uuid
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidPage(ValueError):
+    """Raised for a malformed cursor, ordering, direction or page size."""
+
+
+class ModelCursorPagination:
+    """
+    Keyset pagination for model listings.
+
+    Pages are ordered by ``ordering`` (``created_at`` or ``likes``) in
+    ``direction`` (``desc``, the default, or ``asc``) with the id as
+    tie-breaker, and ``cursor`` carries the last row's ``(value, id)``.
+
+    A page after a cursor is read as two index range seeks: the rest of the
+    cursor's run of equal values, then the values past it. With the
+    ``(value, id)`` listing indexes on ``TrainedModel`` neither scans rows
+    already served, so a page costs the same however deep the client has
+    scrolled, and rows sharing a value are never skipped.
+    """
+
+    page_size = 24
+    max_page_size = 100
+    orderings = {
+        'created_at': 'created_at',
+        'likes': 'likes',
+    }
+    default_ordering = 'created_at'
+    directions = ('desc', 'asc')
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get('ordering', self.default_ordering)
+        if ordering not in self.orderings:
+            raise InvalidPage(f"'ordering' must be one of: {', '.join(self.orderings)}.")
+        return ordering
+
+    def get_descending(self, request):
+        direction = request.query_params.get('direction', self.directions[0])
+        if direction not in self.directions:
+            raise InvalidPage(f"'direction' must be one of: {', '.join(self.directions)}.")
+        return direction == 'desc'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get('page_size', self.page_size))
+        except ValueError:
+            raise InvalidPage("'page_size' must be an integer.")
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, cursor, field):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise InvalidPage("Invalid cursor.")
+        if field == 'created_at':
+            value = parse_datetime(value) if isinstance(value, str) else None
+            if value is None:
+                raise InvalidPage("Invalid cursor.")
+        elif not isinstance(value, int):
+            raise InvalidPage("Invalid cursor.")
+        try:
+            pk = uuid.UUID(pk)
+        except (ValueError, TypeError, AttributeError):
+            raise InvalidPage("Invalid cursor.")
+        return value, pk
+
+    def encode_cursor(self, obj, field):
+        value = getattr(obj, field)
+        if field == 'created_at':
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, str(obj.pk)]).encode()).decode()
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return ``(rows, next_url)`` for the page the request asks for;
+        ``next_url`` is None on the last page. Raises ``InvalidPage`` for bad
+        query parameters.
+        """
+        field = self.orderings[self.get_ordering(request)]
+        descending = self.get_descending(request)
+        page_size = self.get_page_size(request)
+
+        prefix = '-' if descending else ''
+        past = 'lt' if descending else 'gt'
+        queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}pk')
+        # One extra row tells whether another page follows.
+        limit = page_size + 1
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            value, pk = self.decode_cursor(cursor, field)
+            rows = list(queryset.filter(**{field: value, f'pk__{past}': pk})[:limit])
+            if len(rows) < limit:
+                rows += queryset.filter(**{f'{field}__{past}': value})[:limit - len(rows)]
+        else:
+            rows = list(queryset[:limit])
+
+        if len(rows) <= page_size:
+            return rows, None
+
+        rows = rows[:page_size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(), 'cursor', self.encode_cursor(rows[-1], field)
+        )
+        return rows, next_url
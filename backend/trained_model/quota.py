@@ -0,0 +1,23 @@
+from django.db.models import F
+
+from accounts.models import User
+
+
+def has_training_quota(user):
+    return user.premium_user or user.limit > 0
+
+
+def consume_training_quota(user):
+    """
+    Take one training run off a free user's limit with a single conditional
+    UPDATE. Returns False when a free user has no runs left, so concurrent
+    trainings cannot spend the same last run twice.
+    """
+    if User.objects.filter(id=user.id, premium_user=True).exists():
+        return True
+    return User.objects.filter(id=user.id, limit__gt=0).update(limit=F('limit') - 1) == 1
+
+
+def refund_training_quota(user):
+    """Give back a run taken by ``consume_training_quota`` for a training that failed."""
+    User.objects.filter(id=user.id, premium_user=False).update(limit=F('limit') + 1)
@@ -0,0 +1,90 @@
+from contextvars import ContextVar
+
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from .artifacts import discard_models
+from .quota import consume_training_quota, refund_training_quota
+
+# Maps the ``endpoint`` names used by the frontend (the training URL paths
+# under api/v1/) to the views that implement them. Views are referenced by
+# dotted path because every training app imports trained_model.models.
+TRAINING_VIEWS = {
+    'regression/linear': 'regression_model.views.LinearRegressionView',
+    'regression/polynomial': 'regression_model.views.PolynomialRegressionView',
+    'ridge-regression': 'ridge_regression.views.RidgeRegressionView',
+    'decision-tree': 'decision_tree.views.DecisionTreeView',
+    'k-neighbors': 'k_neighbors.views.KNeighborsView',
+    'random-forest': 'random_forest.views.RandomForestView',
+}
+
+
+def normalize_endpoint(endpoint):
+    return (endpoint or '').strip('/')
+
+
+def is_training_endpoint(endpoint):
+    return normalize_endpoint(endpoint) in TRAINING_VIEWS
+
+
+def get_training_view(endpoint):
+    """Return an instance of the training view registered for ``endpoint``."""
+    try:
+        view_path = TRAINING_VIEWS[normalize_endpoint(endpoint)]
+    except KeyError:
+        raise ValueError(f"Unknown training endpoint '{endpoint}'.")
+    return import_string(view_path)()
+
+
+# Ids of the models created by the training ``run_with_quota`` is running.
+_created_models = ContextVar('created_models', default=None)
+
+
+def record_created_model(model_id):
+    """Note a newly saved model, so a failed training can discard it."""
+    created = _created_models.get()
+    if created is not None:
+        created.append(model_id)
+
+
+def _abandon_training(user, created):
+    refund_training_quota(user)
+    discard_models(created)
+
+
+def run_with_quota(train, user):
+    """
+    Spend one of the user's training runs, then call ``train()``.
+
+    The run is taken up front by a single conditional UPDATE, so concurrent
+    trainings cannot spend the same last run, and no transaction is held
+    while the model trains. If ``train`` fails, the run is refunded and the
+    models it created are deleted along with their files.
+    Returns the training Response.
+    """
+    if not consume_training_quota(user):
+        return Response({
+            "message": "You have reached your limit. Please upgrade to premium.",
+            "success": False
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    created = []
+    token = _created_models.set(created)
+    try:
+        response = train()
+    except Exception:
+        _abandon_training(user, created)
+        raise
+    finally:
+        _created_models.reset(token)
+
+    if response.status_code != status.HTTP_200_OK:
+        _abandon_training(user, created)
+    return response
+
+
+def run_training(endpoint, data, csv_file, user):
+    """Train in-process with the view registered for ``endpoint``, under ``run_with_quota``."""
+    view = get_training_view(endpoint)
+    return run_with_quota(lambda: view.train(data, csv_file, user), user)
@@ -0,0 +1,289 @@
+import functools
+import hashlib
+import json
+import logging
+
+import sklearn
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .artifacts import is_artifact_referenced
+from .datasets import upload_digest
+from .models import TrainedModel, ModelStats, ModelGraph, ModelMetadata, TrainingResult
+from .serializer import ModelStatsSerializer, ModelGraphSerializer
+
+logger = logging.getLogger(__name__)
+
+# Request fields that name the model rather than configure its training.
+IGNORED_FIELDS = {'model_name', 'endpoint', 'csv_file'}
+
+STATS_FIELDS = ['r2_score', 'mse', 'mae', 'accuracy', 'precision', 'recall', 'f1_score']
+METADATA_FIELDS = ['coefficients', 'intercept', 'feature_importances', 'hyperparameters']
+
+
+def code_version():
+    return f"{settings.TRAINING_RESULT_CACHE_VERSION}:sklearn-{sklearn.__version__}"
+
+
+def training_parameters(data):
+    """The request fields that affect training, as a JSON-safe dict."""
+    return {
+        field: str(value)
+        for field, value in sorted(data.items())
+        if field not in IGNORED_FIELDS and value not in (None, '')
+    }
+
+
+def result_key(sha256, model_type, target_col, parameters):
+    payload = json.dumps(
+        [sha256, model_type, target_col, parameters, code_version()],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _artifact_names(result):
+    names = [result.model_file.name, result.preprocessor_file.name]
+    names += [graph['graph_image'] for graph in result.graphs]
+    return [name for name in names if name]
+
+
+def _artifacts_exist(result):
+    return all(default_storage.exists(name) for name in _artifact_names(result))
+
+
+def _artifact_size(names):
+    return sum(default_storage.size(name) for name in names if default_storage.exists(name))
+
+
+def _used_by_models(names):
+    used = set(TrainedModel.objects.filter(model_file__in=names).values_list('model_file', flat=True))
+    used |= set(TrainedModel.objects.filter(preprocessor_file__in=names).values_list('preprocessor_file', flat=True))
+    used |= set(ModelGraph.objects.filter(graph_image__in=names).values_list('graph_image', flat=True))
+    return used
+
+
+def is_valid_request(data, csv_file):
+    """
+    The request checks every training view makes before it reads the upload.
+    Everything checked after that depends only on what the cache key covers.
+    """
+    return (
+        bool(data) and bool(data.get('target_col'))
+        and csv_file is not None and csv_file.name.lower().endswith('.csv')
+    )
+
+
+def find_result(csv_file, model_type, target_col, parameters):
+    """Return the cached result for this upload and configuration, or None."""
+    sha256 = upload_digest(csv_file)
+    key = result_key(sha256, model_type, target_col, parameters)
+    result = TrainingResult.objects.select_related('dataset').filter(key=key).first()
+    if result is None:
+        return None
+    if not _artifacts_exist(result):
+        logger.warning(f"Artifacts for cached result {key} are missing, retraining")
+        result.delete()
+        return None
+    return result
+
+
+def _create_clone(result, model_name, user):
+    ml_model = TrainedModel.objects.create(
+        model_type=result.model_type,
+        polynomial_degree=result.polynomial_degree,
+        model_name=model_name or result.model_name,
+        target_column=result.target_column,
+        features=result.features,
+        user_id=user.id,
+        dataset=result.dataset,
+        csv_file=result.dataset.csv_file.name,
+        model_file=result.model_file.name,
+        preprocessor_file=result.preprocessor_file.name,
+    )
+    if result.metrics:
+        ModelStats.objects.create(trained_model=ml_model, **result.metrics)
+    if result.model_metadata:
+        ModelMetadata.objects.create(trained_model=ml_model, **result.model_metadata)
+    ModelGraph.objects.bulk_create([
+        ModelGraph(trained_model=ml_model, **graph) for graph in result.graphs
+    ])
+    return ml_model
+
+
+def clone_result(result, model_name, user):
+    """
+    Create a new ``TrainedModel`` from a cached result and return the
+    training response for it.
+
+    The clone shares the stored model, preprocessor and graph files with the
+    model the result was recorded from; its stats and graph rows are copied.
+    """
+    with transaction.atomic():
+        ml_model = _create_clone(result, model_name, user)
+
+    TrainingResult.objects.filter(pk=result.pk).update(
+        hits=F('hits') + 1,
+        last_used_at=timezone.now(),
+    )
+
+    body = dict(result.response)
+    body['model'] = {
+        **body.get('model', {}),
+        "id": str(ml_model.id),
+        "name": ml_model.model_name,
+        "is_public": ml_model.is_public,
+        "likes": ml_model.likes,
+        "created_at": ml_model.created_at,
+    }
+    body['metrics'] = ModelStatsSerializer(ml_model.stats).data if result.metrics else {}
+    body['graphs'] = ModelGraphSerializer(ml_model.graphs.all(), many=True).data
+    body['cached'] = True
+    return Response(body, status=status.HTTP_200_OK)
+
+
+def store_result(response, model_type, target_col, parameters):
+    """Record a successful training so identical requests can reuse it."""
+    ml_model = (
+        TrainedModel.objects.select_related('dataset', 'stats', 'metadata')
+        .filter(id=response.data['model']['id'])
+        .first()
+    )
+    if ml_model is None or ml_model.dataset is None or not ml_model.model_file:
+        return None
+
+    stats = getattr(ml_model, 'stats', None)
+    metadata = getattr(ml_model, 'metadata', None)
+    graphs = [
+        {
+            'title': graph.title,
+            'description': graph.description,
+            'graph_image': graph.graph_image.name,
+            'graph_json': graph.graph_json,
+        }
+        for graph in ml_model.graphs.all()
+    ]
+    body = json.loads(json.dumps(
+        {field: value for field, value in response.data.items() if field not in ('metrics', 'graphs')},
+        cls=JSONEncoder,
+    ))
+
+    result = TrainingResult(
+        key=result_key(ml_model.dataset.sha256, model_type, target_col, parameters),
+        dataset=ml_model.dataset,
+        model_type=model_type,
+        target_column=target_col,
+        parameters=parameters,
+        code_version=code_version(),
+        model_name=ml_model.model_name,
+        polynomial_degree=ml_model.polynomial_degree,
+        features=ml_model.features,
+        model_file=ml_model.model_file.name,
+        preprocessor_file=ml_model.preprocessor_file.name,
+        metrics={field: getattr(stats, field) for field in STATS_FIELDS} if stats else {},
+        graphs=graphs,
+        response=body,
+        model_metadata={field: getattr(metadata, field) for field in METADATA_FIELDS} if metadata else {},
+    )
+    result.size_bytes = _artifact_size(_artifact_names(result))
+    try:
+        with transaction.atomic():
+            result.save()
+    except IntegrityError:
+        # A concurrent training of the same configuration got there first.
+        return None
+    return result
+
+
+def evict_results(max_bytes=None):
+    """
+    Drop the least recently used results until the files only the cache
+    keeps alive fit in ``max_bytes``, deleting those files.
+
+    Sizes come from each result's recorded ``size_bytes``, so storage is
+    only touched for the results removed. A result whose files a model still
+    uses is not counted and is kept: dropping it would free no disk.
+    Returns the number of results removed.
+    """
+    if max_bytes is None:
+        max_bytes = settings.TRAINING_RESULT_CACHE_MAX_BYTES
+
+    # Results held by a model only make the true total smaller.
+    if (TrainingResult.objects.aggregate(total=Sum('size_bytes'))['total'] or 0) <= max_bytes:
+        return 0
+
+    results = list(
+        TrainingResult.objects
+        .only('pk', 'last_used_at', 'size_bytes', 'model_file', 'preprocessor_file', 'graphs')
+        .order_by('last_used_at')
+    )
+    names = {result.pk: _artifact_names(result) for result in results}
+    used = _used_by_models([name for result_names in names.values() for name in result_names])
+    owned = [result for result in results if not used.intersection(names[result.pk])]
+    total = sum(result.size_bytes for result in owned)
+
+    evicted = 0
+    for result in owned:
+        if total <= max_bytes:
+            break
+        result_names = names[result.pk]
+        result.delete()
+        evicted += 1
+        total -= result.size_bytes
+        # Every result records the files of the training that produced it,
+        # so no other result shares them; a model cloned since may.
+        for name in result_names:
+            if not is_artifact_referenced(name):
+                default_storage.delete(name)
+    return evicted
+
+
+def cached_training(model_type):
+    """
+    Decorate a training view's ``train(data, csv_file, user)`` so identical
+    requests reuse an earlier result.
+
+    Requests are identified by the SHA-256 of the upload, the target column,
+    the other training fields and ``code_version()``. A hit clones the stored
+    result without fitting or rendering anything; a successful miss is
+    recorded, then the cache is trimmed to its byte budget. Requests that
+    fail ``is_valid_request`` go straight to the view for its error response.
+    """
+    def decorator(train):
+        @functools.wraps(train)
+        def wrapper(view, data, csv_file, user):
+            enabled = settings.TRAINING_RESULT_CACHE_MAX_BYTES > 0
+            if not enabled or not is_valid_request(data, csv_file):
+                return train(view, data, csv_file, user)
+
+            target_col = data.get('target_col')
+
+            parameters = training_parameters(data)
+            try:
+                result = find_result(csv_file, model_type, target_col, parameters)
+                if result is not None:
+                    logger.info(f"Reusing cached {model_type} result {result.key[:12]}")
+                    return clone_result(result, data.get('model_name'), user)
+            except Exception as e:
+                logger.warning(f"Error reading training cache: {str(e)}")
+
+            response = train(view, data, csv_file, user)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            try:
+                if store_result(response, model_type, target_col, parameters) is not None:
+                    # Files are only deleted once the new rows are committed.
+                    transaction.on_commit(evict_results)
+            except Exception as e:
+                logger.warning(f"Error storing training result: {str(e)}")
+            response.data['cached'] = False
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,172 @@
+import re
+import uuid
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .models import TrainedModel
+
+SEARCH_FIELDS = ('model_name', 'target_column', 'features')
+
+_TERM = re.compile(r'\w+')
+
+
+def search_terms(query):
+    """Split a free-text query into the lowercase words every result must contain."""
+    return [term.lower() for term in _TERM.findall(query or '')]
+
+
+class SearchBackend(ABC):
+    """
+    Finds public models whose name, target column or features match a query.
+
+    ``search`` returns one page of matching model ids (UUIDs), best match first.
+    ``index`` and ``remove`` run whenever a model is saved or deleted, and
+    ``rebuild`` re-indexes every model; backends without an index of their
+    own implement them as explicit no-ops.
+    """
+
+    @abstractmethod
+    def index(self, trained_model):
+        """Add or refresh ``trained_model`` in the index."""
+
+    @abstractmethod
+    def remove(self, pk):
+        """Drop the model with primary key ``pk`` from the index."""
+
+    @abstractmethod
+    def rebuild(self):
+        """Re-index every model from the model table."""
+
+    @abstractmethod
+    def search(self, terms, limit, offset=0):
+        """Return up to ``limit`` matching model ids after skipping ``offset``."""
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Portable fallback: substring matches in the model table, ranked by the
+    field they hit (name, then target column, then features), newest first
+    among equals. Needs no index, but scans every public model per query.
+    """
+
+    def index(self, trained_model):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, terms, limit, offset=0):
+        matches = Q()
+        for term in terms:
+            matches &= Q(*[Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS], _connector=Q.OR)
+
+        phrase = ' '.join(terms)
+        score = Case(
+            When(model_name__icontains=phrase, then=Value(3)),
+            When(target_column__icontains=phrase, then=Value(2)),
+            When(features__icontains=phrase, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        queryset = (
+            TrainedModel.objects.filter(matches, is_public=True)
+            .annotate(search_score=score)
+            .order_by('-search_score', '-created_at', '-pk')
+        )
+        return list(queryset.values_list('pk', flat=True)[offset:offset + limit])
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Ranked search over an FTS5 table of public models, created by migration
+    0010. Matches are scored with bm25, weighting the model name above the
+    target column above features, and every term also matches as a prefix,
+    so partial words typed so far find results.
+
+    FTS5 rows are keyed by an integer rowid, so each model's rowid is the
+    top 63 bits of its UUID; saving a model replaces its row in place.
+    """
+
+    table = 'trained_model_search'
+    weights = (0.0, 10.0, 5.0, 1.0)
+
+    @staticmethod
+    def rowid(pk):
+        return pk.int >> 65
+
+    def index(self, trained_model):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [self.rowid(trained_model.pk)])
+            if trained_model.is_public:
+                cursor.execute(
+                    f"INSERT INTO {self.table} (rowid, model_id, model_name, target_column, features) "
+                    f"VALUES (%s, %s, %s, %s, %s)",
+                    [
+                        self.rowid(trained_model.pk),
+                        trained_model.pk.hex,
+                        trained_model.model_name,
+                        trained_model.target_column,
+                        (trained_model.features or '').replace(',', ' '),
+                    ],
+                )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [self.rowid(pk)])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        for trained_model in TrainedModel.objects.filter(is_public=True).only(*SEARCH_FIELDS, 'is_public').iterator():
+            self.index(trained_model)
+
+    def search(self, terms, limit, offset=0):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        # rowid breaks ties, so equally ranked matches page in a stable order.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT model_id FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}), rowid LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    The configured search backend: ``MODEL_SEARCH_BACKEND`` as a dotted path,
+    or, when unset, FTS5 on SQLite and ``DatabaseSearchBackend`` elsewhere.
+    """
+    global _backend
+    if _backend is None:
+        if settings.MODEL_SEARCH_BACKEND:
+            _backend = import_string(settings.MODEL_SEARCH_BACKEND)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = DatabaseSearchBackend()
+    return _backend
+
+
+def search_public_models(query, limit, offset=0):
+    """
+    Return up to ``limit`` public models matching ``query``, best match first,
+    skipping the first ``offset`` matches.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    ids = get_search_backend().search(terms, limit, offset)
+    models_by_id = TrainedModel.objects.filter(is_public=True).select_related('stats').in_bulk(ids)
+    return [models_by_id[pk] for pk in ids if pk in models_by_id]
@@ -1,8 +1,8 @@
 from rest_framework import serializers
-from .models import TrainedModel, ModelStats, ModelGraph
+from .models import TrainedModel, ModelStats, ModelGraph, TrainingJob
 
 from rest_framework import serializers
-from .models import TrainedModel, ModelStats, ModelGraph
+from .models import TrainedModel, ModelStats, ModelGraph, TrainingJob
 
 class ModelStatsSerializer(serializers.ModelSerializer):
     class Meta:
@@ -54,4 +54,42 @@ class TrainedModelSerializer(serializers.ModelSerializer):
             'stats', 
             'graphs',
         ]
-        read_only_fields = ['id', 'created_at', 'stats', 'graphs']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at', 'stats', 'graphs']
+
+class TrainedModelSummarySerializer(serializers.ModelSerializer):
+    """List-page view of a model: its metrics, without graphs or file paths."""
+    stats = ModelStatsSerializer(read_only=True)
+
+    class Meta:
+        model = TrainedModel
+        fields = [
+            'id',
+            'user_id',
+            'model_name',
+            'model_type',
+            'polynomial_degree',
+            'target_column',
+            'features',
+            'created_at',
+            'is_public',
+            'likes',
+            'stats',
+        ]
+        read_only_fields = fields
+
+class TrainingJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrainingJob
+        fields = [
+            'id',
+            'endpoint',
+            'params',
+            'status',
+            'status_code',
+            'error',
+            'trained_model',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,35 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from .models import TrainedModel
+from .registry import record_created_model
+from .search import SEARCH_FIELDS, get_search_backend
+
+INDEXED_FIELDS = {*SEARCH_FIELDS, 'is_public'}
+
+
+@receiver(post_save, sender=TrainedModel)
+def index_trained_model(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the search index in step with a saved model, skipping saves that touch no indexed field."""
+    if raw or (update_fields is not None and not INDEXED_FIELDS & set(update_fields)):
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_save, sender=TrainedModel)
+def track_created_model(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_created_model(instance.pk)
+
+
+@receiver(post_delete, sender=TrainedModel)
+def unindex_trained_model(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def release_user_likes(sender, instance, **kwargs):
+    """A deleted user's likes go with them by cascade; take them off the models' counters too."""
+    TrainedModel.objects.filter(model_likes__user=instance).update(likes=F('likes') - 1)
@@ -1,3 +1,524 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import django
+import joblib
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from sklearn.linear_model import LinearRegression
+
+from accounts.models import User
+from accounts.utils import generate_jwt
+from ml_utils.micro_batching import prediction_batcher
+from .jobs import claim_next_job, requeue_running_jobs, run_job
+from .likes import set_like, toggle_like
+from .models import Dataset, TrainedModel, TrainingJob, ModelStats, ModelGraph, ModelLike, TrainingResult
+from .registry import run_with_quota
+from .result_cache import evict_results
+from . import search, train_all
+
+
+def mapped_shared_blocks():
+    """The shared-memory blocks the calling process has mapped."""
+    with open('/proc/self/maps') as maps:
+        return {line.split()[-1] for line in maps if '/psm_' in line}
+
+
+def training_csv(rows=60, seed=0, labels=(0, 1)):
+    rng = np.random.default_rng(seed)
+    lines = ["x1,x2,y"]
+    for x1, x2 in rng.normal(size=(rows, 2)):
+        lines.append(f"{x1:.4f},{x2:.4f},{labels[int(x1 + x2 > 0)]}")
+    return ContentFile("\n".join(lines).encode(), name="data.csv")
+
+
+class ModelListPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_models(self, count, likes=0):
+        for i in range(count):
+            trained_model = TrainedModel.objects.create(
+                user=self.user,
+                model_type=TrainedModel.ModelType.LINEAR_REGRESSION,
+                model_name=f"model {i}",
+                target_column="y",
+                features="x1,x2",
+                is_public=True,
+                likes=likes,
+            )
+            ModelStats.objects.create(trained_model=trained_model, r2_score=0.9)
+            for title in ("Residuals", "Actual vs Predicted"):
+                ModelGraph.objects.create(trained_model=trained_model, title=title)
+
+    def fetch_all(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['data'])
+            url = response.data['next']
+        return ids
+
+    def test_query_count_does_not_grow_with_page_size_or_catalogue(self):
+        self.create_models(5)
+        with self.assertNumQueries(1):
+            small = self.client.get('/api/v1/trained-model/?page_size=5')
+        self.create_models(40)
+        with self.assertNumQueries(1):
+            large = self.client.get('/api/v1/trained-model/?page_size=40')
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/trained-model/user/?page_size=40')
+
+        # A page after a cursor finishes the cursor's run of ties, then seeks past it.
+        with self.assertNumQueries(2):
+            self.client.get(large.data['next'])
+
+        self.assertEqual(len(small.data['data']), 5)
+        self.assertEqual(len(large.data['data']), 40)
+        self.assertEqual(large.data['data'][0]['stats']['r2_score'], 0.9)
+        self.assertNotIn('graphs', large.data['data'][0])
+
+    def test_cursor_walks_every_model_once_despite_ties(self):
+        self.create_models(7, likes=3)
+        self.create_models(6, likes=0)
+
+        for ordering in ('created_at', 'likes'):
+            for direction in ('desc', 'asc'):
+                ids = self.fetch_all(f'/api/v1/trained-model/?ordering={ordering}&direction={direction}&page_size=4')
+                self.assertEqual(len(ids), 13)
+                self.assertEqual(set(ids), {str(pk) for pk in TrainedModel.objects.values_list('id', flat=True)})
+
+        likes = [
+            row['likes'] for row in
+            self.client.get('/api/v1/trained-model/?ordering=likes&page_size=13').data['data']
+        ]
+        self.assertEqual(likes, sorted(likes, reverse=True))
+
+    def test_invalid_page_parameters_are_rejected(self):
+        for query in ('ordering=name', 'direction=up', 'cursor=not-a-cursor', 'page_size=ten'):
+            response = self.client.get(f'/api/v1/trained-model/?{query}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_cursor_with_a_malformed_id_is_rejected(self):
+        for pk in ("x", 7, None):
+            cursor = base64.urlsafe_b64encode(json.dumps(["2024-01-01T00:00:00", pk]).encode()).decode()
+            response = self.client.get('/api/v1/trained-model/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+
+class ModelSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_model(self, model_name, target_column, features, is_public=True):
+        return TrainedModel.objects.create(
+            user=self.user,
+            model_type=TrainedModel.ModelType.KNN,
+            model_name=model_name,
+            target_column=target_column,
+            features=features,
+            is_public=is_public,
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/v1/trained-model/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['model_name'] for row in response.data['data']]
+
+    def test_index_follows_saves_and_deletes(self):
+        house = self.create_model("House prices", "price", "sqft,zip_code")
+        hidden = self.create_model("Price baseline", "price", "x1", is_public=False)
+        self.assertEqual(self.search("price"), ["House prices"])
+        self.assertEqual(self.search("zip_code"), ["House prices"])
+
+        hidden.is_public = True
+        hidden.save()
+        self.assertEqual(set(self.search("price")), {"House prices", "Price baseline"})
+
+        house.model_name = "Apartment rents"
+        house.save()
+        self.assertEqual(self.search("house"), [])
+        self.assertEqual(self.search("rent"), ["Apartment rents"])
+
+        house.delete()
+        self.assertEqual(self.search("rent"), [])
+
+    def test_name_matches_rank_first_with_either_backend(self):
+        self.create_model("Churn model", "churned", "tenure,sales")
+        self.create_model("Sales forecast", "revenue", "region")
+        for backend in (None, search.DatabaseSearchBackend()):
+            search._backend = backend
+            self.addCleanup(setattr, search, '_backend', None)
+            self.assertEqual(self.search("sales"), ["Sales forecast", "Churn model"])
+
+    def test_backend_without_indexing_cannot_be_created(self):
+        class SearchOnlyBackend(search.SearchBackend):
+            def search(self, terms, limit, offset=0):
+                return []
+
+        with self.assertRaises(TypeError):
+            SearchOnlyBackend()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RunWithQuotaTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12', limit=1)
+
+    def train(self, status_code):
+        def train():
+            trained_model = TrainedModel.objects.create(
+                user=self.user,
+                model_type=TrainedModel.ModelType.LINEAR_REGRESSION,
+                model_name="model",
+                target_column="y",
+            )
+            trained_model.model_file.save(f"{trained_model.id}.pkl", ContentFile(b"model"))
+            self.model_file = trained_model.model_file.name
+            return Response({}, status=status_code)
+        return train
+
+    def test_failed_training_refunds_the_run_and_discards_its_files(self):
+        response = run_with_quota(self.train(status.HTTP_400_BAD_REQUEST), self.user)
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.limit, 1)
+        self.assertFalse(TrainedModel.objects.exists())
+        self.assertFalse(default_storage.exists(self.model_file))
+
+    def test_successful_training_spends_the_run(self):
+        self.assertEqual(run_with_quota(self.train(status.HTTP_200_OK), self.user).status_code, 200)
+        self.assertEqual(run_with_quota(self.train(status.HTTP_200_OK), self.user).status_code, 403)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.limit, 0)
+        self.assertEqual(TrainedModel.objects.count(), 1)
+        self.assertTrue(default_storage.exists(self.model_file))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ResultCacheEvictionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.dataset = Dataset.objects.create(sha256='0' * 64, columns_path='', row_count=10, raw_row_count=10)
+
+    def cache_result(self, key, size):
+        model_file = default_storage.save(f'models/{key}.pkl', ContentFile(b'x' * size))
+        TrainingResult.objects.create(
+            key=key,
+            dataset=self.dataset,
+            model_type=TrainedModel.ModelType.KNN,
+            target_column='y',
+            model_name=key,
+            model_file=model_file,
+            size_bytes=size,
+        )
+        return model_file
+
+    def test_only_files_the_cache_alone_keeps_count_against_the_budget(self):
+        shared = self.cache_result('shared', 100)
+        owned = self.cache_result('owned', 100)
+        trained_model = TrainedModel.objects.create(
+            user=self.user,
+            model_type=TrainedModel.ModelType.KNN,
+            model_name='shared',
+            target_column='y',
+            model_file=shared,
+        )
+
+        with (
+            mock.patch.object(default_storage, 'size') as size,
+            mock.patch.object(default_storage, 'exists') as exists,
+        ):
+            self.assertEqual(evict_results(max_bytes=200), 0)
+            # The older result's file is still used by a model, so dropping it frees nothing.
+            self.assertEqual(evict_results(max_bytes=150), 0)
+        size.assert_not_called()
+        exists.assert_not_called()
+        self.assertEqual(evict_results(max_bytes=50), 1)
+        self.assertEqual(list(TrainingResult.objects.values_list('key', flat=True)), ['shared'])
+        self.assertFalse(default_storage.exists(owned))
+
+        trained_model.delete()
+        self.assertEqual(evict_results(max_bytes=50), 1)
+        self.assertFalse(TrainingResult.objects.exists())
+        self.assertFalse(default_storage.exists(shared))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ModelPredictionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_prediction_reads_only_the_model_row(self):
+        trained_model = TrainedModel.objects.create(
+            user=self.user,
+            model_type=TrainedModel.ModelType.LINEAR_REGRESSION,
+            model_name="model",
+            target_column="y",
+            features="x1,x2",
+        )
+        ModelStats.objects.create(trained_model=trained_model, r2_score=1.0)
+        ModelGraph.objects.create(trained_model=trained_model, title="Residuals")
+        artifact = io.BytesIO()
+        joblib.dump(LinearRegression().fit([[0, 0], [1, 0], [0, 1]], [1, 3, 4]), artifact)
+        trained_model.model_file.save(f"{trained_model.id}_model.pkl", ContentFile(artifact.getvalue()))
+
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                f'/api/v1/trained-model/detail/{trained_model.id}/', {'features': [1, 1]}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.data['prediction'][0], 6.0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class NamedFeaturePredictionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/v1/k-neighbors/', {
+            'csv_file': training_csv(labels=('neg', 'pos')),
+            'target_col': 'y',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.url = f"/api/v1/trained-model/detail/{response.data['model']['id']}"
+
+    def test_batch_predictions_use_the_trained_labels(self):
+        response = self.client.post(
+            f'{self.url}/predict/', {'rows': [{'x1': 2, 'x2': 2}, {'x1': -2, 'x2': -2}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['predictions'], ['pos', 'neg'])
+
+    def predict_csv(self, text):
+        csv_file = ContentFile(text.encode(), name="rows.csv")
+        response = self.client.post(f'{self.url}/predict-csv/', {'csv_file': csv_file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_bulk_predictions_name_probability_columns_by_label(self):
+        lines = self.predict_csv("x1,x2\n2,2\n-2,-2\n")
+        self.assertEqual(lines[0], "row,prediction,probability_neg,probability_pos")
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['pos', 'neg'])
+
+    @override_settings(BULK_PREDICTION_CHUNK_ROWS=2)
+    def test_bulk_predictions_stream_every_chunk_under_one_header(self):
+        lines = self.predict_csv("x1,x2\n2,2\n-2,-2\n3,1\n-1,-3\n2,0\n")
+        self.assertEqual(lines[0], "row,prediction,probability_neg,probability_pos")
+        self.assertEqual([line.split(',')[:2] for line in lines[1:]], [
+            ['0', 'pos'], ['1', 'neg'], ['2', 'pos'], ['3', 'neg'], ['4', 'pos'],
+        ])
+
+    @override_settings(BULK_PREDICTION_CHUNK_ROWS=2)
+    def test_bulk_prediction_ends_with_an_error_line_when_a_later_chunk_fails(self):
+        lines = self.predict_csv("x1,x2\n2,2\n-2,-2\n3,1\noops,-3\n2,0\n")
+        self.assertEqual([line.split(',')[0] for line in lines[1:-1]], ['0', '1'])
+        self.assertTrue(lines[-1].startswith("# error: prediction stopped at row 2:"), lines[-1])
+
+    def predict_async(self, body):
+        return self.async_client.post(
+            f'{self.url}/predict-async/', body,
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {generate_jwt(self.user)}'},
+        )
+
+    async def test_async_predictions_use_the_trained_labels(self):
+        response = await self.predict_async({'row': {'x1': 2, 'x2': 2}})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['prediction'], 'pos')
+        self.assertEqual(set(body['probabilities']), {'neg', 'pos'})
+
+    async def test_concurrent_async_requests_share_one_batch(self):
+        prediction_batcher.configure(0.5, 64)
+        self.addCleanup(
+            prediction_batcher.configure,
+            settings.PREDICTION_BATCH_MAX_WAIT_MS / 1000, settings.PREDICTION_BATCH_MAX_ROWS,
+        )
+        single, several = await asyncio.gather(
+            self.predict_async({'row': {'x1': 2, 'x2': 2}}),
+            self.predict_async({'rows': [{'x1': -2, 'x2': -2}, {'x1': 3, 'x2': 1}]}),
+        )
+        self.assertEqual(single.json()['batch_size'], 3)
+        self.assertEqual(several.json()['batch_size'], 3)
+        self.assertEqual(single.json()['prediction'], 'pos')
+        self.assertEqual([row['prediction'] for row in several.json()['predictions']], ['neg', 'pos'])
+
+
+class ModelLikeTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'secret12')
+        self.fan = User.objects.create_user('fan@example.com', 'secret12')
+        self.trained_model = TrainedModel.objects.create(
+            user=self.owner,
+            model_type=TrainedModel.ModelType.KNN,
+            model_name="model",
+            target_column="y",
+            is_public=True,
+        )
+
+    def likes(self):
+        self.trained_model.refresh_from_db(fields=['likes'])
+        return self.trained_model.likes
+
+    def test_counter_follows_like_rows(self):
+        self.assertTrue(set_like(self.fan, self.trained_model.pk, True))
+        self.assertFalse(set_like(self.fan, self.trained_model.pk, True))
+        self.assertEqual(toggle_like(self.owner, self.trained_model.pk), 'like')
+        self.assertEqual(self.likes(), 2)
+
+        self.assertEqual(toggle_like(self.owner, self.trained_model.pk), 'dislike')
+        self.assertTrue(set_like(self.fan, self.trained_model.pk, False))
+        self.assertFalse(set_like(self.fan, self.trained_model.pk, False))
+        self.assertEqual(self.likes(), 0)
+        self.assertFalse(ModelLike.objects.exists())
+
+    def test_unknown_model_is_rejected_without_leaving_a_like(self):
+        missing = uuid.uuid4()
+        for action in (lambda: set_like(self.fan, missing, True), lambda: toggle_like(self.fan, missing)):
+            with self.assertRaises(TrainedModel.DoesNotExist):
+                action()
+        self.assertFalse(ModelLike.objects.exists())
+
+    def test_deleting_a_user_takes_their_likes_off_the_counter(self):
+        set_like(self.fan, self.trained_model.pk, True)
+        set_like(self.owner, self.trained_model.pk, True)
+        self.fan.delete()
+        self.assertEqual(self.likes(), 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TrainingJobTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self):
+        response = self.client.post('/api/v1/trained-model/jobs/', {
+            'csv_file': training_csv(),
+            'target_col': 'y',
+            'model_name': 'queued',
+            'endpoint': 'regression/linear',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        return response.data['job']['id']
+
+    def status(self, job_id):
+        return self.client.get(f'/api/v1/trained-model/jobs/{job_id}/').data['job']['status']
+
+    def test_job_runs_from_pending_to_succeeded(self):
+        job_id = self.submit()
+        self.assertEqual(self.status(job_id), TrainingJob.Status.PENDING)
+        self.assertEqual(self.client.get(f'/api/v1/trained-model/jobs/{job_id}/result/').status_code, 202)
+
+        job = claim_next_job()
+        self.assertEqual(str(job.id), job_id)
+        self.assertEqual(self.status(job_id), TrainingJob.Status.RUNNING)
+        self.assertIsNone(claim_next_job())
+
+        run_job(job)
+        self.assertEqual(self.status(job_id), TrainingJob.Status.SUCCEEDED)
+        result = self.client.get(f'/api/v1/trained-model/jobs/{job_id}/result/')
+        self.assertEqual(result.status_code, 200)
+        trained_model = TrainedModel.objects.get()
+        self.assertEqual(result.data['data']['model']['id'], str(trained_model.id))
+        self.assertEqual(TrainingJob.objects.get().trained_model, trained_model)
+        self.assertFalse(TrainingJob.objects.get().csv_file)
+
+    def test_requeue_returns_running_jobs_to_the_queue_in_order(self):
+        first, second = self.submit(), self.submit()
+        self.assertEqual(str(claim_next_job().id), first)
+        self.assertEqual(requeue_running_jobs(), 1)
+
+        job = TrainingJob.objects.get(id=first)
+        self.assertEqual(job.status, TrainingJob.Status.PENDING)
+        self.assertIsNone(job.started_at)
+        self.assertEqual([str(claim_next_job().id), str(claim_next_job().id)], [first, second])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TrainAllTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # One worker, so the test can look inside the process that trained.
+        cls.pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+        )
+        train_all._worker_pool = cls.pool
+
+    @classmethod
+    def tearDownClass(cls):
+        train_all._worker_pool = None
+        cls.pool.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'secret12')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def train_all(self, model_types, seed=0):
+        return self.client.post('/api/v1/trained-model/train-all/', {
+            'csv_file': training_csv(seed=seed),
+            'target_col': 'y',
+            'model_types': model_types,
+        }, format='multipart')
+
+    @unittest.skipUnless(os.path.exists('/proc/self/maps'), "needs /proc to list mappings")
+    def test_worker_detaches_shared_blocks_after_each_training(self):
+        for seed in (0, 1):
+            response = self.train_all('KNN,LinearRegression', seed=seed)
+            self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.pool.submit(mapped_shared_blocks).result(), set())
+
+    def test_only_the_requested_types_are_trained_and_ranked(self):
+        response = self.train_all('RidgeRegression,LinearRegression')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        board = response.data['leaderboard']
+        self.assertEqual(board['classification'], [])
+        self.assertEqual([row['rank'] for row in board['regression']], [1, 2])
+        self.assertEqual(
+            {row['model_type'] for row in board['regression']},
+            {TrainedModel.ModelType.LINEAR_REGRESSION, TrainedModel.ModelType.RIDGE_REGRESSION},
+        )
+        scores = [row['score'] for row in board['regression']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(response.data['failed'], [])
+        self.assertEqual(TrainedModel.objects.count(), 2)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.limit, 19)
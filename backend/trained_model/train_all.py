@@ -0,0 +1,556 @@
+import copy
+import gc
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from tempfile import NamedTemporaryFile
+
+import django
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.core.files.images import ImageFile
+from rest_framework import status
+from rest_framework.response import Response
+from scipy import sparse
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from ml_utils.cpu_scheduler import core_lease, scheduler
+from ml_utils.graph_utils import (
+    save_residual_plot,
+    save_actual_vs_predicted_plot,
+    save_error_distribution_plot,
+    save_qq_plot,
+    save_confusion_matrix_graph,
+    save_roc_curve_graph,
+    save_precision_recall_graph,
+    save_multiclass_roc_curve_graph,
+    save_multiclass_precision_recall_graph,
+    save_feature_importance_graph,
+)
+from ml_utils.ingestion import DatasetValidationError
+from ml_utils.polynomial_search import search_polynomial_degree
+from ml_utils.preprocessing import build_feature_matrix
+from ml_utils.shared_arrays import SharedArrays, attach
+from ml_utils.stats_utils import calculate_regression_metrics
+from .artifacts import dump_artifact, save_preprocessor, save_model_metadata
+from .datasets import load_training_data
+from .models import TrainedModel, ModelStats, ModelGraph
+from .registry import get_training_view
+from .serializer import ModelStatsSerializer
+
+logger = logging.getLogger(__name__)
+
+ModelType = TrainedModel.ModelType
+
+REGRESSION = 'regression'
+CLASSIFICATION = 'classification'
+
+# Model types in the order they are submitted to the pool, slowest first,
+# with their task and the training view whose search code they reuse.
+ALGORITHMS = {
+    ModelType.RANDOM_FOREST: (CLASSIFICATION, 'random-forest'),
+    ModelType.POLYNOMIAL_REGRESSION: (REGRESSION, 'regression/polynomial'),
+    ModelType.KNN: (CLASSIFICATION, 'k-neighbors'),
+    ModelType.RIDGE_REGRESSION: (REGRESSION, 'ridge-regression'),
+    ModelType.DECISION_TREE: (CLASSIFICATION, 'decision-tree'),
+    ModelType.LINEAR_REGRESSION: (REGRESSION, 'regression/linear'),
+}
+
+MIN_ROWS = 10
+MAX_CLASSES = 50
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """
+    The process pool model types train in, started on first use and kept
+    for the life of the process, sized to the whole core budget. Workers
+    start fresh (no fork of a threaded server) and import the training
+    views, so each sets up Django once when it starts, not per request.
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = ProcessPoolExecutor(
+                max_workers=scheduler.total_cores,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return _worker_pool
+
+
+def _discard_worker_pool(pool):
+    # A worker died and the pool refuses new work; the next request starts another.
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is pool:
+            _worker_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _fit_linear(view, x_train, y_train, x_test, y_test, feature_names):
+    return LinearRegression().fit(x_train, y_train), {}
+
+
+def _fit_polynomial(view, x_train, y_train, x_test, y_test, feature_names):
+    if sparse.issparse(x_train):
+        x_train = pd.DataFrame(x_train.toarray(), columns=feature_names)
+        x_test = pd.DataFrame(x_test.toarray(), columns=feature_names)
+    best_degree, degree_search = search_polynomial_degree(
+        x_train, y_train, x_test, y_test,
+        memory_budget=settings.POLYNOMIAL_SEARCH_MEMORY_BUDGET
+    )
+    pipeline = None
+    if best_degree is not None:
+        pipeline, _ = view.polynomial_degree_trainer(best_degree, x_train, y_train, x_test, y_test)
+    if pipeline is None:
+        raise ValueError("Failed to train any polynomial model.")
+    return pipeline, {"polynomial_degree": best_degree, "degree_search": degree_search}
+
+
+def _fit_ridge(view, x_train, y_train, x_test, y_test, feature_names):
+    alpha, pipeline, validation_curve = view.find_best_alpha(x_train, y_train)
+    return pipeline, {"alpha": alpha, "validation_curve": validation_curve}
+
+
+def _fit_decision_tree(view, x_train, y_train, x_test, y_test, feature_names):
+    best_params, _ = view.hyperparameter_tuning(x_train, y_train, x_test, y_test)
+    return best_params['model'], {"max_depth": best_params['max_depth']}
+
+
+def _fit_k_neighbors(view, x_train, y_train, x_test, y_test, feature_names):
+    best_params, _ = view.hyperparameter_tuning(x_train, y_train, x_test, y_test)
+    return best_params['model'], {"n_neighbors": best_params['neighbors']}
+
+
+def _fit_random_forest(view, x_train, y_train, x_test, y_test, feature_names):
+    best_params, _, trajectory = view.hyperparameter_tuning(x_train, y_train, x_test, y_test)
+    params = {key: value for key, value in best_params.items() if key != 'model'}
+    return best_params['model'], {"best_params": params, "search_trajectory": trajectory}
+
+
+FITTERS = {
+    ModelType.LINEAR_REGRESSION: _fit_linear,
+    ModelType.POLYNOMIAL_REGRESSION: _fit_polynomial,
+    ModelType.RIDGE_REGRESSION: _fit_ridge,
+    ModelType.DECISION_TREE: _fit_decision_tree,
+    ModelType.KNN: _fit_k_neighbors,
+    ModelType.RANDOM_FOREST: _fit_random_forest,
+}
+
+# How each classifier's own view averages precision, recall and F1 over
+# classes, by number of classes, so scores match a single training.
+METRIC_AVERAGES = {
+    ModelType.DECISION_TREE: lambda n_classes: 'binary' if n_classes == 2 else 'macro',
+    ModelType.KNN: lambda n_classes: 'macro',
+    ModelType.RANDOM_FOREST: lambda n_classes: 'macro',
+}
+
+
+def _render_graphs(model_type, model, y_test, y_pred, y_proba, feature_names, graph_dir):
+    """Render the model's graphs into ``graph_dir``; returns ``(prefix, path, title, description)`` tuples."""
+    if ALGORITHMS[model_type][0] == REGRESSION:
+        graphs = [
+            ('residual', lambda path: save_residual_plot(y_test, y_pred, path),
+             "Residual Plot", "Shows residuals vs predictions"),
+            ('pred', lambda path: save_actual_vs_predicted_plot(y_test, y_pred, path),
+             "Actual vs Predicted", "Compares predicted vs actual values"),
+            ('err_dist', lambda path: save_error_distribution_plot(y_test, y_pred, path),
+             "Error Distribution", "Distribution of prediction errors"),
+            ('qq', lambda path: save_qq_plot(y_test, y_pred, path),
+             "Q-Q Plot", "Check if residuals are normally distributed"),
+        ]
+    else:
+        graphs = [
+            ('cm', lambda path: save_confusion_matrix_graph(y_test, y_pred, path),
+             "Confusion Matrix", "Shows TP, FP, FN, TN"),
+        ]
+        if y_proba is not None and y_proba.shape[1] == 2:
+            graphs += [
+                ('roc', lambda path: save_roc_curve_graph(y_test, y_proba[:, 1], path),
+                 "ROC Curve", "Shows model's ability to distinguish classes"),
+                ('pr', lambda path: save_precision_recall_graph(y_test, y_proba[:, 1], path),
+                 "Precision-Recall Curve", "Shows trade-off between precision and recall"),
+            ]
+        elif y_proba is not None:
+            graphs += [
+                ('roc', lambda path: save_multiclass_roc_curve_graph(y_test, y_proba, path),
+                 "ROC Curve (Multiclass)", "Shows model's ability to distinguish between multiple classes"),
+                ('pr', lambda path: save_multiclass_precision_recall_graph(y_test, y_proba, path),
+                 "Precision-Recall Curve (Multiclass)", "Shows trade-off between precision and recall for each class"),
+            ]
+        if hasattr(model, 'feature_importances_'):
+            graphs.append((
+                'feature_importance',
+                lambda path: save_feature_importance_graph(model.feature_importances_, feature_names, path),
+                "Feature Importance", "Shows the importance of each feature in the model",
+            ))
+
+    rendered = []
+    for prefix, render, title, description in graphs:
+        path = os.path.join(graph_dir, f"{prefix}_{model_type}.png")
+        try:
+            render(path)
+            rendered.append((prefix, path, title, description))
+        except Exception as e:
+            logger.warning(f"Error generating {title} for {model_type}: {str(e)}")
+    return rendered
+
+
+def _fit_attached(model_type, handles, feature_names, graph_dir, blocks):
+    values = []
+    for handle in handles:
+        value, value_blocks = attach(handle)
+        values.append(value)
+        blocks.extend(value_blocks)
+    x_train, x_test, y_train, y_test = values
+
+    view = get_training_view(ALGORITHMS[model_type][1])
+    model, details = FITTERS[model_type](view, x_train, y_train, x_test, y_test, feature_names)
+
+    y_pred = model.predict(x_test)
+    y_proba = None
+    if ALGORITHMS[model_type][0] == REGRESSION:
+        metrics = calculate_regression_metrics(y_test, y_pred)
+    else:
+        if hasattr(model, 'predict_proba'):
+            y_proba = model.predict_proba(x_test)
+        average = METRIC_AVERAGES[model_type](len(np.unique(np.concatenate([y_train, y_test]))))
+        metrics = {
+            "accuracy": accuracy_score(y_test, y_pred),
+            "precision": precision_score(y_test, y_pred, average=average, zero_division=0),
+            "recall": recall_score(y_test, y_pred, average=average, zero_division=0),
+            "f1_score": f1_score(y_test, y_pred, average=average, zero_division=0),
+        }
+
+    return {
+        # Fitted estimators may keep views of their training arrays; the copy
+        # lets the blocks close once this returns.
+        "model": copy.deepcopy(model),
+        "metrics": {key: float(value) for key, value in metrics.items()},
+        "graphs": _render_graphs(model_type, model, y_test, y_pred, y_proba, feature_names, graph_dir),
+        "details": details,
+    }
+
+
+def train_in_worker(model_type, handles, feature_names, graph_dir):
+    """
+    Fit, score and plot one model type inside a pool process.
+
+    The split matrices are attached from shared memory rather than sent to
+    the process, and detached again before it returns: the pool outlives the
+    request, so a block left open would stay mapped after it is unlinked.
+    Returns the fitted model with its metrics, rendered graphs and search
+    details.
+    """
+    started = time.monotonic()
+    blocks = []
+    try:
+        result = _fit_attached(model_type, handles, feature_names, graph_dir, blocks)
+    except Exception as e:
+        # The failed frames still refer to the attached arrays.
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        gc.collect()
+        for block in blocks:
+            block.close()
+    result["training_seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def parse_model_types(data):
+    """The requested model types; every type when none are given."""
+    if hasattr(data, 'getlist'):
+        values = data.getlist('model_types')
+    else:
+        values = data.get('model_types') or []
+        if isinstance(values, str):
+            values = [values]
+    requested = [value.strip() for item in values for value in str(item).split(',') if value.strip()]
+    if not requested:
+        return list(ALGORITHMS)
+    unknown = [value for value in requested if value not in ALGORITHMS]
+    if unknown:
+        raise DatasetValidationError(
+            f"Unknown model types: {', '.join(unknown)}.",
+            "UNKNOWN_MODEL_TYPE",
+            available_model_types=list(ALGORITHMS),
+        )
+    return [model_type for model_type in ALGORITHMS if model_type in requested]
+
+
+def _regression_target(df, target_col):
+    """The numeric target; regressions have no label classes."""
+    y = pd.to_numeric(df[target_col], errors='coerce')
+    if y.isnull().any():
+        raise DatasetValidationError(
+            "Target column must contain numeric values for regression.",
+            "NON_NUMERIC_TARGET",
+        )
+    return y, None
+
+
+def _classification_target(df, target_col):
+    """The class target, with the original labels when it had to be label-encoded."""
+    y_raw = df[target_col]
+    unique_targets = y_raw.nunique()
+    if unique_targets < 2:
+        raise DatasetValidationError(
+            "Target column must have at least 2 unique values for classification",
+            "INSUFFICIENT_TARGET_CLASSES",
+        )
+    if unique_targets > MAX_CLASSES:
+        raise DatasetValidationError(
+            f"Target column has too many unique values (>{MAX_CLASSES}). Consider using regression instead.",
+            "TOO_MANY_TARGET_CLASSES",
+        )
+    try:
+        return y_raw.astype(int), None
+    except (ValueError, TypeError):
+        label_encoder = LabelEncoder()
+        return label_encoder.fit_transform(y_raw), label_encoder.classes_
+
+
+def _split(X, y, task):
+    """The same split the task's training views make."""
+    if task == CLASSIFICATION:
+        try:
+            return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        except ValueError:
+            pass
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def _save_trained_model(model_type, result, data, target_col, feature_names, encoder, label_classes, dataset, user):
+    base_name = data.get('model_name')
+    label = ModelType(model_type).label
+    temp_file = NamedTemporaryFile(delete=False, suffix=".pkl")
+    temp_file.close()
+    try:
+        dump_artifact(result['model'], temp_file.name)
+        with open(temp_file.name, 'rb') as f:
+            ml_model = TrainedModel.objects.create(
+                model_type=model_type,
+                model_name=f"{base_name} ({label})" if base_name else label,
+                polynomial_degree=result['details'].get('polynomial_degree'),
+                target_column=target_col,
+                features=",".join(feature_names),
+                user_id=user.id,
+                dataset=dataset,
+                csv_file=dataset.csv_file.name
+            )
+            ml_model.model_file.save(f"{ml_model.id}_model.pkl", File(f))
+    finally:
+        os.remove(temp_file.name)
+
+    if model_type == ModelType.POLYNOMIAL_REGRESSION and encoder.use_sparse:
+        # The polynomial pipeline was fit on the densified matrix.
+        encoder = copy.copy(encoder)
+        encoder.sparse_threshold = None
+        encoder.use_sparse = False
+    save_preprocessor(ml_model, encoder, label_classes)
+    save_model_metadata(ml_model, result['model'])
+    ml_model.save()
+
+    ModelStats.objects.create(trained_model=ml_model, **result['metrics'])
+    for prefix, path, title, description in result['graphs']:
+        with open(path, 'rb') as img_file:
+            ModelGraph.objects.create(
+                trained_model=ml_model,
+                title=title,
+                description=description,
+                graph_image=ImageFile(img_file, name=f"{prefix}_{ml_model.id}.png")
+            )
+    return ml_model
+
+
+def _train_on_pool(model_types, handles, feature_names, graph_dir, workers):
+    """
+    Train ``model_types`` on the shared worker pool, at most ``workers`` at
+    a time so the request stays within its core lease.
+    Returns ``(results, failed)``.
+    """
+    pool = get_worker_pool()
+    pending = list(model_types)
+    running = {}
+    results = {}
+    failed = []
+
+    while pending or running:
+        while pending and len(running) < workers:
+            model_type = pending.pop(0)
+            try:
+                future = pool.submit(
+                    train_in_worker, model_type, handles[ALGORITHMS[model_type][0]],
+                    feature_names, graph_dir
+                )
+            except BrokenProcessPool as e:
+                _discard_worker_pool(pool)
+                failed.append({
+                    "model_type": model_type,
+                    "error": f"Failed to train model: {str(e)}",
+                    "code": "MODEL_TRAINING_ERROR",
+                })
+                continue
+            running[future] = model_type
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            model_type = running.pop(future)
+            try:
+                results[model_type] = future.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    _discard_worker_pool(pool)
+                logger.error(f"Training {model_type} failed: {str(e)}")
+                failed.append({
+                    "model_type": model_type,
+                    "error": f"Failed to train model: {str(e)}",
+                    "code": "MODEL_TRAINING_ERROR",
+                })
+    return results, failed
+
+
+def _leaderboard(entries):
+    board = {REGRESSION: [], CLASSIFICATION: []}
+    for entry in entries:
+        board[entry.pop('task')].append(entry)
+    for task, rows in board.items():
+        rows.sort(key=lambda row: row['score'] if row['score'] is not None else -np.inf, reverse=True)
+        for rank, row in enumerate(rows, start=1):
+            row['rank'] = rank
+    return board
+
+
+def train_all_models(data, csv_file, user):
+    """
+    Train every requested model type on one upload and rank them.
+
+    The CSV is parsed, one-hot encoded and split once per task; the split
+    matrices are placed in shared memory and the model types train
+    concurrently on the process-wide worker pool, as many at once as a core
+    lease allows. Each finished
+    model is saved with its stats and graphs like a single training.
+    Returns a Response with a leaderboard per task, best score first.
+    """
+    target_col = data.get('target_col')
+    if not target_col:
+        return Response({
+            "error": "Target column is required.",
+            "code": "MISSING_TARGET_COLUMN"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if csv_file is None:
+        return Response({
+            "error": "CSV file is required.",
+            "code": "MISSING_CSV_FILE"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not csv_file.name.lower().endswith('.csv'):
+        return Response({
+            "error": "File must be a CSV.",
+            "code": "INVALID_FILE_TYPE"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        model_types = parse_model_types(data)
+        dataset, df = load_training_data(csv_file, target_col, min_rows=MIN_ROWS)
+        X, feature_names, encoder = build_feature_matrix(df, target_col)
+    except DatasetValidationError as e:
+        return Response(e.to_dict(), status=status.HTTP_400_BAD_REQUEST)
+
+    if X.shape[0] == 0 or X.shape[1] == 0:
+        return Response({
+            "error": "No features after preprocessing.",
+            "code": "NO_FEATURES"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    failed = []
+    splits = {}
+    label_classes = {}
+    for task, target in ((REGRESSION, _regression_target), (CLASSIFICATION, _classification_target)):
+        task_types = [model_type for model_type in model_types if ALGORITHMS[model_type][0] == task]
+        if not task_types:
+            continue
+        try:
+            y, label_classes[task] = target(df, target_col)
+            splits[task] = _split(X, y, task)
+        except DatasetValidationError as e:
+            failed += [{"model_type": model_type, **e.to_dict()} for model_type in task_types]
+
+    runnable = [model_type for model_type in model_types if ALGORITHMS[model_type][0] in splits]
+    if not runnable:
+        return Response({
+            "error": "None of the requested model types can be trained on this target column.",
+            "code": "NO_TRAINABLE_MODELS",
+            "failed": failed,
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    graph_dir = tempfile.mkdtemp(prefix='train-all-')
+    try:
+        with SharedArrays() as shared:
+            handles = {
+                task: [shared.share(part) for part in split]
+                for task, split in splits.items()
+            }
+            with core_lease("train-all", requested=len(runnable)) as workers:
+                results, pool_failed = _train_on_pool(runnable, handles, feature_names, graph_dir, workers)
+                failed += pool_failed
+
+        entries = []
+        for model_type in runnable:
+            if model_type not in results:
+                continue
+            result = results[model_type]
+            task = ALGORITHMS[model_type][0]
+            ml_model = _save_trained_model(
+                model_type, result, data, target_col, feature_names, encoder,
+                label_classes[task], dataset, user
+            )
+            entries.append({
+                "task": task,
+                "model_type": model_type,
+                "model": {
+                    "id": str(ml_model.id),
+                    "name": ml_model.model_name,
+                    "type": ml_model.model_type,
+                    "polynomial_degree": ml_model.polynomial_degree,
+                },
+                "score": result['metrics'].get('r2_score' if task == REGRESSION else 'accuracy'),
+                "metrics": ModelStatsSerializer(ml_model.stats).data,
+                "training_seconds": result['training_seconds'],
+                "details": result['details'],
+            })
+    finally:
+        shutil.rmtree(graph_dir, ignore_errors=True)
+
+    if not entries:
+        return Response({
+            "error": "Every requested model failed to train.",
+            "code": "MODEL_TRAINING_ERROR",
+            "failed": failed,
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        "message": f"Trained {len(entries)} of {len(model_types)} model types.",
+        "target_column": target_col,
+        "features": ",".join(feature_names),
+        "rows": dataset.row_count,
+        "leaderboard": _leaderboard(entries),
+        "failed": failed,
+    }, status=status.HTTP_200_OK)
@@ -3,10 +3,19 @@ from . import views
 
 urlpatterns = [
     path('detail/<str:pk>/', views.ModelDetailView.as_view(), name='model_detail'),
+    path('detail/<str:pk>/predict/', views.ModelBatchPredictView.as_view(), name='model_batch_predict'),
+    path('detail/<str:pk>/predict-async/', views.ModelAsyncPredictView.as_view(), name='model_async_predict'),
+    path('detail/<str:pk>/predict-csv/', views.ModelBulkPredictView.as_view(), name='model_bulk_predict'),
     path('', views.ModelListView.as_view(), name='model_list'),
+    path('search/', views.ModelSearchView.as_view(), name='model_search'),
     path('user/', views.UserTrainedModelView.as_view(), name='user_trained_models'),
     path('update-model/<str:pk>/', views.ModelUpdateView.as_view(), name='update_model'),
     path('user/liked-models/', views.getUserLikedModels, name='user_liked_models'),
     path('report/<uuid:model_id>/', views.download_model_report, name='download_model_report'),
     path('train/', views.TrainModelView.as_view(), name='train_model'),
+    path('train-all/', views.TrainAllModelsView.as_view(), name='train_all_models'),
+    path('jobs/', views.TrainingJobView.as_view(), name='training_job_submit'),
+    path('jobs/<uuid:job_id>/', views.TrainingJobStatusView.as_view(), name='training_job_status'),
+    path('jobs/<uuid:job_id>/result/', views.TrainingJobResultView.as_view(), name='training_job_result'),
+    path('capacity/', views.TrainingCapacityView.as_view(), name='training_capacity'),
 ]
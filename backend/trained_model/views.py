@@ -1,26 +1,49 @@
 from datetime import datetime
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from django.http import Http404, HttpResponse
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.urls import replace_query_param
 from django.core.exceptions import ValidationError
 from accounts.models import User
 
-import requests
 import json
-import joblib
-from sklearn.preprocessing import PolynomialFeatures
 import numpy as np
+import pandas as pd
 import logging
 import os
 
-from .models import TrainedModel
-from .serializer import TrainedModelSerializer, ModelStatsSerializer, ModelGraphSerializer
+from .models import TrainedModel, TrainingJob
+from .artifacts import load_model, load_preprocessor
+from .serializer import (
+    TrainedModelSerializer,
+    TrainedModelSummarySerializer,
+    ModelStatsSerializer,
+    ModelGraphSerializer,
+    TrainingJobSerializer,
+)
+from .pagination import ModelCursorPagination, InvalidPage
+from .likes import set_like
+from .search import search_public_models
+from .jobs import submit_job, JOB_PARAM_EXCLUDE
+from .quota import has_training_quota
+from .registry import is_training_endpoint, run_training, run_with_quota
+from .train_all import train_all_models
 from ml_utils.pdf_generator import ModelReportGenerator
+from ml_utils.cpu_scheduler import scheduler
+from ml_utils.model_cache import model_cache
+from ml_utils.micro_batching import prediction_batcher
+from backend.authentication import HeaderJWTAuthentication
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +54,19 @@ class UserTrainedModelView(APIView):
     def get(self, request):
         try:
             userId = request.user.id
-            trained_models = TrainedModel.objects.filter(user_id=userId)
-            serializer = TrainedModelSerializer(trained_models, many=True)
+            trained_models = TrainedModel.objects.filter(user_id=userId).select_related('stats')
+            page, next_url = ModelCursorPagination().paginate_queryset(trained_models, request)
+            serializer = TrainedModelSummarySerializer(page, many=True)
             return Response({
                 "message": "User trained models retrieved successfully.",
-                "data": serializer.data
+                "data": serializer.data,
+                "next": next_url
             }, status=status.HTTP_200_OK)
+        except InvalidPage as e:
+            return Response({
+                "error": "Invalid page request.",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error retrieving user trained models for user {request.user.id}: {str(e)}")
             return Response({
@@ -48,12 +78,19 @@ class ModelListView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
         try:
-            trained_models = TrainedModel.objects.filter(is_public=True)
-            serializer = TrainedModelSerializer(trained_models, many=True)
+            trained_models = TrainedModel.objects.filter(is_public=True).select_related('stats')
+            page, next_url = ModelCursorPagination().paginate_queryset(trained_models, request)
+            serializer = TrainedModelSummarySerializer(page, many=True)
             return Response({
                 "message": "Public models retrieved successfully.",
-                "data": serializer.data
+                "data": serializer.data,
+                "next": next_url
             }, status=status.HTTP_200_OK)
+        except InvalidPage as e:
+            return Response({
+                "error": "Invalid page request.",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error retrieving public models: {str(e)}")
             return Response({
@@ -61,41 +98,87 @@ class ModelListView(APIView):
                 "message": "Please try again later."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class ModelSearchView(APIView):
+    """
+    Public models whose name, target column or features match ``q``, best
+    match first, ``page_size`` at a time (``page`` counts from 1).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            query = request.query_params.get('q', '').strip()
+            if not query:
+                return Response({
+                    "error": "Missing search query.",
+                    "message": "Provide the text to search for as 'q'."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            page_size = ModelCursorPagination().get_page_size(request)
+            try:
+                page = int(request.query_params.get('page', 1))
+            except ValueError:
+                raise InvalidPage("'page' must be an integer.")
+            if page < 1:
+                raise InvalidPage("'page' must be 1 or more.")
+
+            # One extra match tells whether another page follows.
+            results = search_public_models(query, page_size + 1, (page - 1) * page_size)
+            next_url = None
+            if len(results) > page_size:
+                results = results[:page_size]
+                next_url = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+
+            serializer = TrainedModelSummarySerializer(results, many=True)
+            return Response({
+                "message": "Search completed successfully.",
+                "data": serializer.data,
+                "next": next_url
+            }, status=status.HTTP_200_OK)
+        except InvalidPage as e:
+            return Response({
+                "error": "Invalid page request.",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error searching public models: {str(e)}")
+            return Response({
+                "error": "An error occurred while searching models.",
+                "message": "Please try again later."
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class ModelDetailView(APIView):
     
     permission_classes = [IsAuthenticated]
     
-    def get_object(self, pk):
+    def get_object(self, pk, queryset=None):
+        if queryset is None:
+            queryset = (
+                TrainedModel.objects
+                .select_related('stats', 'metadata')
+                .prefetch_related('graphs')
+            )
         try:
-            return TrainedModel.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except TrainedModel.DoesNotExist:
             raise Http404("Model not found.")
         except ValidationError:
             raise Http404("Invalid model ID format.")
+
+    def model_metadata(self, trained_model):
+        """Coefficients and hyperparameters recorded at training time; no artifact is read."""
+        metadata = getattr(trained_model, 'metadata', None)
+        return {
+            "coefficients": metadata.coefficients if metadata else None,
+            "intercept": metadata.intercept if metadata else None,
+            "feature_importances": metadata.feature_importances if metadata else None,
+            "hyperparameters": metadata.hyperparameters if metadata else {},
+        }
         
     def get(self, request, pk):
         try:
             trained_model = self.get_object(pk)
             
-            model_coefficients = None
-            model_intercept = None
-            
-            if trained_model.model_file:
-                try:
-                    model_file_path = trained_model.model_file.path
-                    
-                    if not os.path.exists(model_file_path):
-                        logger.warning(f"Model file not found: {model_file_path}")
-                    else:
-                        model = joblib.load(model_file_path)
-                        model_coefficients = model.coef_.tolist() if hasattr(model, "coef_") else None
-                        model_intercept = model.intercept_.tolist() if hasattr(model, "intercept_") else None
-                        
-                except (FileNotFoundError, EOFError, ValueError) as e:
-                    logger.error(f"Error loading model file for model {pk}: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Unexpected error loading model file for model {pk}: {str(e)}")
-            
             return Response({
                 "message": "Model data retrieved successfully.",
                 "model": {
@@ -113,8 +196,7 @@ class ModelDetailView(APIView):
                 },
                 "metrics": ModelStatsSerializer(trained_model.stats).data if hasattr(trained_model, "stats") else {},
                 "graphs": ModelGraphSerializer(trained_model.graphs.all(), many=True).data,
-                "coefficients": model_coefficients,
-                "intercept": model_intercept,
+                **self.model_metadata(trained_model),
             }, status=status.HTTP_200_OK)
             
         except Http404 as e:
@@ -131,7 +213,8 @@ class ModelDetailView(APIView):
 
     def post(self, request, pk):
         try:
-            trained_model = self.get_object(pk)
+            # Predicting needs only the artifact, not the stats and graphs the detail page joins.
+            trained_model = self.get_object(pk, TrainedModel.objects.only('id', 'model_file', 'preprocessor_file'))
             
             # Check if model file exists
             if not trained_model.model_file:
@@ -151,7 +234,7 @@ class ModelDetailView(APIView):
                 }, status=status.HTTP_404_NOT_FOUND)
 
             try:
-                model = joblib.load(model_file_path)
+                model = load_model(trained_model)
             except (FileNotFoundError, EOFError, ValueError) as e:
                 logger.error(f"Error loading model file {model_file_path}: {str(e)}")
                 return Response({
@@ -175,9 +258,17 @@ class ModelDetailView(APIView):
                     "message": "All feature values must be numeric."
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            try:
+                encoder = load_preprocessor(trained_model)
+            except (FileNotFoundError, EOFError, ValueError) as e:
+                logger.error(f"Error loading preprocessor for model {pk}: {str(e)}")
+                encoder = None
+
             # Make prediction
             try:
                 prediction = model.predict(features_array)
+                if encoder is not None:
+                    prediction = encoder.decode_labels(prediction)
                 return Response({
                     "message": "Prediction completed successfully.",
                     "prediction": prediction.tolist()
@@ -218,22 +309,6 @@ class ModelDetailView(APIView):
             serializer = TrainedModelSerializer(trained_model, data=data, partial=True)
             if serializer.is_valid():
                 serializer.save()
-                
-                if trained_model.model_file:
-                    try:
-                        model_file_path = trained_model.model_file.path
-                        
-                        if not os.path.exists(model_file_path):
-                            logger.warning(f"Model file not found: {model_file_path}")
-                        else:
-                            model = joblib.load(model_file_path)
-                            model_coefficients = model.coef_.tolist() if hasattr(model, "coef_") else None
-                            model_intercept = model.intercept_.tolist() if hasattr(model, "intercept_") else None
-                            
-                    except (FileNotFoundError, EOFError, ValueError) as e:
-                        logger.error(f"Error loading model file for model {pk}: {str(e)}")
-                    except Exception as e:
-                        logger.error(f"Unexpected error loading model file for model {pk}: {str(e)}")
                     
                 return Response({
                     "message": f"Model visibility updated to {'public' if data['is_public'] else 'private'}.",
@@ -252,8 +327,7 @@ class ModelDetailView(APIView):
                     },
                     "metrics": ModelStatsSerializer(trained_model.stats).data if hasattr(trained_model, "stats") else {},
                     "graphs": ModelGraphSerializer(trained_model.graphs.all(), many=True).data,
-                    "coefficients": model_coefficients,
-                    "intercept": model_intercept,
+                    **self.model_metadata(trained_model),
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({
@@ -274,6 +348,379 @@ class ModelDetailView(APIView):
                 "message": "Please try again later."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class ModelBatchPredictView(APIView):
+
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self, pk):
+        try:
+            return TrainedModel.objects.get(pk=pk)
+        except TrainedModel.DoesNotExist:
+            raise Http404("Model not found.")
+        except ValidationError:
+            raise Http404("Invalid model ID format.")
+
+    def parse_rows(self, request, encoder):
+        """
+        Build a frame of raw named rows from either an uploaded CSV
+        (``csv_file``) or a JSON body: ``{"rows": [{...}, ...]}`` or a bare list.
+        """
+        if 'csv_file' in request.FILES:
+            # Categorical columns were text at training time, keep them as text.
+            dtypes = {column: str for column in encoder.categories}
+            return pd.read_csv(request.FILES['csv_file'], dtype=dtypes)
+
+        rows = request.data.get('rows') if hasattr(request.data, 'get') else request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("'rows' must be a list of objects mapping feature names to values.")
+        return pd.DataFrame.from_records(rows)
+
+    def post(self, request, pk):
+        try:
+            trained_model = self.get_object(pk)
+
+            if not trained_model.model_file or not os.path.exists(trained_model.model_file.path):
+                return Response({
+                    "error": "Model file not available.",
+                    "message": "This model cannot be used for predictions."
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                encoder = load_preprocessor(trained_model)
+            except (FileNotFoundError, EOFError, ValueError) as e:
+                logger.error(f"Error loading preprocessor for model {pk}: {str(e)}")
+                encoder = None
+
+            if encoder is None:
+                return Response({
+                    "error": "Preprocessing pipeline not available.",
+                    "message": "This model was trained before named-feature prediction was supported. Use positional features instead."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                rows = self.parse_rows(request, encoder)
+            except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+                return Response({
+                    "error": "Invalid input rows.",
+                    "message": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if rows.empty:
+                return Response({
+                    "error": "No rows provided.",
+                    "message": "At least one row is required for prediction."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            missing = encoder.missing_columns(rows)
+            if missing:
+                return Response({
+                    "error": "Missing feature columns.",
+                    "message": f"Every row must provide: {', '.join(encoder.input_columns)}.",
+                    "missing_columns": missing
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                X = encoder.transform(rows)
+            except (ValueError, TypeError) as e:
+                return Response({
+                    "error": "Invalid feature values.",
+                    "message": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                model = load_model(trained_model)
+                predictions = encoder.decode_labels(model.predict(X))
+            except Exception as e:
+                logger.error(f"Batch prediction failed for model {pk}: {str(e)}")
+                return Response({
+                    "error": "Prediction failed.",
+                    "message": "The model could not process the provided rows. Please check the input values."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({
+                "message": "Predictions completed successfully.",
+                "count": len(predictions),
+                "predictions": predictions.tolist()
+            }, status=status.HTTP_200_OK)
+
+        except Http404:
+            return Response({
+                "error": "Model not found.",
+                "message": "The specified model does not exist."
+            }, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error(f"Unexpected error in batch prediction for model {pk}: {str(e)}")
+            return Response({
+                "error": "An unexpected error occurred.",
+                "message": "Please try again later."
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def predict_frame(model, encoder, frame):
+    """
+    Encode a frame of raw named rows and predict it in one vectorized call.
+    Returns ``(predictions, probabilities, classes)``; the last two are None
+    for regressors. Classifier labels are the target's original values.
+    """
+    X = encoder.transform(frame)
+    if hasattr(model, 'predict_proba') and hasattr(model, 'classes_'):
+        # The label is the most probable class, so one predict_proba serves both.
+        probabilities = model.predict_proba(X)
+        classes = encoder.decode_labels(model.classes_)
+        return classes[probabilities.argmax(axis=1)], probabilities, classes
+    return model.predict(X), None, None
+
+
+def predict_records(model, encoder, records):
+    """
+    Encode raw named rows and predict them in one vectorized call.
+    Classifiers return each row's label with its class probabilities.
+    """
+    predictions, probabilities, classes = predict_frame(model, encoder, pd.DataFrame.from_records(records))
+    if probabilities is None:
+        return [{"prediction": value} for value in predictions.tolist()]
+    classes = [str(label) for label in classes.tolist()]
+    return [
+        {"prediction": label, "probabilities": dict(zip(classes, row))}
+        for label, row in zip(predictions.tolist(), probabilities.tolist())
+    ]
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ModelAsyncPredictView(View):
+    """
+    Async named-feature prediction for a row (``{"row": {...}}``) or a few
+    rows (``{"rows": [...]}``).
+
+    Concurrent requests for the same model are collected into micro-batches
+    (see ``PREDICTION_BATCH_MAX_WAIT_MS`` and ``PREDICTION_BATCH_MAX_ROWS``)
+    that each run one ``predict``/``predict_proba`` call. Requests only share
+    batches when served by an ASGI server (backend.asgi).
+    """
+
+    def authenticate(self, request):
+        result = HeaderJWTAuthentication().authenticate(request)
+        return result[0] if result else None
+
+    def load_artifacts(self, pk):
+        try:
+            trained_model = TrainedModel.objects.get(pk=pk)
+        except (TrainedModel.DoesNotExist, ValidationError):
+            raise Http404("Model not found.")
+        if not trained_model.model_file or not os.path.exists(trained_model.model_file.path):
+            return trained_model, None, None
+        return trained_model, load_model(trained_model), load_preprocessor(trained_model)
+
+    async def post(self, request, pk):
+        try:
+            try:
+                user = await sync_to_async(self.authenticate)(request)
+            except AuthenticationFailed as e:
+                user = None
+                logger.warning(f"Prediction request rejected: {str(e)}")
+            if user is None:
+                return JsonResponse({
+                    "error": "Authentication required.",
+                    "message": "A valid bearer token is required."
+                }, status=status.HTTP_401_UNAUTHORIZED)
+
+            try:
+                body = json.loads(request.body or b'{}')
+            except json.JSONDecodeError:
+                body = None
+            single = isinstance(body, dict) and isinstance(body.get('row'), dict)
+            rows = [body['row']] if single else (body.get('rows') if isinstance(body, dict) else None)
+            if not rows or not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                return JsonResponse({
+                    "error": "Invalid input rows.",
+                    "message": "Send {'row': {...}} or {'rows': [{...}, ...]} mapping feature names to values."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                trained_model, model, encoder = await sync_to_async(self.load_artifacts)(pk)
+            except Http404:
+                return JsonResponse({
+                    "error": "Model not found.",
+                    "message": "The specified model does not exist."
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            if model is None:
+                return JsonResponse({
+                    "error": "Model file not available.",
+                    "message": "This model cannot be used for predictions."
+                }, status=status.HTTP_404_NOT_FOUND)
+            if encoder is None:
+                return JsonResponse({
+                    "error": "Preprocessing pipeline not available.",
+                    "message": "This model was trained before named-feature prediction was supported. Use positional features instead."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            missing = sorted({column for row in rows for column in encoder.input_columns if column not in row})
+            if missing:
+                return JsonResponse({
+                    "error": "Missing feature columns.",
+                    "message": f"Every row must provide: {', '.join(encoder.input_columns)}.",
+                    "missing_columns": missing
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                results, batch_size = await prediction_batcher.submit(
+                    (str(trained_model.id), trained_model.model_file.name),
+                    rows,
+                    lambda records: predict_records(model, encoder, records),
+                )
+            except (ValueError, TypeError) as e:
+                return JsonResponse({
+                    "error": "Invalid feature values.",
+                    "message": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            response = {"message": "Prediction completed successfully.", "batch_size": batch_size}
+            if single:
+                response.update(results[0])
+            else:
+                response["predictions"] = results
+            return JsonResponse(response, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Async prediction failed for model {pk}: {str(e)}")
+            return JsonResponse({
+                "error": "Prediction failed.",
+                "message": "Please try again later."
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ModelBulkPredictView(APIView):
+    """
+    Score an uploaded CSV (``csv_file``) of named rows and stream the
+    predictions back as CSV: ``row,prediction`` plus one
+    ``probability_<class>`` column per class for classifiers.
+
+    Rows are read and predicted ``BULK_PREDICTION_CHUNK_ROWS`` at a time, so
+    memory stays flat however large the upload is. The first chunk is checked
+    before the response starts. A later chunk that fails ends the stream with
+    a ``# error: prediction stopped at row <n>: <reason>`` line; the rows
+    before it are complete and row ``n`` onwards were not scored.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def get_object(self, pk):
+        try:
+            return TrainedModel.objects.get(pk=pk)
+        except TrainedModel.DoesNotExist:
+            raise Http404("Model not found.")
+        except ValidationError:
+            raise Http404("Invalid model ID format.")
+
+    def stream(self, model, encoder, first_csv, start, chunks):
+        yield first_csv
+        try:
+            for chunk in chunks:
+                yield self.prediction_csv(model, encoder, chunk, start, header=False)
+                start += len(chunk)
+        except Exception as e:
+            logger.error(f"Bulk prediction stopped at row {start}: {str(e)}")
+            # The 200 status is already sent, so the failure goes in the body.
+            reason = " ".join(str(e).split())
+            yield f"# error: prediction stopped at row {start}: {reason}\n"
+
+    def prediction_csv(self, model, encoder, chunk, start, header):
+        predictions, probabilities, classes = predict_frame(model, encoder, chunk)
+        output = pd.DataFrame({
+            'row': np.arange(start, start + len(chunk)),
+            'prediction': predictions,
+        })
+        if probabilities is not None:
+            for index, label in enumerate(classes.tolist()):
+                output[f'probability_{label}'] = probabilities[:, index]
+        return output.to_csv(index=False, header=header)
+
+    def post(self, request, pk):
+        try:
+            trained_model = self.get_object(pk)
+
+            if not trained_model.model_file or not os.path.exists(trained_model.model_file.path):
+                return Response({
+                    "error": "Model file not available.",
+                    "message": "This model cannot be used for predictions."
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                encoder = load_preprocessor(trained_model)
+            except (FileNotFoundError, EOFError, ValueError) as e:
+                logger.error(f"Error loading preprocessor for model {pk}: {str(e)}")
+                encoder = None
+
+            if encoder is None:
+                return Response({
+                    "error": "Preprocessing pipeline not available.",
+                    "message": "This model was trained before named-feature prediction was supported. Use positional features instead."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            csv_file = request.FILES.get('csv_file')
+            if csv_file is None:
+                return Response({
+                    "error": "No CSV file provided.",
+                    "message": "Upload the rows to score as 'csv_file'."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                # Categorical columns were text at training time, keep them as text.
+                chunks = pd.read_csv(
+                    csv_file,
+                    dtype={column: str for column in encoder.categories},
+                    chunksize=settings.BULK_PREDICTION_CHUNK_ROWS,
+                )
+                first_chunk = next(chunks, None)
+            except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+                return Response({
+                    "error": "Invalid input rows.",
+                    "message": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if first_chunk is None or first_chunk.empty:
+                return Response({
+                    "error": "No rows provided.",
+                    "message": "At least one row is required for prediction."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            missing = encoder.missing_columns(first_chunk)
+            if missing:
+                return Response({
+                    "error": "Missing feature columns.",
+                    "message": f"Every row must provide: {', '.join(encoder.input_columns)}.",
+                    "missing_columns": missing
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                model = load_model(trained_model)
+                first_csv = self.prediction_csv(model, encoder, first_chunk, 0, header=True)
+            except (ValueError, TypeError) as e:
+                return Response({
+                    "error": "Invalid feature values.",
+                    "message": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            start = len(first_chunk)
+            response = StreamingHttpResponse(
+                self.stream(model, encoder, first_csv, start, chunks),
+                content_type='text/csv',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{trained_model.id}_predictions.csv"'
+            return response
+
+        except Http404:
+            return Response({
+                "error": "Model not found.",
+                "message": "The specified model does not exist."
+            }, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error(f"Unexpected error in bulk prediction for model {pk}: {str(e)}")
+            return Response({
+                "error": "An unexpected error occurred.",
+                "message": "Please try again later."
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class ModelUpdateView(APIView):
     
     permission_classes = [IsAuthenticated]
@@ -303,18 +750,9 @@ class ModelUpdateView(APIView):
                     "message": "'state' must be either 'like' or 'dislike'."
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            if state == 'like':
-                trained_model.likes += 1
-            elif state == 'dislike':
-                if trained_model.likes > 0:
-                    trained_model.likes -= 1
-                else:
-                    return Response({
-                        "error": "Invalid operation.",
-                        "message": "Cannot dislike a model with zero likes."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-            
-            trained_model.save()
+            # Likes are per user, so repeating a request leaves the count unchanged.
+            set_like(request.user, trained_model.pk, state == 'like')
+            trained_model.refresh_from_db(fields=['likes'])
             serializer = TrainedModelSerializer(trained_model)
             
             return Response({
@@ -335,51 +773,28 @@ class ModelUpdateView(APIView):
                 "message": "Please try again later."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
   
-@api_view(['POST'])
+@api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def getUserLikedModels(request):
+    """
+    The signed-in user's liked models, most recently liked first. POST is
+    kept for older clients; any ids in its body are ignored.
+    """
     try:
-        if not request.body:
-            return Response({
-                "error": "Empty request body.",
-                "message": "Request body with 'models' field is required."
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            data = json.loads(request.body)
-        except json.JSONDecodeError as e:
-            return Response({
-                "error": "Invalid JSON format.",
-                "message": "Please provide valid JSON data.",
-                "details": str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
+        liked_models = (
+            TrainedModel.objects
+            .filter(model_likes__user=request.user)
+            .select_related('stats')
+            .order_by('-model_likes__created_at')
+        )
+        serializer = TrainedModelSummarySerializer(liked_models, many=True)
 
-        model_ids = data.get('models')
-        
-        if len(model_ids) == 0:
-            return Response({
-                "message": "No models requested.",
-                "data": []
-            }, status=status.HTTP_200_OK)
+        return Response({
+            "message": "Liked models retrieved successfully.",
+            "data": serializer.data,
+            "total_found": len(serializer.data)
+        }, status=status.HTTP_200_OK)
 
-        try:
-            liked_models = TrainedModel.objects.filter(id__in=model_ids)
-            serializer = TrainedModelSerializer(liked_models, many=True)
-            
-            return Response({
-                "message": "Liked models retrieved successfully.",
-                "data": serializer.data,
-                "total_found": len(serializer.data),
-                "total_requested": len(model_ids)
-            }, status=status.HTTP_200_OK)
-            
-        except ValidationError as e:
-            return Response({
-                "error": "Invalid model ID format.",
-                "message": "One or more model IDs have invalid format.",
-                "details": str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
-            
     except Exception as e:
         logger.error(f"Unexpected error in getUserLikedModels: {str(e)}")
         return Response({
@@ -430,54 +845,174 @@ class TrainModelView(APIView):
                     "success": False
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            files = {
-                "csv_file": (file.name, file.read(), file.content_type)
-            }
+            if not is_training_endpoint(endpoint):
+                return Response({
+                    "message": f"Unknown training endpoint: {endpoint}",
+                    "success": False
+                }, status=status.HTTP_400_BAD_REQUEST)
+
             data = {
                 "model_name": model_name,
                 "target_col": target_col
             }
 
-            token = request.META.get("HTTP_AUTHORIZATION")
-            if not token:
-                return Response({"message": "Authorization token missing."}, status=status.HTTP_401_UNAUTHORIZED)
-
-            token = token.replace("Bearer ", "")
-
-            response = requests.post(
-                f"http://localhost:8000/api/v1/{endpoint}/",
-                data=data,
-                files=files,
-                headers={"Authorization": f"Bearer {token}"}
-            )
+            response = run_training(endpoint, data, file, curr_user)
 
             if response.status_code == 200:
-                if not curr_user.premium_user:
-                    curr_user.limit -= 1
-                    curr_user.save()
                 return Response({
                     "message": "Model training completed.",
                     "success": True,
-                    "data": response.json()
+                    "data": response.data
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({
                     "message": "Model training failed at ML server.",
                     "success": False,
-                    "error": response.json()
+                    "error": response.data
                 }, status=response.status_code)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error during model training: {str(e)}")
+        except Exception as e:
+            logger.exception("Internal server error")
             return Response({
-                "message": "Error communicating with ML server.",
+                "message": "Internal server error.",
                 "success": False,
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TrainingJobView(APIView):
+    parser_classes = [MultiPartParser]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            if not has_training_quota(request.user):
+                return Response({
+                    "message": "You have reached your limit. Please upgrade to premium.",
+                    "success": False
+                }, status=status.HTTP_403_FORBIDDEN)
+
+            model_name = request.data.get("model_name")
+            target_col = request.data.get("target_col")
+            endpoint = request.data.get("endpoint")
+            file = request.FILES.get("csv_file")
+
+            if not all([model_name, target_col, endpoint, file]):
+                return Response({
+                    "message": "Missing required fields: model_name, target_col, endpoint, or file.",
+                    "success": False
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if not is_training_endpoint(endpoint):
+                return Response({
+                    "message": f"Unknown training endpoint '{endpoint}'.",
+                    "success": False
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if not file.name.lower().endswith('.csv'):
+                return Response({
+                    "message": "File must be a CSV.",
+                    "success": False
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            params = {
+                key: request.data.get(key)
+                for key in request.data
+                if key not in JOB_PARAM_EXCLUDE
+            }
+            job = submit_job(request.user, endpoint, params, file)
+
+            return Response({
+                "message": "Training job queued.",
+                "success": True,
+                "job": TrainingJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
+
         except Exception as e:
-            logger.exception("Internal server error")
+            logger.exception("Error queueing training job")
             return Response({
                 "message": "Internal server error.",
                 "success": False,
                 "error": str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TrainingJobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = TrainingJob.objects.filter(id=job_id, user=request.user).first()
+        if job is None:
+            return Response({
+                "error": "Job not found.",
+                "message": "The specified training job does not exist."
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "message": "Training job status retrieved successfully.",
+            "job": TrainingJobSerializer(job).data
+        }, status=status.HTTP_200_OK)
+
+
+class TrainingJobResultView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = TrainingJob.objects.filter(id=job_id, user=request.user).first()
+        if job is None:
+            return Response({
+                "error": "Job not found.",
+                "message": "The specified training job does not exist."
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        if job.status in (TrainingJob.Status.PENDING, TrainingJob.Status.RUNNING):
+            return Response({
+                "message": "Training job has not finished yet.",
+                "success": False,
+                "job": TrainingJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
+
+        if job.status == TrainingJob.Status.SUCCEEDED:
+            return Response({
+                "message": "Model training completed.",
+                "success": True,
+                "data": job.result
+            }, status=status.HTTP_200_OK)
+
+        return Response({
+            "message": "Model training failed.",
+            "success": False,
+            "error": job.result or {"error": job.error}
+        }, status=job.status_code or status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TrainingCapacityView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        pending = TrainingJob.objects.filter(status=TrainingJob.Status.PENDING).count()
+        return Response({
+            "message": "Training capacity retrieved successfully.",
+            "cpu": scheduler.allocations(),
+            "model_cache": model_cache.stats(),
+            "pending_jobs": pending
+        }, status=status.HTTP_200_OK)
+
+
+class TrainAllModelsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            csv_file = request.FILES.get("csv_file")
+            return run_with_quota(
+                lambda: train_all_models(request.data, csv_file, request.user),
+                request.user
+            )
+        except Exception as e:
+            logger.exception("Internal server error")
+            return Response({
+                "error": "Unexpected server error occurred.",
+                "code": "UNEXPECTED_ERROR",
+                "details": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)